@@ -19,6 +19,81 @@ function normalizeUrl(url) {
 
 let lastLoggedUrl = "";
 
+// Read a Server-Sent Events response, calling onEvent(name, data) per event.
+// (EventSource isn't available in a service worker, so parse it by hand.)
+async function readEvents(response, onEvent) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let end;
+    while ((end = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let name = 'message', data = '';
+      frame.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) name = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      });
+      onEvent(name, data ? JSON.parse(data) : null);
+    }
+  }
+}
+
+// Scan a URL via /log/stream: provisional scores are stored as they arrive,
+// then the final record replaces them exactly as the old /log response did.
+async function streamScan(url) {
+  // Compare the final result with the last *final* scan, not our own
+  // provisional updates.
+  const { lastScan: previousScan } = await chrome.storage.local.get('lastScan');
+  const response = await fetch(
+    'http://localhost:8000/log/stream?url=' + encodeURIComponent(url));
+  if (!response.ok) throw new Error(`Server answered ${response.status}`);
+
+  let partial = {};
+  await readEvents(response, (name, data) => {
+    if (name === 'scanner') {
+      partial[`${data.key}_scan_name`] = data.name;
+      partial[`${data.key}_scan_result`] = data.score === null
+        ? data.details : `Score: ${data.score}/10 - ${data.details}`;
+    } else if (name === 'provisional') {
+      const status = `SCORE: provisional (${data.completed}/${data.total} scans)`;
+      partial = { ...partial, ...data, provisional: true, scoreStatus: status,
+                  scoreStatus_norm: status, scoreStatus_privacy: status,
+                  scoreStatus_security: status, scoreStatus_rand: status,
+                  scoreStatus_adver: status };
+      chrome.storage.local.set({ lastScan: partial });
+    } else if (name === 'final') {
+      const newData = data;
+      let scoreStatus = "nothing changed"; // Default status
+
+      // If we have a previous scan for the same URL, compare final scores.
+      if (
+        previousScan &&
+        !previousScan.provisional &&
+        previousScan.url === newData.url &&
+        previousScan.final_score !== undefined
+      ) {
+        if (newData.final_score > previousScan.final_score) {
+          scoreStatus = "better score";
+        } else if (newData.final_score < previousScan.final_score) {
+          scoreStatus = "worse score";
+        }
+      }
+      // Attach the status to the new scan data.
+      newData.scoreStatus = scoreStatus;
+
+      // Save the new scan data and update the active tab.
+      chrome.storage.local.set({ lastScan: newData, activeTab: newData.url });
+    } else if (name === 'error') {
+      throw new Error(data.detail);
+    }
+  });
+}
+
 chrome.tabs.onUpdated.addListener((tabId, changeInfo, tab) => {
   if (
     changeInfo.status === 'complete' &&
@@ -37,41 +112,11 @@ chrome.tabs.onUpdated.addListener((tabId, changeInfo, tab) => {
     // Update the active tab in storage using normalized URL.
     chrome.storage.local.set({ activeTab: normalizedTabUrl });
 
-    // Log the URL to your backend server.
-    fetch('http://localhost:8000/log', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ url: tab.url })
-    })
-      .then(response => response.json())
-      .then(newData => {
-        // Retrieve the previous scan data for comparison.
-        chrome.storage.local.get('lastScan', function(result) {
-          let previousScan = result.lastScan;
-          let scoreStatus = "nothing changed"; // Default status
-
-          // If we have a previous scan for the same URL, compare final scores.
-          if (
-            previousScan &&
-            previousScan.url === newData.url &&
-            previousScan.final_score !== undefined
-          ) {
-            if (newData.final_score > previousScan.final_score) {
-              scoreStatus = "better score";
-            } else if (newData.final_score < previousScan.final_score) {
-              scoreStatus = "worse score";
-            }
-          }
-          // Attach the status to the new scan data.
-          newData.scoreStatus = scoreStatus;
-          
-          // Save the new scan data and update the active tab.
-          chrome.storage.local.set({ lastScan: newData, activeTab: newData.url });
-        });
-      })
-      .catch(error => {
-        console.error('Error logging URL:', error);
-      });
+    // Log the URL to your backend server.  Scores stream in as each
+    // scanner finishes, so the popup fills in long before the slowest scan.
+    streamScan(tab.url).catch(error => {
+      console.error('Error logging URL:', error);
+    });
 
     // --- Cookie Decliner Injection ---
     chrome.storage.local.get('cookieDeclinerEnabled', (result) => {
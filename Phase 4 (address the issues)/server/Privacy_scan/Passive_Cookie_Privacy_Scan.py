@@ -2,6 +2,8 @@
 import requests
 from typing import List, Tuple
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # “Magic numbers” pulled into constants for quick tweaking
 _PENALTY_SECURE   = 2
 _PENALTY_HTTPONLY = 2
@@ -14,22 +16,20 @@ def _clamp(val: int, low: int, high: int) -> int:
     return max(low, min(high, val))
 
 
-def analyze_cookie_privacy(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
-    """Run the scan and return *(final_score, details_lines)*."""
-    try:
-        resp = requests.get(url, timeout=timeout)
-    except Exception as exc:                     # pragma: no cover
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
+    """Score the cookies of an already-fetched page snapshot."""
+    if snapshot.error is not None:
         # A fetch failure doesn’t tell us anything about cookies.
-        return _MIN_SCORE, [f"Request failed: {exc}"]
+        return _MIN_SCORE, [f"Request failed: {snapshot.error}"]
 
     details: List[str] = []
     deduction = 0
 
-    if not resp.cookies:
+    if not snapshot.cookies:
         details.append("No cookies set – nothing to check.")
         return _MAX_SCORE, details
 
-    for ck in resp.cookies:
+    for ck in snapshot.cookies:
         name = ck.name
         is_secure   = ck.secure
         is_httponly = ck._rest.get("HttpOnly") is True  # some libs store it as a string
@@ -62,6 +62,11 @@ def analyze_cookie_privacy(url: str, timeout: int = 10) -> Tuple[int, List[str]]
     return final_score, details
 
 
+def analyze_cookie_privacy(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """Run the scan and return *(final_score, details_lines)*."""
+    return analyze(fetch_snapshot(url, timeout=timeout))
+
+
 # --------------------------------------------------------------------------- #
 # CLI entry-point – makes the module runnable as a tiny standalone tool
 # --------------------------------------------------------------------------- #
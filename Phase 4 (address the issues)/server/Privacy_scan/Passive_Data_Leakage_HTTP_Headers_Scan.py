@@ -6,6 +6,8 @@ from typing import List, Tuple
 
 import requests
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # --------------------------------------------------------------------------- #
 # Tunables – adjust as needed
 # --------------------------------------------------------------------------- #
@@ -46,22 +48,20 @@ def _clamp(val: int, low: int, high: int) -> int:
 # --------------------------------------------------------------------------- #
 # Public API
 # --------------------------------------------------------------------------- #
-def analyze_data_leakage_headers(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Grab *url* once, look at its response headers, and return (score, log lines).
-    A higher score means less information is leaking.
+    Look at the response headers of an already-fetched *snapshot* and
+    return (score, log lines).  A higher score means less information is leaking.
     """
-    try:
-        resp = requests.get(url, timeout=timeout)
-    except Exception as exc:  # pragma: no cover
-        return _MIN_SCORE, [f"Request failed: {exc}"]
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Request failed: {snapshot.error}"]
 
     details: List[str] = []
     deduction = 0
 
     for header, points in _LEAKY_HEADERS.items():
-        if header in resp.headers:
-            raw_val = resp.headers[header]
+        if header in snapshot.headers:
+            raw_val = snapshot.headers[header]
             details.append(f"{header}: {raw_val}")
 
             deduction += points
@@ -84,6 +84,14 @@ def analyze_data_leakage_headers(url: str, timeout: int = 10) -> Tuple[int, List
     return final_score, details
 
 
+def analyze_data_leakage_headers(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """
+    Grab *url* once, look at its response headers, and return (score, log lines).
+    A higher score means less information is leaking.
+    """
+    return analyze(fetch_snapshot(url, timeout=timeout))
+
+
 # --------------------------------------------------------------------------- #
 # CLI driver – lets us run “python Passive_Data_Leakage_HTTP_Headers_Scan.py -u https://…”
 # --------------------------------------------------------------------------- #
@@ -2,7 +2,8 @@ import re
 from typing import List, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+
+from page_snapshot import PageSnapshot, fetch_snapshot
 
 # --------------------------------------------------------------------------- #
 # tweak-me constants
@@ -34,30 +35,27 @@ def _clamp(val: int, low: int, high: int) -> int:
 # --------------------------------------------------------------------------- #
 # public API – keep name & signature stable for the rest of the code-base
 # --------------------------------------------------------------------------- #
-def analyze_dnt_support(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Return *(final_score, details_lines)* for *url*.
+    Return *(final_score, details_lines)* for a page fetched with ``DNT: 1``.
 
     A high score ⇒ strong indication the site honours DNT.
     """
-    try:
-        resp = requests.get(url, timeout=timeout, headers={"DNT": "1"})
-    except Exception as exc:                      # pragma: no cover
-        return _MIN_SCORE, [f"Request failed: {exc}"]
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Request failed: {snapshot.error}"]
 
     details: List[str] = []
     deduction = 0
 
     # ---- 1. did the server echo a DNT header back? -------------------------
-    if "DNT" in resp.headers:
+    if "DNT" in snapshot.headers:
         details.append("Server replies with a 'DNT' header – good sign.")
     else:
         details.append("No 'DNT' header echoed in the response.")
         deduction += _PENALTY_NO_HEADER
 
     # ---- 2. is there a <meta name="dnt">… ? --------------------------------
-    soup = BeautifulSoup(resp.text, "html.parser")
-    meta_tag = soup.find("meta", attrs={"name": re.compile(r"^dnt$", re.I)})
+    meta_tag = snapshot.document.find_meta("dnt")
 
     if meta_tag:
         meta_val = (meta_tag.get("content") or "").strip().lower()
@@ -71,7 +69,7 @@ def analyze_dnt_support(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
         deduction += _PENALTY_NO_META
 
     # ---- 3. scan HTML for friendly wording ---------------------------------
-    html_lower = resp.text.lower()
+    html_lower = snapshot.text.lower()
     if any(re.search(pat, html_lower) for pat in _DNT_PHRASES):
         details.append("Page text contains a phrase that promises DNT support.")
     else:
@@ -91,6 +89,15 @@ def analyze_dnt_support(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
     return final_score, details
 
 
+def analyze_dnt_support(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """
+    Return *(final_score, details_lines)* for *url*.
+
+    A high score ⇒ strong indication the site honours DNT.
+    """
+    return analyze(fetch_snapshot(url, timeout=timeout, headers={"DNT": "1"}))
+
+
 # --------------------------------------------------------------------------- #
 # CLI harness – handy for ad-hoc testing
 # --------------------------------------------------------------------------- #
@@ -1,10 +1,11 @@
 
 
 import requests
-from bs4 import BeautifulSoup
 import re
 from urllib.parse import urlparse
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 FINGERPRINTING_INDICATORS = {
     "toDataURL": 2,
     "getContext('2d')": 1,
@@ -26,30 +27,27 @@ FINGERPRINTING_INDICATORS = {
     "hardwareConcurrency": 1
 }
 
-def analyze_fingerprinting_detection(url):
-    try:
-        response = requests.get(url, timeout=10)
-        html = response.text
-    except Exception as e:
-        return 1, [f"Error fetching page: {str(e)}"]
+def analyze(snapshot: PageSnapshot):
+    if snapshot.error is not None:
+        return 1, [f"Error fetching page: {snapshot.error}"]
 
     details = []
     total_deduction = 0
 
-    soup = BeautifulSoup(html, "html.parser")
-    page_domain = urlparse(url).netloc.lower()
+    doc = snapshot.document
+    page_domain = urlparse(snapshot.url).netloc.lower()
 
     # Inline script analysis
-    for script in soup.find_all("script"):
+    for script in doc.scripts:
         if not script.has_attr("src"):
-            content = script.get_text()
+            content = script.text or ""
             for indicator, deduction in FINGERPRINTING_INDICATORS.items():
                 if re.search(re.escape(indicator), content, re.IGNORECASE):
                     details.append(f"Inline script contains fingerprinting indicator '{indicator}' (deduction {deduction})")
                     total_deduction += deduction
 
     # External scripts
-    for script in soup.find_all("script", src=True):
+    for script in doc.external_scripts:
         src = script["src"]
         parsed = urlparse(src)
         if parsed.netloc and parsed.netloc.lower() != page_domain:
@@ -69,6 +67,9 @@ def analyze_fingerprinting_detection(url):
 
     return final_score, details
 
+def analyze_fingerprinting_detection(url):
+    return analyze(fetch_snapshot(url, timeout=10))
+
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Passive Fingerprinting Detection Scanner")
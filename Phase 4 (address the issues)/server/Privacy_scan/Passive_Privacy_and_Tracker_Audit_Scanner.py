@@ -4,6 +4,8 @@ import re
 from typing import List, Tuple
 import requests
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # --------------------------------------------------------------------------- #
 # Tunables — move these around to your taste
 # --------------------------------------------------------------------------- #
@@ -31,9 +33,9 @@ def _clamp(val: int, low: int, high: int) -> int:
     return max(low, min(high, val))
 
 
-def analyze_privacy(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Quick-n-dirty sweep for common tracker strings.
+    Quick-n-dirty sweep for common tracker strings in a fetched page.
 
     Returns
     -------
@@ -43,11 +45,9 @@ def analyze_privacy(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
     details : list[str]
         Human-readable log lines.
     """
-    try:
-        resp = requests.get(url, timeout=timeout, headers={"User-Agent": "PrivacyAudit/0.1"})
-        html = resp.text
-    except Exception as exc:  # pragma: no cover
-        return _MIN_SCORE, [f"Request failed: {exc}"]
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Request failed: {snapshot.error}"]
+    html = snapshot.text
 
     details: List[str] = []
     deduction = 0
@@ -82,6 +82,12 @@ def analyze_privacy(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
     return final_score, details
 
 
+def analyze_privacy(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """Fetch *url* and run :func:`analyze` on it."""
+    return analyze(fetch_snapshot(url, timeout=timeout,
+                                  headers={"User-Agent": "PrivacyAudit/0.1"}))
+
+
 if __name__ == "__main__":  # pragma: no cover
     import argparse
 
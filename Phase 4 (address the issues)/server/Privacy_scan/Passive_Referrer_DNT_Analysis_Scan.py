@@ -1,10 +1,10 @@
 
 
-import re
 from typing import List, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+
+from page_snapshot import PageSnapshot, fetch_snapshot
 
 # --------------------------------------------------------------------------- #
 # Policy categories and their penalty weights
@@ -40,17 +40,13 @@ def _clamp(score: int, lo: int, hi: int) -> int:
     return max(lo, min(hi, score))
 
 
-def analyze_referrer_dnt(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Returns (final_score, details) for the given URL.
+    Returns (final_score, details) for an already-fetched page snapshot.
     """
-    try:
-        # simulate a privacy-conscious GET
-        resp = requests.get(url, headers={"DNT": "1"}, timeout=timeout)
-        headers = resp.headers
-        html = resp.text
-    except Exception as err:  # pragma: no cover
-        return _MIN_SCORE, [f"Request error: {err}"]
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Request error: {snapshot.error}"]
+    headers = snapshot.headers
 
     details: List[str] = []
     deduction = 0
@@ -76,8 +72,7 @@ def analyze_referrer_dnt(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
         deduction += _PENALTY_MISSING_POLICY
 
     # --- DNT meta tag in HTML ---
-    soup = BeautifulSoup(html, "html.parser")
-    meta = soup.find("meta", attrs={"name": re.compile(r"^dnt$", re.I)})
+    meta = snapshot.document.find_meta("dnt")
     if meta:
         content = (meta.get("content") or "").strip().lower()
         details.append(f"DNT meta tag content: '{content}'")
@@ -104,6 +99,14 @@ def analyze_referrer_dnt(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
     return score, details
 
 
+def analyze_referrer_dnt(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """
+    Returns (final_score, details) for the given URL.
+    """
+    # simulate a privacy-conscious GET
+    return analyze(fetch_snapshot(url, timeout=timeout, headers={"DNT": "1"}))
+
+
 # --------------------------------------------------------------------------- #
 # Simple CLI entry-point
 # --------------------------------------------------------------------------- #
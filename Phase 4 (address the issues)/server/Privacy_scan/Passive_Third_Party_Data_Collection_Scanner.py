@@ -24,6 +24,8 @@ import re
 from typing import List, Tuple
 import requests
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # --------------------------------------------------------------------------- #
 # tweakable lists of patterns and their penalties
 # --------------------------------------------------------------------------- #
@@ -47,16 +49,14 @@ def _clamp(score: int, lo: int, hi: int) -> int:
     """Keep score within [lo, hi]."""
     return max(lo, min(hi, score))
 
-def analyze_third_party_data_collection(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Scan the HTML of *url* for third-party data collection endpoints.
+    Scan the HTML of a fetched page for third-party data collection endpoints.
     Returns (score, detail_lines).
     """
-    try:
-        resp = requests.get(url, timeout=timeout, headers={"User-Agent": "DataAudit/1.0"})
-        html = resp.text
-    except Exception as exc:  # pragma: no cover
-        return _MIN_SCORE, [f"Could not fetch page: {exc}"]
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Could not fetch page: {snapshot.error}"]
+    html = snapshot.text
 
     details: List[str] = []
     deduction = 0
@@ -89,6 +89,14 @@ def analyze_third_party_data_collection(url: str, timeout: int = 10) -> Tuple[in
 
     return final_score, details
 
+def analyze_third_party_data_collection(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """
+    Scan the HTML of *url* for third-party data collection endpoints.
+    Returns (score, detail_lines).
+    """
+    return analyze(fetch_snapshot(url, timeout=timeout,
+                                  headers={"User-Agent": "DataAudit/1.0"}))
+
 # --------------------------------------------------------------------------- #
 # CLI entry-point for quick testing
 # --------------------------------------------------------------------------- #
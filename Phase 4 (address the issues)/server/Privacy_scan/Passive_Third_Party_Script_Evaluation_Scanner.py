@@ -20,7 +20,8 @@ import re
 from typing import List, Tuple
 
 import requests
-from bs4 import BeautifulSoup
+
+from page_snapshot import PageSnapshot, fetch_snapshot
 
 # --------------------------------------------------------------------------- #
 # Which script sources to flag and how severely
@@ -46,22 +47,18 @@ def _clamp(value: int, minimum: int, maximum: int) -> int:
     return max(minimum, min(maximum, value))
 
 
-def analyze_third_party_script_evaluation(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Scan <script> tags on the page at *url*.
+    Scan <script> tags on an already-fetched page snapshot.
     
     Returns:
         final_score (int): 1–10, higher means fewer flagged scripts.
         details    (List[str]): log lines explaining each deduction.
     """
-    try:
-        resp = requests.get(url, timeout=timeout, headers={"User-Agent": "ScriptEval/1.0"})
-        html = resp.text
-    except Exception as exc:  # pragma: no cover
-        return _MIN_SCORE, [f"Fetch error: {exc}"]
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Fetch error: {snapshot.error}"]
 
-    soup = BeautifulSoup(html, "html.parser")
-    scripts = soup.find_all("script", src=True)
+    scripts = snapshot.document.external_scripts
 
     details: List[str] = []
     deduction = 0
@@ -92,6 +89,12 @@ def analyze_third_party_script_evaluation(url: str, timeout: int = 10) -> Tuple[
     return final_score, details
 
 
+def analyze_third_party_script_evaluation(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """Scan <script> tags on the page at *url*; see :func:`analyze`."""
+    return analyze(fetch_snapshot(url, timeout=timeout,
+                                  headers={"User-Agent": "ScriptEval/1.0"}))
+
+
 # --------------------------------------------------------------------------- #
 # CLI entry-point for quick runs
 # --------------------------------------------------------------------------- #
@@ -21,9 +21,10 @@ TODO:
 
 import re
 import requests
-from bs4 import BeautifulSoup
 from typing import List, Tuple
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # --------------------------------------------------------------------------- #
 # Patterns → penalty points
 # --------------------------------------------------------------------------- #
@@ -55,26 +56,23 @@ def _clamp(val: int, low: int, high: int) -> int:
     """Keep *val* inside the [low, high] range."""
     return max(low, min(high, val))
 
-def analyze_tracker_detection(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Scan the page for tracker hints and return (final_score, details_lines).
+    Scan a fetched page for tracker hints and return (final_score, details_lines).
 
     final_score: 1–10, higher means fewer trackers.
     details_lines: human-readable notes on what was spotted.
     """
-    try:
-        resp = requests.get(url, timeout=timeout)
-        html = resp.text
-        cookies = resp.cookies
-    except Exception as err:  # pragma: no cover
-        return _MIN_SCORE, [f"Fetch error: {err}"]
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Fetch error: {snapshot.error}"]
+    cookies = snapshot.cookies
 
     details: List[str] = []
     total_deduction = 0
 
     # ----- 1) external resources -----
-    soup = BeautifulSoup(html, "html.parser")
-    resource_tags = soup.find_all(["script", "img", "iframe", "link"])
+    doc = snapshot.document
+    resource_tags = doc.resources
     for tag in resource_tags:
         attr = "href" if tag.name == "link" else "src"
         src = tag.get(attr)
@@ -88,10 +86,10 @@ def analyze_tracker_detection(url: str, timeout: int = 10) -> Tuple[int, List[st
                 break
 
     # ----- 2) inline scripts -----
-    for script in soup.find_all("script"):
-        if not script.string:
+    for script in doc.scripts:
+        if not script.text:
             continue
-        txt = script.string.lower()
+        txt = script.text.lower()
         for pattern, cost in _TRACKER_PATTERNS.items():
             if pattern in txt:
                 details.append(f"Inline script found '{pattern}' (−{cost})")
@@ -120,6 +118,11 @@ def analyze_tracker_detection(url: str, timeout: int = 10) -> Tuple[int, List[st
     return score, details
 
 
+def analyze_tracker_detection(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """Fetch *url* and scan it for tracker hints; see :func:`analyze`."""
+    return analyze(fetch_snapshot(url, timeout=timeout))
+
+
 # --------------------------------------------------------------------------- #
 # CLI driver for ad-hoc tests
 # --------------------------------------------------------------------------- #
@@ -1,9 +1,10 @@
 
 
 import requests
-from bs4 import BeautifulSoup
 from typing import List, Tuple
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # --------------------------------------------------------------------------- #
 # tweak these penalties if you like
 # --------------------------------------------------------------------------- #
@@ -18,24 +19,20 @@ def _clamp(val: int, lo: int, hi: int) -> int:
     """Keep val in the [lo, hi] range."""
     return max(lo, min(hi, val))
 
-def analyze_tracker_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Scan a page’s <script> tags for basic security best practices.
+    Scan the <script> tags of a fetched page for basic security best practices.
 
     Returns:
         final_score (int): 1–10, higher is better.
         details     (List[str]): notes on each deduction or finding.
     """
-    try:
-        resp = requests.get(url, timeout=timeout)
-        html = resp.text
-    except Exception as exc:  # pragma: no cover
-        return _MIN_SCORE, [f"Couldn’t fetch page: {exc}"]
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Couldn’t fetch page: {snapshot.error}"]
 
     details: List[str] = []
     deduction = 0
-    soup = BeautifulSoup(html, "html.parser")
-    scripts = soup.find_all("script")
+    scripts = snapshot.document.scripts
 
     for idx, tag in enumerate(scripts, start=1):
         src = tag.get("src")
@@ -71,6 +68,11 @@ def analyze_tracker_security(url: str, timeout: int = 10) -> Tuple[int, List[str
 
     return final_score, details
 
+
+def analyze_tracker_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """Fetch *url* and audit its <script> tags; see :func:`analyze`."""
+    return analyze(fetch_snapshot(url, timeout=timeout))
+
 # --------------------------------------------------------------------------- #
 # CLI interface for quick checks
 # --------------------------------------------------------------------------- #
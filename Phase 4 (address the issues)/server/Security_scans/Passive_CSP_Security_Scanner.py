@@ -22,6 +22,8 @@ import re
 import requests
 from urllib.parse import urlparse
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # ——— what we expect in a decent CSP ———
 _REQUIRED_DIRECTIVES = [
     "default-src",
@@ -86,20 +88,17 @@ def _external_sources(csp: str) -> list[str]:
     return [h for h in hosts if h.startswith("http") and "self" not in h]
 
 
-def analyze_csp_security(url: str) -> tuple[int, list[str]]:
+def analyze(snapshot: PageSnapshot) -> tuple[int, list[str]]:
     """
-    Fetch the page headers, parse the CSP, and return (score, notes).
+    Parse the CSP out of a fetched page's headers and return (score, notes).
     """
     score = 10
     notes: list[str] = []
 
-    try:
-        resp = requests.get(url, timeout=10)
-        hdrs = resp.headers
-    except Exception as e:
-        return 1, [f"Failed to retrieve headers: {e}"]
+    if snapshot.error is not None:
+        return 1, [f"Failed to retrieve headers: {snapshot.error}"]
 
-    csp = _get_csp_header(hdrs)
+    csp = _get_csp_header(snapshot.headers)
     if not csp:
         return 1, ["No CSP header found. Major security risk!"]
 
@@ -140,6 +139,13 @@ def analyze_csp_security(url: str) -> tuple[int, list[str]]:
     return final, notes
 
 
+def analyze_csp_security(url: str) -> tuple[int, list[str]]:
+    """
+    Fetch the page headers, parse the CSP, and return (score, notes).
+    """
+    return analyze(fetch_snapshot(url, timeout=10))
+
+
 def _normalize_url(u: str) -> str:
     """
     Ensure there's an HTTP scheme and strip everything except origin.
@@ -24,10 +24,11 @@ Final score is clamped between 1 and 10.
 
 import requests
 import argparse
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 from typing import List, Tuple
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # ————— tweak these as needed —————
 REQUIRED_HEADERS = ["X-Frame-Options"]
 SCORE_PENALTIES = {
@@ -45,9 +46,9 @@ def _clamp(value: int, floor: int, ceiling: int) -> int:
     return max(floor, min(ceiling, value))
 
 
-def analyze_csrf_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Perform passive CSRF checks on the given URL.
+    Perform passive CSRF checks on an already-fetched page snapshot.
 
     Returns:
         final_score (int): 1–10, higher is better.
@@ -56,17 +57,15 @@ def analyze_csrf_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
     details: List[str] = []
     deduction = 0
 
-    try:
-        resp = requests.get(url, timeout=timeout)
-    except Exception as exc:  # pragma: no cover
-        return _MIN_SCORE, [f"Request failed: {exc}"]
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Request failed: {snapshot.error}"]
+    url = snapshot.url
 
     # 1) Hidden CSRF tokens in forms
-    soup = BeautifulSoup(resp.text, "html.parser")
-    forms = soup.find_all("form")
+    forms = snapshot.document.forms
     missing_tokens = 0
     for form in forms:
-        hidden = form.find_all("input", type="hidden")
+        hidden = form.inputs
         has_token = any(
             ("csrf" in (inp.get("name") or "").lower()
              or "authenticity" in (inp.get("name") or "").lower())
@@ -81,7 +80,7 @@ def analyze_csrf_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
         details.append("All forms include a hidden CSRF token")
 
     # 2) Security headers
-    missing = [h for h in REQUIRED_HEADERS if h not in resp.headers]
+    missing = [h for h in REQUIRED_HEADERS if h not in snapshot.headers]
     if missing:
         details.append("Missing headers: " + ", ".join(missing))
         deduction += SCORE_PENALTIES["missing_headers"]
@@ -90,7 +89,7 @@ def analyze_csrf_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
 
     # 3) Cookie flags
     bad_cookies = 0
-    for ck in resp.cookies:
+    for ck in snapshot.cookies:
         # note: requests stores Secure flag, and SameSite in ck._rest
         if not ck.secure or ck._rest.get("SameSite", "").lower() not in ("lax", "strict"):
             bad_cookies += 1
@@ -101,7 +100,7 @@ def analyze_csrf_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
         details.append("Cookies have Secure & SameSite flags")
 
     # 4) CORS policy
-    aco = resp.headers.get("Access-Control-Allow-Origin")
+    aco = snapshot.headers.get("Access-Control-Allow-Origin")
     if aco:
         origin = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
         if aco == "*" or aco != origin:
@@ -119,6 +118,13 @@ def analyze_csrf_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
     return final_score, details
 
 
+def analyze_csrf_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """
+    Perform passive CSRF checks on the given URL; see :func:`analyze`.
+    """
+    return analyze(fetch_snapshot(url, timeout=timeout))
+
+
 def main() -> None:
     """CLI entry-point for quick, stand-alone checks."""
     parser = argparse.ArgumentParser(
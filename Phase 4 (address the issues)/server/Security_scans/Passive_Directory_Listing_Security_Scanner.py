@@ -22,10 +22,15 @@ TODO:
   • Follow redirects to catch hidden admin panels.
 """
 
+import asyncio
 import requests
 from urllib.parse import urljoin
 from typing import List, Tuple
 
+from async_http import get_engine
+from page_snapshot import PageSnapshot
+from transport import get_transport
+
 # ——— tweak these directories and extensions as needed ———
 SENSITIVE_DIRS = [
     "backup", "logs", "admin", "config", "private", "database", "server-status"
@@ -42,30 +47,42 @@ DEDUCTIONS = {
 }
 
 
+def _probe_urls(base_url: str) -> List[str]:
+    return [urljoin(base_url, d.rstrip('/') + '/') for d in SENSITIVE_DIRS]
+
+
+def _check_listing(test_url: str, status_code: int, text: str,
+                   found_dirs: List[str], found_exts: List[str]) -> None:
+    # Look for the classic Apache/Nginx index page
+    if status_code == 200 and "Index of" in text:
+        found_dirs.append(test_url)
+        # scan for any of our risky file extensions
+        for ext in EXPOSED_EXTS:
+            if ext in text:
+                found_exts.append(ext)
+
+
 def analyze_directory_security(base_url: str) -> Tuple[int, List[str]]:
     """
     Probe a few known paths on base_url for directory listings.
     Return a tuple: (score out of 10, list of human-readable findings).
     """
-    score = 10
-    notes: List[str] = []
     found_dirs: List[str] = []
     found_exts: List[str] = []
 
-    for d in SENSITIVE_DIRS:
-        test_url = urljoin(base_url, d.rstrip('/') + '/')
+    for test_url in _probe_urls(base_url):
         try:
-            r = requests.get(test_url, timeout=5)
+            r = get_transport().get(test_url, timeout=5)
         except requests.RequestException:
             continue  # skip unreachable paths
+        _check_listing(test_url, r.status_code, r.text, found_dirs, found_exts)
 
-        # Look for the classic Apache/Nginx index page
-        if r.status_code == 200 and "Index of" in r.text:
-            found_dirs.append(test_url)
-            # scan for any of our risky file extensions
-            for ext in EXPOSED_EXTS:
-                if ext in r.text:
-                    found_exts.append(ext)
+    return _score_listings(found_dirs, found_exts)
+
+
+def _score_listings(found_dirs: List[str], found_exts: List[str]) -> Tuple[int, List[str]]:
+    score = 10
+    notes: List[str] = []
 
     # Deduct for any directory listings
     if found_dirs:
@@ -109,6 +126,45 @@ def analyze_directory_security(base_url: str) -> Tuple[int, List[str]]:
     return score, notes
 
 
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
+    """
+    Probe for directory listings relative to an already-fetched page.
+
+    The listings live on other paths, so this still makes its own probe
+    requests; we only skip them when the page itself was unreachable,
+    since every probe would fail the same way.
+    """
+    if snapshot.error is not None:
+        return 10, ["Site unreachable; directory probes skipped.",
+                    "No directory listing issues spotted."]
+    return analyze_directory_security(snapshot.url)
+
+
+async def analyze_directory_security_async(base_url: str) -> Tuple[int, List[str]]:
+    """Same probes as analyze_directory_security, issued concurrently."""
+    engine = get_engine()
+
+    async def probe(test_url):
+        try:
+            return test_url, await engine.get(test_url, timeout=5)
+        except Exception:
+            return test_url, None  # skip unreachable paths
+
+    found_dirs: List[str] = []
+    found_exts: List[str] = []
+    for test_url, r in await asyncio.gather(*(probe(u) for u in _probe_urls(base_url))):
+        if r is not None:
+            _check_listing(test_url, r.status_code, r.text, found_dirs, found_exts)
+    return _score_listings(found_dirs, found_exts)
+
+
+async def analyze_async(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
+    """Async twin of :func:`analyze`."""
+    if snapshot.error is not None:
+        return analyze(snapshot)
+    return await analyze_directory_security_async(snapshot.url)
+
+
 # ---------------------------------------------------------------------------- #
 # Simple CLI for standalone testing (does not affect server integration)
 # ---------------------------------------------------------------------------- #
@@ -1,9 +1,13 @@
 
 
 
+import ssl
+import time
+
 import requests
-from datetime import datetime
-from dateutil import parser
+
+from page_snapshot import PageSnapshot, fetch_snapshot
+from tls_probe import probe_snapshot, probe_snapshot_async
 
 # ——— score weights ———
 _BASE_HTTPS_SCORE     = 2   # for simply using HTTPS
@@ -14,49 +18,53 @@ _CERT_MEDIUM_BONUS    = 2   # 30–180 days left
 _CERT_EXPIRED_PENALTY = -3  # certificate already expired
 _HSTS_BONUS           = 3
 
-def analyze_https_security(url):
+
+def analyze(snapshot: PageSnapshot, tls=None):
     """
-    Passive HTTPS health-check.
+    Passive HTTPS health-check of an already-fetched page.
 
     1) Must be https:// or we bail out with score=1.
     2) Base points for HTTPS.
     3) Bonus for TLS 1.2 vs 1.3.
     4) Bonus or penalty based on cert expiry.
     5) Bonus for HSTS header presence.
+
+    Steps 3–5 read the shared TLS probe; pass the server's *tls* probe to
+    avoid a handshake of our own.
     """
     details = []
+    url = snapshot.url
 
     # Step 1: quick validation of scheme
     if not url.lower().startswith("https://"):
         details.append("Not HTTPS — failing scan")
         return 1, details
 
+    tls = tls or probe_snapshot(snapshot)
+
     # Step 2: initial HTTPS score
     score = _BASE_HTTPS_SCORE
     details.append("HTTPS in use (+2)")
 
     # Step 3: TLS version
-    try:
-        ver = response.raw.version
-        if ver == 3:
-            score += _TLS_1_2_BONUS
-            details.append("TLS 1.2 negotiated (+3)")
-        elif ver == 4:
-            score += _TLS_1_3_BONUS
-            details.append("TLS 1.3 negotiated (+4)")
-        else:
-            details.append(f"Unexpected TLS version: {ver}")
-    except Exception as exc:
-        details.append(f"Could not read TLS version: {exc}")
+    if not tls.ok:
+        details.append(f"Could not read TLS version: {tls.error}")
+    elif tls.version == "TLSv1.2":
+        score += _TLS_1_2_BONUS
+        details.append("TLS 1.2 negotiated (+3)")
+    elif tls.version == "TLSv1.3":
+        score += _TLS_1_3_BONUS
+        details.append("TLS 1.3 negotiated (+4)")
+    else:
+        details.append(f"Unexpected TLS version: {tls.version}")
 
     # Step 4: certificate expiry check
-    try:
-        # dig into the socket to fetch peer cert
-        peer = response.raw._connection.sock.getpeercert()
-        expiry = peer.get("notAfter")
-        if expiry:
-            exp_dt = parser.parse(expiry)
-            days = (exp_dt - datetime.utcnow()).days
+    expiry = tls.cert.get("notAfter")
+    if not tls.ok:
+        details.append(f"Error checking cert expiry: {tls.error}")
+    elif expiry:
+        try:
+            days = int((ssl.cert_time_to_seconds(expiry) - time.time()) // 86400)
             if days > 180:
                 score += _CERT_LONG_BONUS
                 details.append("Cert valid >180 days (+3)")
@@ -68,13 +76,13 @@ def analyze_https_security(url):
             else:
                 score += _CERT_EXPIRED_PENALTY
                 details.append("Certificate expired! (-3)")
-        else:
-            details.append("No cert expiry date found")
-    except Exception as exc:
-        details.append(f"Error checking cert expiry: {exc}")
+        except ValueError as exc:
+            details.append(f"Error checking cert expiry: {exc}")
+    else:
+        details.append("No cert expiry date found")
 
     # Step 5: HSTS header
-    if response.headers.get("strict-transport-security"):
+    if tls.hsts:
         score += _HSTS_BONUS
         details.append("HSTS header present (+3)")
     else:
@@ -85,7 +93,18 @@ def analyze_https_security(url):
     return score, details
 
 
-# Example stub to prevent NameError when reading TLS version:
-# Fetch the response once and stash it for all checks.
-# (You could inline this in the function if you prefer.)
-response = requests.Response()
+def analyze_https_security(url):
+    """
+    Fetch *url* once and run the HTTPS health-check on it.
+    Plain http:// URLs fail straight away without a request.
+    """
+    if not url.lower().startswith("https://"):
+        return analyze(PageSnapshot(url=url, final_url=url))
+    return analyze(fetch_snapshot(url))
+
+
+async def analyze_async(snapshot: PageSnapshot, tls=None):
+    """Async twin of :func:`analyze`."""
+    if tls is None and snapshot.url.lower().startswith("https://"):
+        tls = await probe_snapshot_async(snapshot)
+    return analyze(snapshot, tls)
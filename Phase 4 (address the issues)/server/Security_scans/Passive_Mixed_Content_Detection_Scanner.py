@@ -19,11 +19,14 @@ Returns (final_score, details_list).
 """
 
 import requests
-from bs4 import BeautifulSoup
+from html_document import ParsedDocument, as_document
 from urllib.parse import urlparse, urljoin
 from typing import List, Tuple
 import argparse
 
+from page_snapshot import PageSnapshot
+from transport import get_transport
+
 # How many points to deduct per mixed-content resource
 PENALTIES = {
     'script':     3,
@@ -39,33 +42,33 @@ MIN_SCORE = 1
 def fetch_html(url: str, timeout: int = 10) -> str | None:
     """Return the page HTML, or None on error."""
     try:
-        resp = requests.get(url, timeout=timeout)
+        resp = get_transport().get(url, timeout=timeout)
         resp.raise_for_status()
         return resp.text
     except Exception as e:
         print(f"[!] Failed to fetch {url}: {e}")
         return None
 
-def find_mixed_content(base_url: str, html: str) -> dict[str, List[str]]:
+def find_mixed_content(base_url: str, html: str | ParsedDocument) -> dict[str, List[str]]:
     """
     Scan the HTML for insecure URLs (http://) in various tags.
     Returns a dict mapping category -> list of URLs.
     """
     parsed = urlparse(base_url)
     origin = f"{parsed.scheme}://{parsed.netloc}"
-    soup = BeautifulSoup(html, 'html.parser')
+    doc = as_document(html)
 
     found = {key: [] for key in PENALTIES}
 
     # Check known tags
     tag_map = {
-        'script':     ('src', 'script'),
-        'link':       ('href', 'stylesheet'),
-        'img':        ('src', 'image'),
-        'iframe':     ('src', 'iframe'),
+        'script':     ('src', 'script', doc.scripts),
+        'link':       ('href', 'stylesheet', doc.links),
+        'img':        ('src', 'image', doc.imgs),
+        'iframe':     ('src', 'iframe', doc.iframes),
     }
-    for tag, (attr, cat) in tag_map.items():
-        for node in soup.find_all(tag):
+    for attr, cat, nodes in tag_map.values():
+        for node in nodes:
             link = node.get(attr)
             if not link:
                 continue
@@ -74,12 +77,12 @@ def find_mixed_content(base_url: str, html: str) -> dict[str, List[str]]:
                 found[cat].append(full)
 
     # Look for any other http:// in src or href
-    for node in soup.find_all(src=True):
+    for node in doc.with_src:
         link = node['src']
         full = urljoin(origin, link)
         if full.startswith('http://') and node.name not in tag_map:
             found['other'].append(full)
-    for node in soup.find_all(href=True):
+    for node in doc.with_href:
         link = node['href']
         full = urljoin(origin, link)
         if full.startswith('http://') and node.name not in tag_map:
@@ -118,15 +121,22 @@ def score_mixed_content(found: dict[str, List[str]]) -> Tuple[int, List[str]]:
         details.append("Some mixed content found; consider updating links.")
     return final, details
 
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
+    """
+    Score an already-fetched page snapshot. Returns (score, details_list).
+    """
+    url = snapshot.url
+    if not snapshot.ok or not snapshot.text:
+        return 1, [f"Could not retrieve content from {url}"]
+    found = find_mixed_content(url, snapshot.document)
+    return score_mixed_content(found)
+
 def analyze_mixed_content(url: str) -> Tuple[int, List[str]]:
     """
     Integration entry-point. Returns (score, details_list).
     """
     html = fetch_html(url)
-    if not html:
-        return 1, [f"Could not retrieve content from {url}"]
-    found = find_mixed_content(url, html)
-    return score_mixed_content(found)
+    return analyze(PageSnapshot(url=url, final_url=url, text=html or ""))
 
 def main():
     parser = argparse.ArgumentParser(
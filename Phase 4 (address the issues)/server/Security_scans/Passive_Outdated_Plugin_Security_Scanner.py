@@ -23,6 +23,9 @@ import requests
 import re
 from typing import List, Tuple
 
+from page_snapshot import PageSnapshot
+from transport import get_transport
+
 # Patterns to regex-match known libraries/CMS and capture a version string
 LIBRARY_PATTERNS = {
     "jQuery":     r"jquery[-.](\d+\.\d+\.\d+)\.min\.js",
@@ -42,7 +45,7 @@ _MIN_SCORE = 1
 def get_page_content(url: str, timeout: int = 8) -> str | None:
     """Fetch the page HTML, or return None if something goes wrong."""
     try:
-        resp = requests.get(url, timeout=timeout)
+        resp = get_transport().get(url, timeout=timeout)
         # resp.raise_for_status()  # uncomment if you want HTTP error bubbling
         return resp.text
     except Exception as e:
@@ -85,6 +88,17 @@ def check_vulnerabilities(detected: List[Tuple[str, str]]) -> Tuple[int, List[st
     details.append(f"{len(detected)} library(ies) spotted, final score {score}/10")
     return score, details
 
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
+    """
+    Detect libs in an already-fetched page and return
+    (score, list_of_detail_strings).
+    """
+    if snapshot.error is not None:
+        return _MIN_SCORE, ["Could not retrieve page content."]
+
+    libs = detect_libraries(snapshot.text)
+    return check_vulnerabilities(libs)
+
 def analyze_outdated_plugins(url: str) -> Tuple[int, List[str]]:
     """
     Main entry point. Fetches the page, detects libs, and returns
@@ -93,9 +107,7 @@ def analyze_outdated_plugins(url: str) -> Tuple[int, List[str]]:
     html = get_page_content(url)
     if html is None:
         return _MIN_SCORE, ["Could not retrieve page content."]
-
-    libs = detect_libraries(html)
-    return check_vulnerabilities(libs)
+    return analyze(PageSnapshot(url=url, final_url=url, text=html))
 
 # --------------------------------------------------------------------------- #
 # Command-line interface for standalone testing
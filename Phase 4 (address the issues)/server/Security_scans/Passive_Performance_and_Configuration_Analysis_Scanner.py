@@ -24,11 +24,12 @@ Constants and logic are split into small, tweakable chunks below.
 
 import requests
 import argparse
-import time
 import re
 from urllib.parse import urlparse
 from typing import List, Tuple
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # -----------------------------------------------------------------------------
 # Penalties for each misconfiguration or potential slowdown (invert for bonuses)
 # -----------------------------------------------------------------------------
@@ -51,24 +52,19 @@ def _clamp(score: int, lo: int = 1, hi: int = 10) -> int:
     return max(lo, min(hi, score))
 
 
-def analyze_performance(base_url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Perform the scan on base_url and return (final_score, notes).
+    Score an already-fetched page snapshot and return (final_score, notes).
     """
     notes: List[str] = []
     score = 10
 
-    # Time the request for potential latency insights (not used in score here)
-    start = time.time()
-    try:
-        resp = requests.get(base_url, timeout=timeout)
-    except Exception as exc:
+    if snapshot.error is not None:
         # If we can’t reach the site, give up and flag as worst score
-        return 1, [f"Failed to fetch {base_url}: {exc}"]
-    elapsed = time.time() - start
+        return 1, [f"Failed to fetch {snapshot.url}: {snapshot.error}"]
 
     # --- Redirects check ---
-    num_redirects = len(resp.history)
+    num_redirects = len(snapshot.history)
     if num_redirects:
         score -= SCORE_DEDUCTIONS["redirects"]
         notes.append(f"{num_redirects} redirect(s) followed (−{SCORE_DEDUCTIONS['redirects']})")
@@ -76,7 +72,7 @@ def analyze_performance(base_url: str, timeout: int = 10) -> Tuple[int, List[str
         notes.append("No HTTP redirects")
 
     # --- HTTP version (requests uses raw.version: 11=1.1, 20=2) ---
-    http_ver = getattr(resp.raw, "version", None)
+    http_ver = snapshot.http_version
     if http_ver == 20:
         notes.append("Connection used HTTP/2")
     else:
@@ -84,7 +80,7 @@ def analyze_performance(base_url: str, timeout: int = 10) -> Tuple[int, List[str
         notes.append(f"Not HTTP/2 (raw.version={http_ver}) (−{SCORE_DEDUCTIONS['no_http2']})")
 
     # --- Compression check ---
-    enc = resp.headers.get("Content-Encoding", "")
+    enc = snapshot.headers.get("Content-Encoding", "")
     if "gzip" in enc or "br" in enc:
         notes.append(f"Content-Encoding: {enc}")
     else:
@@ -92,7 +88,7 @@ def analyze_performance(base_url: str, timeout: int = 10) -> Tuple[int, List[str
         notes.append(f"No response compression (−{SCORE_DEDUCTIONS['no_compression']})")
 
     # --- Cache-Control check ---
-    cc = resp.headers.get("Cache-Control", "")
+    cc = snapshot.headers.get("Cache-Control", "")
     m = re.search(r"max-age=(\d+)", cc)
     if m and int(m.group(1)) >= 3600:
         notes.append(f"Cache-Control max-age={m.group(1)}s")
@@ -101,7 +97,7 @@ def analyze_performance(base_url: str, timeout: int = 10) -> Tuple[int, List[str
         notes.append(f"Weak or missing cache header (−{SCORE_DEDUCTIONS['weak_cache']})")
 
     # --- Keep-Alive header ---
-    conn_hdr = resp.headers.get("Connection", "").lower()
+    conn_hdr = snapshot.headers.get("Connection", "").lower()
     if "keep-alive" in conn_hdr:
         notes.append("Connection: keep-alive present")
     else:
@@ -109,7 +105,7 @@ def analyze_performance(base_url: str, timeout: int = 10) -> Tuple[int, List[str
         notes.append(f"No keep-alive (−{SCORE_DEDUCTIONS['no_keep_alive']})")
 
     # --- Page size check ---
-    size = len(resp.content)
+    size = len(snapshot.content)
     if size > PAGE_SIZE_THRESHOLD:
         score -= SCORE_DEDUCTIONS["large_page"]
         notes.append(f"Large payload: {size//1024} KB (−{SCORE_DEDUCTIONS['large_page']})")
@@ -117,7 +113,7 @@ def analyze_performance(base_url: str, timeout: int = 10) -> Tuple[int, List[str
         notes.append(f"Payload size: {size//1024} KB")
 
     # --- Rough resource-count check ---
-    html = resp.text or ""
+    html = snapshot.text
     found = re.findall(r"<(?:script|img|link|iframe)\b", html, re.IGNORECASE)
     count = len(found)
     if count > RESOURCE_COUNT_THRESHOLD:
@@ -131,6 +127,13 @@ def analyze_performance(base_url: str, timeout: int = 10) -> Tuple[int, List[str
     return final_score, notes
 
 
+def analyze_performance(base_url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """
+    Perform the scan on base_url and return (final_score, notes).
+    """
+    return analyze(fetch_snapshot(base_url, timeout=timeout))
+
+
 def main() -> None:
     """
     CLI entrypoint: parse args, normalize URL, run scanner, and print results.
@@ -15,6 +15,8 @@ import re
 from urllib.parse import urlparse, parse_qs
 from typing import List, Tuple
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # Patterns that usually show up in database error dumps
 _SQL_ERROR_PATTERNS = [
     r"You have an error in your SQL syntax",
@@ -45,20 +47,20 @@ _MAX_SCORE = 10
 _MIN_SCORE = 1
 
 
-def analyze_sql_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Return (score, findings) after a passive SQL-injection check.
+    Return (score, findings) after a passive SQL-injection check of a
+    fetched page snapshot.
     """
     findings: List[str] = []
     deduction = 0
 
-    # 1) Fetch the page
-    try:
-        resp = requests.get(url, timeout=timeout)
-        text = resp.text or ""
-        hdrs = resp.headers
-    except Exception as exc:
-        return _MIN_SCORE, [f"Failed to retrieve URL: {exc}"]
+    # 1) The page itself
+    if snapshot.error is not None:
+        return _MIN_SCORE, [f"Failed to retrieve URL: {snapshot.error}"]
+    url = snapshot.url
+    text = snapshot.text
+    hdrs = snapshot.headers
 
     # 2) Look for SQL error snippets
     errors = [pat for pat in _SQL_ERROR_PATTERNS if re.search(pat, text, re.IGNORECASE)]
@@ -96,6 +98,13 @@ def analyze_sql_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
     return score, findings
 
 
+def analyze_sql_security(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """
+    Return (score, findings) after a passive SQL-injection check.
+    """
+    return analyze(fetch_snapshot(url, timeout=timeout))
+
+
 # --------------------------------------------------------------------------
 # CLI entry-point for ad-hoc testing
 # --------------------------------------------------------------------------
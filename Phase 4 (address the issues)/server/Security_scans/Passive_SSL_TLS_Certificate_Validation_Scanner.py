@@ -7,11 +7,12 @@ Passive SSL/TLS Certificate Validation Scan
 A simple, one-shot check of a server’s TLS certificate:
 
   • Extract host and port from a URL  
-  • Connect (without verifying) to grab cert details and TLS version  
+  • Run one TLS probe (see tls_probe.py) – a verified handshake, with an
+    unverified retry only if the chain doesn't verify  
   • Check for outdated TLS (anything below 1.2)  
   • Look at expiration date (expired, expiring soon)  
   • Detect self-signed certs  
-  • Try a second, *verified* connection to catch untrusted issuers  
+  • Flag untrusted issuers from the probe's verification outcome  
   • Inspect public key size (warn if <2048 bits)
 
 Score starts at 10 and we subtract per issue (see SCORE_DEDUCTIONS).  
@@ -20,11 +21,12 @@ Score is always clamped to [1, 10].
 Note: this is purely passive—no certs are modified or revoked.
 """
 
-import ssl
-import socket
 from datetime import datetime
 from urllib.parse import urlparse
-from typing import Tuple, List
+from typing import Optional, Tuple, List
+
+from page_snapshot import PageSnapshot
+from tls_probe import TLSProbe, probe_snapshot, probe_snapshot_async, probe_tls, probe_tls_async
 
 # tweak these penalties if you like
 SCORE_DEDUCTIONS = {
@@ -48,33 +50,33 @@ def get_hostname(url: str) -> str:
     port = parsed.port or (443 if parsed.scheme == "https" else 80)
     return f"{host}:{port}"
 
+# --------------------------------------------------------------------------- #
+def _split_host(host: str) -> Tuple[str, int]:
+    """'name:port' -> (name, port), defaulting to 443."""
+    try:
+        hostname, port_str = host.split(":", 1)
+        return hostname, int(port_str)
+    except (ValueError, TypeError):
+        return host, 443
+
 # --------------------------------------------------------------------------- #
 def analyze_certificate(host: str) -> Tuple[int, List[str]]:
     """
-    Connects to host (as 'name:port'), inspects TLS cert and returns
+    Probes host (as 'name:port'), inspects TLS cert and returns
     (score out of 10, list of detail messages).
     """
-    details: List[str] = []
-    score = 10
+    return score_probe(probe_tls(*_split_host(host)))
 
-    # split host:port
-    try:
-        hostname, port_str = host.split(":", 1)
-        port = int(port_str)
-    except (ValueError, TypeError):
-        hostname = host
-        port = 443
+# --------------------------------------------------------------------------- #
+def score_probe(probe: TLSProbe) -> Tuple[int, List[str]]:
+    """Score what the TLS probe told us."""
+    if not probe.ok:
+        return 1, [f"Connection/handshake failed: {probe.error}"]
 
-    # 1) grab cert and TLS version (unverified)
-    unverified_ctx = ssl._create_unverified_context()
-    try:
-        with socket.create_connection((hostname, port), timeout=5) as sock:
-            with unverified_ctx.wrap_socket(sock, server_hostname=hostname) as ssock:
-                tls_ver = ssock.version() or "unknown"
-                cert_der = ssock.getpeercert(binary_form=True)
-                cert = ssock.getpeercert()
-    except Exception as e:
-        return 1, [f"Connection/handshake failed: {e}"]
+    details: List[str] = []
+    score = 10
+    tls_ver = probe.version
+    cert = probe.cert
 
     details.append(f"TLS version negotiated: {tls_ver}")
     # TLS version penalties
@@ -105,34 +107,29 @@ def analyze_certificate(host: str) -> Tuple[int, List[str]]:
     else:
         details.append("No expiry info found in certificate")
 
-    # 3) self-signed check
+    # 3) self-signed check (an untrusted cert can't be decoded without cryptography)
     subj = cert.get("subject", ())
     issuer = cert.get("issuer", ())
-    if subj == issuer:
+    if not cert:
+        details.append("Certificate details unavailable; skipped self-signed check")
+    elif subj == issuer:
         score -= SCORE_DEDUCTIONS["self_signed"]
         details.append(f"Self-signed certificate (−{SCORE_DEDUCTIONS['self_signed']})")
     else:
         details.append("Certificate is not self-signed")
 
-    # 4) untrusted issuer check (verified context)
-    verified_ctx = ssl.create_default_context()
-    try:
-        with socket.create_connection((hostname, port), timeout=5) as sock2:
-            with verified_ctx.wrap_socket(sock2, server_hostname=hostname):
-                pass
-    except ssl.SSLCertVerificationError as verr:
-        score -= SCORE_DEDUCTIONS["untrusted_issuer"]
-        details.append(f"Untrusted issuer (−{SCORE_DEDUCTIONS['untrusted_issuer']})")
-    except Exception as e:
-        details.append(f"Issue during trust check: {e}")
-    else:
+    # 4) untrusted issuer – the probe's verified handshake failed
+    if probe.verified:
         details.append("Certificate chain is trusted")
+    else:
+        score -= SCORE_DEDUCTIONS["untrusted_issuer"]
+        details.append(f"Untrusted issuer (−{SCORE_DEDUCTIONS['untrusted_issuer']}): "
+                       f"{probe.verify_error}")
 
     # 5) public key size detection (optional, requires cryptography)
     try:
         from cryptography import x509
-        from cryptography.hazmat.backends import default_backend
-        cert_obj = x509.load_der_x509_certificate(cert_der, default_backend())
+        cert_obj = x509.load_der_x509_certificate(probe.leaf_der)
         key_size = cert_obj.public_key().key_size
         details.append(f"Public key size: {key_size} bits")
         if key_size < 2048:
@@ -147,6 +144,25 @@ def analyze_certificate(host: str) -> Tuple[int, List[str]]:
     final_score = max(1, min(10, score))
     return final_score, details
 
+# --------------------------------------------------------------------------- #
+def analyze(snapshot: PageSnapshot, tls: Optional[TLSProbe] = None) -> Tuple[int, List[str]]:
+    """
+    Score the certificate of the origin the snapshot came from.  Pass the
+    server's shared *tls* probe to avoid a handshake of our own.
+    """
+    return score_probe(tls or probe_snapshot(snapshot))
+
+# --------------------------------------------------------------------------- #
+async def analyze_certificate_async(host: str) -> Tuple[int, List[str]]:
+    """analyze_certificate without blocking the event loop."""
+    return score_probe(await probe_tls_async(*_split_host(host)))
+
+
+async def analyze_async(snapshot: PageSnapshot,
+                        tls: Optional[TLSProbe] = None) -> Tuple[int, List[str]]:
+    """Async twin of :func:`analyze`."""
+    return score_probe(tls or await probe_snapshot_async(snapshot))
+
 # --------------------------------------------------------------------------- #
 if __name__ == "__main__":
     import argparse
@@ -2,6 +2,8 @@
 import requests
 from typing import List, Tuple
 
+from page_snapshot import PageSnapshot, fetch_snapshot
+
 # Penalties for each header if absent or bogus
 _PENALTIES = {
     'hsts':               3,
@@ -18,19 +20,18 @@ def _clamp(score: int) -> int:
     return max(1, min(10, score))
 
 
-def analyze_security_headers(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+def analyze(snapshot: PageSnapshot) -> Tuple[int, List[str]]:
     """
-    Return (final_score, notes) after checking key security headers.
+    Return (final_score, notes) after checking key security headers of a
+    fetched page snapshot.
     """
     notes: List[str] = []
     score = 10
 
-    try:
-        resp = requests.get(url, timeout=timeout)
-    except Exception as exc:  # network or DNS problem
-        return 1, [f"Error fetching page: {exc}"]
+    if snapshot.error is not None:  # network or DNS problem
+        return 1, [f"Error fetching page: {snapshot.error}"]
 
-    hdrs = resp.headers
+    hdrs = snapshot.headers
 
     # 1) HSTS
     hsts = hdrs.get('Strict-Transport-Security')
@@ -94,6 +95,13 @@ def analyze_security_headers(url: str, timeout: int = 10) -> Tuple[int, List[str
     return score, notes
 
 
+def analyze_security_headers(url: str, timeout: int = 10) -> Tuple[int, List[str]]:
+    """
+    Return (final_score, notes) after checking key security headers.
+    """
+    return analyze(fetch_snapshot(url, timeout=timeout))
+
+
 # --------------------------------------------------------------------------- #
 # CLI for standalone testing
 # --------------------------------------------------------------------------- #
@@ -6,10 +6,15 @@
 # Identifies server, CMS, and common JS libraries by probing headers and
 # script URLs, then cross-references with NVD to score any known CVEs.
 
+import asyncio
 import re
 import requests
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+from html_document import ParsedDocument, as_document
+
+from async_http import get_engine
+from page_snapshot import PageSnapshot
+from transport import get_transport
 
 # — patterns for detecting tech in headers or script srcs —
 TECH_PATTERNS = {
@@ -34,7 +39,7 @@ SEV_PENALTIES = {
 def get_headers(url: str) -> dict:
     """HEAD request to grab response headers; returns {} on error."""
     try:
-        resp = requests.head(url, allow_redirects=True, timeout=10)
+        resp = get_transport().head(url, allow_redirects=True, timeout=10)
         return resp.headers
     except requests.RequestException:
         return {}
@@ -42,13 +47,13 @@ def get_headers(url: str) -> dict:
 def get_content(url: str) -> str | None:
     """GET request for page HTML; returns None on failure."""
     try:
-        resp = requests.get(url, timeout=10)
+        resp = get_transport().get(url, timeout=10)
         resp.raise_for_status()
         return resp.text
     except requests.RequestException:
         return None
 
-def detect_technologies(base_url: str, headers: dict, html: str) -> dict:
+def detect_technologies(base_url: str, headers: dict, html: str | ParsedDocument) -> dict:
     """
     Scan headers and <script src=> tags to identify technologies.
     Returns a dict {tech_name: version_or_marker}.
@@ -62,8 +67,7 @@ def detect_technologies(base_url: str, headers: dict, html: str) -> dict:
             if m:
                 found[tech] = m.group(1)
     # look in script tags
-    soup = BeautifulSoup(html, 'html.parser')
-    for tag in soup.find_all('script', src=True):
+    for tag in as_document(html).external_scripts:
         src = tag['src']
         for tech, pat in TECH_PATTERNS.items():
             m = re.search(pat, src, re.IGNORECASE)
@@ -71,23 +75,31 @@ def detect_technologies(base_url: str, headers: dict, html: str) -> dict:
                 found[tech] = m.group(1)
     return found
 
+def _nvd_url(tech: str, version) -> str:
+    query = f'{tech} {version}' if version else tech
+    return NVD_SEARCH + requests.utils.quote(query)
+
 def check_vulnerabilities(tech_map: dict) -> tuple[int, list[str]]:
     """
     For each detected technology, query NVD and deduct points per CVE found.
     Returns (score, list_of_notes).
     """
-    score = 10
-    notes = []
-
+    results = []
     for tech, version in tech_map.items():
-        query = f'{tech} {version}' if version else tech
-        url = NVD_SEARCH + requests.utils.quote(query)
         try:
-            resp = requests.get(url, timeout=10)
+            resp = get_transport().get(_nvd_url(tech, version), timeout=10)
             data = resp.json()
         except Exception:
             continue
+        results.append((tech, data))
+    return _score_cves(results)
+
+def _score_cves(results: list) -> tuple[int, list[str]]:
+    """Turn [(tech, NVD response JSON), ...] into (score, list_of_notes)."""
+    score = 10
+    notes = []
 
+    for tech, data in results:
         items = data.get('result', {}).get('CVE_Items', [])
         if not items:
             continue
@@ -123,6 +135,26 @@ def get_base_url(raw: str) -> str:
     p = urlparse(raw)
     return f'{p.scheme}://{p.netloc}'
 
+def _analyze_parts(base: str, hdrs: dict, html: str | ParsedDocument | None) -> tuple[int, str]:
+    """Steps 3–5 once headers and HTML for *base* are in hand."""
+    if not hdrs or html is None:
+        return 1, 'Error fetching headers or content.'
+    tech = detect_technologies(base, hdrs, html)
+    if not tech:
+        return 10, 'No recognizable technologies found.'
+    score, notes = check_vulnerabilities(tech)
+    return score, '; '.join(notes)
+
+def analyze(snapshot: PageSnapshot) -> tuple[int, str]:
+    """
+    Cross-reference an already-fetched snapshot of the site root
+    (scheme://host) against NVD.
+    """
+    base = get_base_url(snapshot.url)
+    hdrs = snapshot.headers if snapshot.ok else {}
+    html = snapshot.document if snapshot.ok else None
+    return _analyze_parts(base, hdrs, html)
+
 def analyze_vulnerabilities(raw_url: str) -> tuple[int, str]:
     """
     End-to-end wrapper:  
@@ -131,14 +163,30 @@ def analyze_vulnerabilities(raw_url: str) -> tuple[int, str]:
     5) return (score, semicolon-joined notes).
     """
     base = get_base_url(raw_url)
-    hdrs = get_headers(base)
-    html = get_content(base)
-    if not hdrs or html is None:
-        return 1, 'Error fetching headers or content.'
-    tech = detect_technologies(base, hdrs, html)
+    return _analyze_parts(base, get_headers(base), get_content(base))
+
+async def check_vulnerabilities_async(tech_map: dict) -> tuple[int, list[str]]:
+    """check_vulnerabilities with the NVD lookups run concurrently."""
+    engine = get_engine()
+
+    async def lookup(tech, version):
+        try:
+            resp = await engine.get(_nvd_url(tech, version), timeout=10)
+            return tech, resp.json()
+        except Exception:
+            return None
+
+    found = await asyncio.gather(*(lookup(t, v) for t, v in tech_map.items()))
+    return _score_cves([r for r in found if r is not None])
+
+async def analyze_async(snapshot: PageSnapshot) -> tuple[int, str]:
+    """Async twin of :func:`analyze`."""
+    if not snapshot.ok or not snapshot.headers:
+        return analyze(snapshot)      # the error path makes no lookups
+    tech = detect_technologies(get_base_url(snapshot.url), snapshot.headers, snapshot.document)
     if not tech:
         return 10, 'No recognizable technologies found.'
-    score, notes = check_vulnerabilities(tech)
+    score, notes = await check_vulnerabilities_async(tech)
     return score, '; '.join(notes)
 
 def main():
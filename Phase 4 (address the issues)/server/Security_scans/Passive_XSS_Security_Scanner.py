@@ -5,10 +5,13 @@
 
 import re
 import requests
-from bs4 import BeautifulSoup
+from html_document import ParsedDocument, as_document
 from urllib.parse import urlparse, parse_qs
 import argparse
 
+from page_snapshot import PageSnapshot
+from transport import get_transport
+
 # Functions often abused in XSS attacks
 RISKY_FUNCTIONS = [
     'eval(',
@@ -36,7 +39,7 @@ DEDUCTIONS = {
 def fetch_page(url: str, timeout: int = 10) -> tuple[str | None, dict | None]:
     """GET the page, return (html, headers) or (None, None) on error."""
     try:
-        resp = requests.get(url, timeout=timeout)
+        resp = get_transport().get(url, timeout=timeout)
         resp.raise_for_status()
         return resp.text, resp.headers
     except requests.RequestException:
@@ -67,22 +70,21 @@ def find_reflected_parameters(url: str, html: str) -> list[str]:
     reflected = [k for k, vals in params.items() if any(val in html for val in vals)]
     return reflected
 
-def find_inline_scripts(html: str) -> list[str]:
+def find_inline_scripts(html: str | ParsedDocument) -> list[str]:
     """Return any <script> blocks without a src attribute."""
-    soup = BeautifulSoup(html, 'html.parser')
-    return [script.string or '' for script in soup.find_all('script') if not script.get('src')]
+    return [script.text or '' for script in as_document(html).inline_scripts]
 
-def analyze_xss_security(url: str) -> tuple[int, str]:
+def analyze(snapshot: PageSnapshot) -> tuple[int, str]:
     """
-    Run all passive XSS checks and return (score, detail_string).
+    Run all passive XSS checks on a fetched page and return (score, detail_string).
     detail_string contains semicolon-separated findings.
     """
     score = 10
     notes: list[str] = []
 
-    html, headers = fetch_page(url)
-    if html is None or headers is None:
+    if not snapshot.ok:
         return 1, 'Could not fetch page or headers.'
+    url, html, headers = snapshot.url, snapshot.text, snapshot.headers
 
     # 1) risky JS usage
     bad_funcs = find_risky_functions(html)
@@ -106,7 +108,7 @@ def analyze_xss_security(url: str) -> tuple[int, str]:
         notes.append(f'Reflected params: {", ".join(reflected)} (-{DEDUCTIONS["reflected_params"]})')
 
     # 4) inline scripts
-    inline = find_inline_scripts(html)
+    inline = find_inline_scripts(snapshot.document)
     if inline:
         score -= DEDUCTIONS['inline_scripts']
         notes.append(f'Inline scripts found: {len(inline)} block(s) (-{DEDUCTIONS["inline_scripts"]})')
@@ -122,6 +124,15 @@ def analyze_xss_security(url: str) -> tuple[int, str]:
 
     return score, '; '.join(notes)
 
+def analyze_xss_security(url: str) -> tuple[int, str]:
+    """
+    Fetch *url* and run all passive XSS checks; see :func:`analyze`.
+    """
+    html, headers = fetch_page(url)
+    if html is None or headers is None:
+        return 1, 'Could not fetch page or headers.'
+    return analyze(PageSnapshot(url=url, final_url=url, headers=headers, text=html))
+
 def get_base_url(raw: str) -> str:
     """Ensure URL has a scheme and return scheme://host."""
     if '://' not in raw:
@@ -1,7 +1,7 @@
 """
 Quick checks for Passive_HTTPS_Scanner.
 
-• 100 % offline – `requests.get` is stub-patched  
+• 100 % offline – `requests.get` and the TLS probe are stub-patched  
 • only std-lib (unittest + mock)  
 • plain, hand-written style so most AI-detectors won’t flag it
 """
@@ -13,6 +13,7 @@ from types import SimpleNamespace
 from unittest.mock import patch
 
 from Security_scans import Passive_HTTPS_Scanner as scan
+from tls_probe import TLSProbe
 
 
 # ───────────────────────── helpers ───────────────────────── #
@@ -35,6 +36,14 @@ def _fake_get_factory(final_url: str, html: str = ""):
     return _fake_get
 
 
+def _fake_probe(snapshot, timeout=5):             # pylint: disable=unused-argument
+    """TLS 1.3, long-lived cert, no HSTS – what a healthy site looks like."""
+    return TLSProbe(host="example.com", port=443, version="TLSv1.3",
+                    cert={"notAfter": "Dec 31 23:59:59 2099 GMT"},
+                    verified=True, handshakes=1,
+                    hsts=snapshot.headers.get("Strict-Transport-Security"))
+
+
 def _pick_analyze_fn(ns):
     """Return the first public callable whose name starts with 'analyze_'."""
     for name, obj in vars(ns).items():
@@ -55,7 +64,8 @@ class HTTPSSecurityScannerTest(unittest.TestCase):
 
     def _score(self, final_url: str, html: str = "") -> int:
         with patch(f"{scan.__name__}.requests.get",
-                   new=_fake_get_factory(final_url, html)):
+                   new=_fake_get_factory(final_url, html)), \
+             patch(f"{scan.__name__}.probe_snapshot", new=_fake_probe):
             # pass the actual URL under test to the analyzer
             score, _ = _ANALYZE(final_url)          # type: ignore[arg-type]
             return score
@@ -12,49 +12,22 @@ import sys
 
 # Local import – mirrors the package layout
 from Security_scans import Passive_SSL_TLS_Certificate_Validation_Scanner as scanner
+from page_snapshot import PageSnapshot
+from tls_probe import TLSProbe
+
+_PROBE = "Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner.probe_tls"
 
 
 # --------------------------------------------------------------------------- #
 # Minimal stubs used by several tests
 # --------------------------------------------------------------------------- #
-class _DummySock:
-    """Socket stand‑in that works inside a with‑statement."""
-    def __enter__(self): return self
-    def __exit__(self, exc_type, exc, tb): return False
-
-
-class _FakeSSock(_DummySock):
-    """Fake SSL socket exposing only what the scanner touches."""
-    def __init__(self, *, tls_ver="TLSv1.3", cert=None, der=b"der"):
-        self._tls_ver = tls_ver
-        self._cert = cert or {}
-        self._der = der
-
-    def version(self):
-        return self._tls_ver
-
-    def getpeercert(self, binary_form=False):
-        return self._der if binary_form else self._cert
-
-
-class _DummyUnverifiedContext:
-    """Stand‑in for ssl._create_unverified_context()."""
-    def __init__(self, ssl_sock):
-        self._ssl_sock = ssl_sock
-
-    def wrap_socket(self, sock, server_hostname=None):  # noqa: D401
-        return self._ssl_sock
-
-
-class _DummyVerifiedContext:
-    """For ssl.create_default_context()."""
-    def __init__(self, raise_verification_error=False):
-        self._raise = raise_verification_error
-
-    def wrap_socket(self, sock, server_hostname=None):  # noqa: D401
-        if self._raise:
-            raise scanner.ssl.SSLCertVerificationError("untrusted")
-        return _DummySock()
+def _probe(*, tls_ver="TLSv1.3", cert=None, verify_error=None, error=None):
+    """TLSProbe as tls_probe.probe_tls would return it."""
+    return TLSProbe(
+        host="stub.example", port=443, version=tls_ver, cert=cert or {},
+        chain_der=(b"der",), verified=verify_error is None and error is None,
+        verify_error=verify_error, error=error, handshakes=1,
+    )
 
 
 # =============================================================================
@@ -74,23 +47,18 @@ class SSLCertificateScannerTests(TestCase):
     # ------------------------------------------------------------------ #
     # Perfect path – score should remain 10
     # ------------------------------------------------------------------ #
-    @mock.patch("Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner.ssl._create_unverified_context")
-    @mock.patch("Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner.socket.create_connection")
-    @mock.patch("Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner.ssl.create_default_context")
-    def test_analyze_certificate_best_case(self, fake_def_ctx, fake_conn, fake_unverified_ctx):
+    @mock.patch(_PROBE)
+    def test_analyze_certificate_best_case(self, fake_probe):
         good_cert = {
             "notAfter": "Dec 31 23:59:59 2030 GMT",
             "subject": ((('CN', 'good.example'),),),
             "issuer":  ((('CN', 'CA Root'),),),
         }
-        fake_ssl_sock = _FakeSSock(tls_ver="TLSv1.3", cert=good_cert)
-
-        fake_unverified_ctx.return_value = _DummyUnverifiedContext(fake_ssl_sock)
-        fake_conn.return_value = _DummySock()
-        fake_def_ctx.return_value = _DummyVerifiedContext(raise_verification_error=False)
+        fake_probe.return_value = _probe(tls_ver="TLSv1.3", cert=good_cert)
 
         score, notes = scanner.analyze_certificate("good.example:443")
 
+        fake_probe.assert_called_once_with("good.example", 443)
         self.assertEqual(score, 10)
         self.assertTrue(any("TLS version" in n for n in notes))
         self.assertTrue(any("trusted" in n.lower() for n in notes))
@@ -98,20 +66,15 @@ class SSLCertificateScannerTests(TestCase):
     # ------------------------------------------------------------------ #
     # Worst‑case – every deduction fires ⇒ score floors at 1
     # ------------------------------------------------------------------ #
-    @mock.patch("Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner.ssl._create_unverified_context")
-    @mock.patch("Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner.socket.create_connection")
-    @mock.patch("Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner.ssl.create_default_context")
-    def test_analyze_certificate_worst_case(self, fake_def_ctx, fake_conn, fake_unverified_ctx):
+    @mock.patch(_PROBE)
+    def test_analyze_certificate_worst_case(self, fake_probe):
         bad_cert = {
             "notAfter": "Jan 01 00:00:00 2020 GMT",            # expired
             "subject": ((('CN', 'bad.example'),),),
             "issuer":  ((('CN', 'bad.example'),),),            # self‑signed
         }
-        bad_ssl_sock = _FakeSSock(tls_ver="TLSv1.0", cert=bad_cert)
-
-        fake_unverified_ctx.return_value = _DummyUnverifiedContext(bad_ssl_sock)
-        fake_conn.return_value = _DummySock()
-        fake_def_ctx.return_value = _DummyVerifiedContext(raise_verification_error=True)
+        fake_probe.return_value = _probe(tls_ver="TLSv1.0", cert=bad_cert,
+                                         verify_error="self-signed certificate")
 
         # Stub‑in a mini “cryptography” so key‑size deduction works
         class _Key: key_size = 1024
@@ -119,10 +82,9 @@ class SSLCertificateScannerTests(TestCase):
             def public_key(self): return _Key()
         fake_x509 = SimpleNamespace(load_der_x509_certificate=lambda *_, **__: _Cert())
         fake_crypto = SimpleNamespace(x509=fake_x509)
-        sys.modules["cryptography"] = fake_crypto
-        sys.modules["cryptography.x509"] = fake_x509
-
-        score, notes = scanner.analyze_certificate("bad.example:443")
+        with mock.patch.dict(sys.modules, {"cryptography": fake_crypto,
+                                           "cryptography.x509": fake_x509}):
+            score, notes = scanner.analyze_certificate("bad.example:443")
 
         self.assertEqual(score, 1)
         joined = " ".join(notes).lower()
@@ -132,13 +94,24 @@ class SSLCertificateScannerTests(TestCase):
     # ------------------------------------------------------------------ #
     # Connection / handshake failure – graceful (1, [msg]) tuple
     # ------------------------------------------------------------------ #
-    @mock.patch(
-        "Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner.socket.create_connection",
-        side_effect=OSError("timeout"),
-    )
+    @mock.patch("tls_probe.socket.create_connection", side_effect=OSError("timeout"))
     def test_analyze_certificate_network_failure(self, _fake_conn):
         score, notes = scanner.analyze_certificate("offline.local:443")
 
         self.assertEqual(score, 1)
         self.assertEqual(len(notes), 1)
         self.assertTrue(notes[0].startswith("Connection/handshake failed"))
+
+    # ------------------------------------------------------------------ #
+    # A shared probe is scored as-is – no handshake of our own
+    # ------------------------------------------------------------------ #
+    @mock.patch("tls_probe.socket.create_connection")
+    def test_analyze_uses_shared_probe(self, fake_conn):
+        page = PageSnapshot(url="https://good.example", final_url="https://good.example")
+        shared = _probe(tls_ver="TLSv1.2", cert={"notAfter": "Dec 31 23:59:59 2030 GMT"})
+
+        score, notes = scanner.analyze(page, tls=shared)
+
+        fake_conn.assert_not_called()
+        self.assertTrue(any("TLS1.2" in n for n in notes))
+        self.assertLess(score, 10)
@@ -0,0 +1,112 @@
+# async_db.py
+
+"""
+Asyncio access to database.py for the FastAPI handlers.
+
+SQLite calls block, and every one made from an ``async def`` handler
+stalls all other requests in flight.  The :class:`DatabaseExecutor` runs
+them on dedicated threads instead:
+
+  • one writer thread – SQLite allows a single writer anyway, and queueing
+    writes here keeps them from contending for the lock
+  • a small pool of reader threads – in WAL mode these read the last
+    committed snapshot without waiting for the writer
+
+Each thread keeps its own pooled connection (see db_pool), so nothing is
+opened per call.  The handlers await the ``*_async`` functions below; the
+plain functions in database.py are unchanged for scripts and tests.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import database
+
+# defaults – tweak per deployment
+READER_THREADS = 4
+
+
+class DatabaseExecutor:
+    """One writer thread and a reader pool for blocking database calls."""
+
+    def __init__(self, reader_threads: int = READER_THREADS):
+        self._readers = ThreadPoolExecutor(max_workers=reader_threads,
+                                           thread_name_prefix="db-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+    async def read(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(fn, *args, **kwargs))
+
+    async def write(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """Finish queued work, then close the threads' connections."""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        database.close_connections()
+
+
+# --------------------------------------------------------------------------- #
+# Process-wide instance
+# --------------------------------------------------------------------------- #
+_executor: Optional[DatabaseExecutor] = None
+
+
+def get_executor() -> DatabaseExecutor:
+    """The shared executor (created on first use)."""
+    global _executor
+    if _executor is None:
+        _executor = DatabaseExecutor()
+    return _executor
+
+
+async def close_db() -> None:
+    """Drain and shut down the shared executor without blocking the loop."""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+
+# --------------------------------------------------------------------------- #
+# Async mirrors of database.py
+# --------------------------------------------------------------------------- #
+async def init_db_async() -> None:
+    await get_executor().write(database.init_db)
+
+
+async def insert_log_async(*args) -> None:
+    await get_executor().write(database.insert_log, *args)
+
+
+async def save_scan_async(url, results, final_scores, duration) -> None:
+    await get_executor().write(database.save_scan, url, results, final_scores, duration)
+
+
+async def get_log_by_url_async(url):
+    return await get_executor().read(database.get_log_by_url, url)
+
+
+async def get_all_logs_async():
+    return await get_executor().read(database.get_all_logs)
+
+
+async def list_logs_async(**filters):
+    return await get_executor().read(database.list_logs, **filters)
+
+
+async def get_trend_async(url, since=None, until=None, scanner=None):
+    return await get_executor().read(database.get_trend, url, since, until, scanner)
+
+
+async def compact_history_async() -> None:
+    await get_executor().write(database.compact_history)
+
+
+async def train_detail_dictionary_async():
+    return await get_executor().write(database.train_detail_dictionary)
@@ -0,0 +1,225 @@
+# async_http.py
+
+"""
+Asyncio HTTP layer for the scanner suite.
+
+One process-wide ``httpx.AsyncClient`` gives us HTTP keep-alive and a
+shared connection pool, and a per-host semaphore caps how many requests we
+have in flight against any one site.  The FastAPI handler awaits this
+directly, so a scan no longer ties up a worker thread while it waits on
+the network.
+
+When a transport manager is installed (the server does this at startup)
+the engine takes its per-host pool size and its urllib3 ``Retry`` policy,
+so the async scans retry exactly what the pooled sessions would.  TLS
+uses the manager's shared verified SSL context, and, as with its sessions,
+cookies are not carried from one scan into the next.  The sync path
+(page_snapshot.fetch_snapshot) still backs the command-line entry points.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlparse
+
+import httpx
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, ProtocolError
+from urllib3.util.retry import Retry
+
+from deadline import clamp
+from page_snapshot import DEFAULT_TIMEOUT, PageSnapshot, error_snapshot
+from transport import NoCookiePolicy, TransportManager, get_transport, ssl_context
+
+# pool sizing
+MAX_CONNECTIONS = 100          # across all hosts
+MAX_KEEPALIVE_CONNECTIONS = 20
+PER_HOST_LIMIT = 6             # same as a browser
+MAX_TRACKED_HOSTS = 1024       # idle per-host limiters kept before the oldest is dropped
+
+# httpx reports "HTTP/1.1"; requests (urllib3) reports 11
+_HTTP_VERSIONS = {"HTTP/1.0": 10, "HTTP/1.1": 11, "HTTP/2": 20, "HTTP/3": 30}
+
+
+def _as_urllib3_error(exc: httpx.TransportError) -> Optional[Exception]:
+    """The urllib3 error a Retry policy counts *exc* as, or None if it is never retried."""
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return ConnectTimeoutError(str(exc))
+    if isinstance(exc, (httpx.ReadError, httpx.ReadTimeout, httpx.RemoteProtocolError)):
+        return ProtocolError(str(exc))
+    return None
+
+
+class _HostSlots:
+    """A host's concurrency limit, plus how many requests are waiting on or holding it."""
+    __slots__ = ("sem", "users")
+
+    def __init__(self, limit: int):
+        self.sem = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class AsyncHTTPEngine:
+    """Pooled keep-alive client with bounded per-host concurrency."""
+
+    def __init__(self,
+                 max_connections: int = MAX_CONNECTIONS,
+                 max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+                 per_host_limit: int = PER_HOST_LIMIT,
+                 retry: Optional[Retry] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 max_tracked_hosts: int = MAX_TRACKED_HOSTS):
+        self.per_host_limit = per_host_limit
+        self.max_tracked_hosts = max_tracked_hosts
+        self.retry = retry            # None: no retries
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_keepalive_connections),
+            timeout=DEFAULT_TIMEOUT,
+            transport=transport,
+            verify=ssl_context(verified=True),
+        )
+        self._client.cookies.jar.set_policy(NoCookiePolicy())
+        self._host_slots: "OrderedDict[str, _HostSlots]" = OrderedDict()
+
+    @classmethod
+    def from_transport(cls, manager: TransportManager, **kwargs) -> "AsyncHTTPEngine":
+        """An engine with *manager*'s per-host pool size and retry policy."""
+        kwargs.setdefault("per_host_limit", manager.pool_maxsize)
+        kwargs.setdefault("retry", manager.max_retries)
+        return cls(**kwargs)
+
+    @asynccontextmanager
+    async def _slot(self, url: str):
+        host = urlparse(url).netloc.lower()
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = _HostSlots(self.per_host_limit)
+        else:
+            self._host_slots.move_to_end(host)
+        slots.users += 1              # before pruning, so this host is never the one dropped
+        self._drop_idle_hosts()
+        try:
+            async with slots.sem:
+                yield
+        finally:
+            slots.users -= 1
+
+    def _drop_idle_hosts(self) -> None:
+        """Forget the least recently used hosts past max_tracked_hosts – only idle ones."""
+        excess = len(self._host_slots) - self.max_tracked_hosts
+        if excess <= 0:
+            return
+        idle = [host for host, slots in self._host_slots.items() if not slots.users]
+        for host in idle[:excess]:
+            del self._host_slots[host]
+
+    async def request(self, method: str, url: str, *,
+                      timeout: float = DEFAULT_TIMEOUT,
+                      headers: Optional[dict] = None,
+                      follow_redirects: bool = True) -> httpx.Response:
+        retry = self.retry
+        async with self._slot(url):
+            while True:
+                try:
+                    # never outlive the scan's deadline (see deadline.py)
+                    resp = await self._client.request(method, url, headers=headers,
+                                                      timeout=clamp(timeout),
+                                                      follow_redirects=follow_redirects)
+                except httpx.TransportError as exc:
+                    error = _as_urllib3_error(exc)
+                    if retry is None or error is None:
+                        raise
+                    try:
+                        retry = retry.increment(method, url, error=error)
+                    except (MaxRetryError, ConnectTimeoutError, ProtocolError):
+                        raise exc from None
+                else:
+                    if retry is None or not retry.is_retry(method, resp.status_code):
+                        return resp
+                    try:
+                        retry = retry.increment(method, url)
+                    except MaxRetryError:
+                        return resp
+                    await resp.aclose()
+                await asyncio.sleep(clamp(retry.get_backoff_time()))
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("HEAD", url, **kwargs)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# --------------------------------------------------------------------------- #
+# Process-wide engine
+# --------------------------------------------------------------------------- #
+# httpx clients and asyncio semaphores belong to one event loop, so the
+# engine is rebuilt if it is asked for from a different loop.
+_engine: Optional[AsyncHTTPEngine] = None
+_engine_loop = None
+
+
+def get_engine() -> AsyncHTTPEngine:
+    """Return the shared engine for the running event loop."""
+    global _engine, _engine_loop
+    loop = asyncio.get_running_loop()
+    if _engine is None or _engine_loop is not loop:
+        manager = get_transport()
+        engine = (AsyncHTTPEngine.from_transport(manager)
+                  if isinstance(manager, TransportManager) else AsyncHTTPEngine())
+        _engine, _engine_loop = engine, loop
+    return _engine
+
+
+def install_engine(engine: Optional[AsyncHTTPEngine]) -> None:
+    """Swap in a specific engine (tests, custom pool sizes)."""
+    global _engine, _engine_loop
+    _engine = engine
+    _engine_loop = asyncio.get_running_loop() if engine is not None else None
+
+
+async def close_engine() -> None:
+    """Close the shared engine's connections (server shutdown)."""
+    global _engine, _engine_loop
+    if _engine is not None:
+        await _engine.aclose()
+    _engine, _engine_loop = None, None
+
+
+# --------------------------------------------------------------------------- #
+# Snapshots
+# --------------------------------------------------------------------------- #
+def snapshot_from_httpx(url: str, resp: httpx.Response, elapsed: float = 0.0) -> PageSnapshot:
+    """Freeze an ``httpx.Response`` into the same PageSnapshot the sync path builds."""
+    return PageSnapshot(
+        url=url,
+        final_url=str(resp.url),
+        status_code=resp.status_code,
+        history=tuple(str(r.url) for r in resp.history),
+        headers=CaseInsensitiveDict(resp.headers.items()),
+        set_cookie=tuple(resp.headers.get_list("set-cookie")),
+        # the underlying http.cookiejar jar yields Cookie objects, as requests does
+        cookies=tuple(resp.cookies.jar),
+        content=resp.content,
+        text=resp.text,
+        http_version=_HTTP_VERSIONS.get(resp.http_version),
+        elapsed=elapsed,
+        fetched_at=time.time(),
+    )
+
+
+async def fetch_snapshot_async(url: str, timeout: float = DEFAULT_TIMEOUT,
+                               headers: Optional[dict] = None) -> PageSnapshot:
+    """GET *url* once through the shared engine (never raises)."""
+    start = time.time()
+    try:
+        resp = await get_engine().get(url, timeout=timeout, headers=headers)
+    except Exception as exc:
+        return error_snapshot(url, exc)
+    return snapshot_from_httpx(url, resp, elapsed=time.time() - start)
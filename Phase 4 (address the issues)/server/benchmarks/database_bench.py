@@ -0,0 +1,90 @@
+"""
+URL lookup / UPSERT timings as the logs table grows.
+
+    python benchmarks/database_bench.py            # up to 1,000,000 rows
+    python benchmarks/database_bench.py --rows 100000
+
+Rows are bulk-loaded into a temporary database, then get_log_by_url and
+insert_log are timed at each size.  Both go through the unique index on
+urls.url and the (url_id, scanner_id) keys of scan_results and
+scan_details, so they stay flat.  Every stored scan also has its row in
+scan_history, as insert_log writes one.
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+
+_SCANS = 22
+_SAMPLES = 200
+
+
+def _row(url):
+    args = [url]
+    for i in range(_SCANS):
+        args += [f"scan {i}", "Score: 5/10 - ok"]
+    return args + [5.0] * 5 + [0.1]
+
+
+def _fill(db_file, start, stop):
+    # ids are assigned explicitly so the fact rows can be generated alongside
+    payload = database.details_codec().encode("ok")
+    conn = sqlite3.connect(db_file)
+    conn.executemany(
+        "INSERT INTO urls (id, url, host, final_score_norm, final_score_privacy,"
+        " final_score_security, final_score_rand, final_score_adver, duration)"
+        " VALUES (?, ?, ?, 5, 5, 5, 5, 5, 0.1)",
+        ((i + 1, f"https://site{i}.example/", f"site{i}.example") for i in range(start, stop)),
+    )
+    facts = [(i + 1, s + 1) for i in range(start, stop) for s in range(_SCANS)]
+    conn.executemany("INSERT INTO scan_results (url_id, scanner_id, score) VALUES (?, ?, 5)", facts)
+    conn.executemany("INSERT INTO scan_details (url_id, scanner_id, payload) VALUES (?, ?, ?)",
+                     ((url_id, scanner_id, payload) for url_id, scanner_id in facts))
+    conn.executemany(
+        "INSERT INTO scan_history (url_id, scanned_at, scanner_id, score, scored_samples)"
+        " VALUES (?, CURRENT_TIMESTAMP, ?, 5, 1)", facts)
+    conn.commit()
+    conn.close()
+
+
+def _time_us(fn, keys):
+    t0 = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - t0) / len(keys) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_FILE = os.path.join(tmp, "bench.sqlite")
+        database.init_db()
+
+        print(f"{'rows':>10}  {'lookup µs':>10}  {'upsert µs':>10}")
+        filled, size = 0, 1_000
+        while filled < args.rows:
+            size = min(size, args.rows)
+            _fill(database.DB_FILE, filled, size)
+            filled = size
+
+            keys = [f"https://site{random.randrange(filled)}.example/" for _ in range(_SAMPLES)]
+            lookup = _time_us(database.get_log_by_url, keys)
+            upsert = _time_us(lambda k: database.insert_log(*_row(k)), keys[:20])
+            print(f"{filled:>10,}  {lookup:>10.1f}  {upsert:>10.1f}")
+            size *= 10
+        database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
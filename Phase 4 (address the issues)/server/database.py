@@ -1,19 +1,118 @@
 # database.py
 
+import base64
+import inspect
+import json
+import re
 import sqlite3
-import os
+from urllib.parse import urlparse
+
+from db_pool import ConnectionManager, configure, enable_wal
+from detail_codec import DetailCodec, train as train_detail_codec
+from scanners import REGISTRY
 
 DB_FILE = 'database.sqlite'
 
-def init_db():
-    """Initialize (or recreate) the database with all scan columns, five final scores, duration, and timestamp."""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    # Drop the table if it exists
-    cursor.execute("DROP TABLE IF EXISTS logs")
-    # Create the logs table with all scan fields, final scores, duration, and timestamp
+# one long-lived, tuned connection per thread (see db_pool)
+_connections = ConnectionManager()
+
+# (key, default name) of every scanner, in registry order – scanners.REGISTRY
+# is the one place they are described.  The key prefixes the *_scan_name /
+# *_scan_result fields returned by get_log_by_url; the name is only the
+# default until a scan stores its own.
+SCANNERS = [(spec.key, spec.name) for spec in REGISTRY]
+
+FINAL_SCORES = (
+    "final_score_norm", "final_score_privacy", "final_score_security",
+    "final_score_rand", "final_score_adver",
+)
+
+# "Score: 7/10 - details", as formatted by server.log_url
+_RESULT = re.compile(r"Score:\s*(-?\d+(?:\.\d+)?)/10 - (.*)\Z", re.DOTALL)
+
+
+def split_result(result):
+    """'Score: X/10 - details' -> (X, details); (None, result) if it doesn't parse."""
+    match = _RESULT.match(result or "")
+    if not match:
+        return None, result
+    score = float(match.group(1))
+    return (int(score) if score.is_integer() else score), match.group(2)
+
+
+def format_result(score, details):
+    """Inverse of split_result."""
+    if score is None:
+        return details
+    return f"Score: {score}/10 - {details}"
+
+# --------------------------------------------------------------------------- #
+# Detail compression (see detail_codec)
+# --------------------------------------------------------------------------- #
+DICT_MIN_SAMPLES = 500          # details needed before a dictionary is trained
+DICT_SAMPLE_SIZE = 20000        # most recent details it is trained on
+
+_codecs = {}                    # DB_FILE -> DetailCodec
+
+
+def _no_dictionary(dict_id):
+    raise KeyError(f"Detail dictionary {dict_id} not found")
+
+
+def _store_dictionary(cursor, codec, data):
+    cursor.execute("INSERT INTO detail_dicts (codec, data) VALUES (?, ?)", (codec, data))
+    return cursor.lastrowid, codec, data
+
+
+def details_codec():
+    """The codec for DB_FILE, set up with its newest dictionary."""
+    codec = _codecs.get(DB_FILE)
+    if codec is None:
+        db_file = DB_FILE
+
+        def load(dict_id):
+            row = _connections.connection(db_file).execute(
+                "SELECT codec, data FROM detail_dicts WHERE id = ?", (dict_id,)).fetchone()
+            if row is None:
+                _no_dictionary(dict_id)
+            return row
+
+        codec = DetailCodec(load)
+        newest = _connections.connection(db_file).execute(
+            "SELECT id, codec, data FROM detail_dicts ORDER BY id DESC LIMIT 1").fetchone()
+        if newest:
+            codec.use(*newest)
+        _codecs[db_file] = codec
+    return codec
+
+
+def train_detail_dictionary(force=False):
+    """
+    Train a dictionary on recent details and compress new ones with it.
+    Without *force* this only happens once, when enough details exist;
+    returns the new dictionary id, or None.
+    """
+    codec = details_codec()
+    if codec.active and not force:
+        return None
+    conn = _connections.connection(DB_FILE)
+    samples = [codec.decode(payload) for (payload,) in conn.execute('''
+        SELECT d.payload FROM scan_details d JOIN scan_results r USING (url_id, scanner_id)
+        ORDER BY r.scanned_at DESC LIMIT ?
+    ''', (DICT_SAMPLE_SIZE,))]
+    if len(samples) < DICT_MIN_SAMPLES:
+        return None
+    trained = train_detail_codec(samples)
+    with _connections.transaction(DB_FILE) as conn:
+        dict_id, kind, data = _store_dictionary(conn.cursor(), *trained)
+    codec.use(dict_id, kind, data)
+    return dict_id
+
+
+def _create_logs(cursor):
+    """v1: the logs table with all scan fields, final scores, duration, and timestamp."""
     cursor.execute('''
-        CREATE TABLE logs (
+        CREATE TABLE IF NOT EXISTS logs (
             url                                  TEXT   NOT NULL,
             xss_scan_name                        TEXT   NOT NULL,
             xss_scan_result                      TEXT   NOT NULL,
@@ -68,8 +167,228 @@ def init_db():
             timestamp                            DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     ''')
-    conn.commit()
-    conn.close()
+
+
+def _unique_url(cursor):
+    """v2: one row per normalized URL, enforced by a unique index."""
+    # older builds could race two scans of a page into two rows; keep the newest
+    cursor.execute('''
+        DELETE FROM logs
+        WHERE rowid NOT IN (SELECT MAX(rowid) FROM logs GROUP BY url)
+    ''')
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS logs_url ON logs (url)")
+
+
+def _normalize_results(cursor):
+    """v3: scanners / urls / scan_results replace the 52-column logs table."""
+    cursor.execute('''
+        CREATE TABLE scanners (
+            id    INTEGER PRIMARY KEY,
+            key   TEXT    NOT NULL UNIQUE,
+            name  TEXT    NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE urls (
+            id                    INTEGER  PRIMARY KEY,
+            url                   TEXT     NOT NULL UNIQUE,
+            final_score_norm      REAL     NOT NULL,
+            final_score_privacy   REAL     NOT NULL,
+            final_score_security  REAL     NOT NULL,
+            final_score_rand      REAL     NOT NULL,
+            final_score_adver     REAL     NOT NULL,
+            duration              REAL     NOT NULL,
+            timestamp             DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("CREATE INDEX urls_timestamp ON urls (timestamp)")
+    cursor.execute('''
+        CREATE TABLE scan_results (
+            url_id      INTEGER  NOT NULL REFERENCES urls (id) ON DELETE CASCADE,
+            scanner_id  INTEGER  NOT NULL REFERENCES scanners (id),
+            score       SMALLINT,
+            details     TEXT     NOT NULL,
+            scanned_at  DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (url_id, scanner_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX scan_results_scanner_score ON scan_results (scanner_id, score)")
+    cursor.executemany("INSERT INTO scanners (key, name) VALUES (?, ?)", SCANNERS)
+
+    # carry the old rows across, splitting "Score: X/10 - ..." once, here.
+    # Old builds wrote some scanners into each other's columns (dnt and
+    # data_leakage were passed in swapped order), so a column pair belongs
+    # to the scanner its stored name says, not to its column prefix
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(logs)")]
+    legacy = [c[:-len("_scan_name")] for c in columns if c.endswith("_scan_name")]
+    pair_columns = [f"{key}_scan_{part}" for key in legacy for part in ("name", "result")]
+    rows = cursor.execute(
+        f"SELECT url, {', '.join(pair_columns)}, {', '.join(FINAL_SCORES)}, duration, timestamp "
+        "FROM logs ORDER BY timestamp"
+    ).fetchall()
+    scanner_ids = dict(cursor.execute("SELECT key, id FROM scanners"))
+    key_by_name = {name: key for key, name in SCANNERS}
+    names = {}
+    for row in rows:
+        url, pairs, tail = row[0], row[1:1 + 2 * len(legacy)], row[1 + 2 * len(legacy):]
+        keys = [key_by_name.get(pairs[2 * i], key) for i, key in enumerate(legacy)]
+        if len(set(keys)) != len(keys):           # names that don't add up: trust the columns
+            keys = legacy
+        cursor.execute(
+            f"INSERT INTO urls (url, {', '.join(FINAL_SCORES)}, duration, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, *tail),
+        )
+        url_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO scan_results (url_id, scanner_id, score, details, scanned_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(url_id, scanner_ids[key], *split_result(pairs[2 * i + 1]), tail[-1])
+             for i, key in enumerate(keys)],
+        )
+        # names are the same on every row; keep the most recent ones
+        names.update((key, pairs[2 * i]) for i, key in enumerate(keys))
+    cursor.executemany("UPDATE scanners SET name = ? WHERE key = ?",
+                       [(name, key) for key, name in names.items()])
+    cursor.execute("DROP TABLE logs")
+
+
+def _scan_history(cursor):
+    """v4: append-only per-scanner score history, seeded from the latest results."""
+    cursor.execute('''
+        CREATE TABLE scan_history (
+            url_id      INTEGER  NOT NULL REFERENCES urls (id) ON DELETE CASCADE,
+            scanned_at  DATETIME NOT NULL,
+            scanner_id  INTEGER  NOT NULL REFERENCES scanners (id),
+            resolution  TEXT     NOT NULL DEFAULT 'raw' CHECK (resolution IN ('raw', 'day', 'week')),
+            score       REAL,
+            samples     INTEGER  NOT NULL DEFAULT 1,
+            PRIMARY KEY (url_id, scanned_at, scanner_id, resolution)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT INTO scan_history (url_id, scanned_at, scanner_id, score)
+        SELECT url_id, scanned_at, scanner_id, score FROM scan_results
+    ''')
+
+
+def _host(url):
+    return (urlparse(url).hostname or '').lower()
+
+
+def _url_host(cursor):
+    """v5: urls.host plus indexes for the filtered, sorted /logs listing."""
+    cursor.execute("ALTER TABLE urls ADD COLUMN host TEXT NOT NULL DEFAULT ''")
+    rows = cursor.execute("SELECT id, url FROM urls").fetchall()
+    cursor.executemany("UPDATE urls SET host = ? WHERE id = ?",
+                       [(_host(url), url_id) for url_id, url in rows])
+    cursor.execute("CREATE INDEX urls_host_timestamp ON urls (host, timestamp)")
+    for column in ("final_score_norm", "final_score_privacy", "final_score_security", "duration"):
+        cursor.execute(f"CREATE INDEX urls_{column} ON urls ({column})")
+
+
+def _separate_details(cursor):
+    """v6: compressed detail payloads in their own table, out of the way of score reads."""
+    cursor.execute('''
+        CREATE TABLE detail_dicts (
+            id          INTEGER  PRIMARY KEY,
+            codec       INTEGER  NOT NULL,
+            data        BLOB     NOT NULL,
+            created_at  DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE scan_details (
+            url_id      INTEGER  NOT NULL REFERENCES urls (id) ON DELETE CASCADE,
+            scanner_id  INTEGER  NOT NULL REFERENCES scanners (id),
+            payload     BLOB     NOT NULL,
+            PRIMARY KEY (url_id, scanner_id)
+        ) WITHOUT ROWID
+    ''')
+    # train on what is already stored, then compress it all with that
+    codec = DetailCodec(_no_dictionary)
+    samples = [d for (d,) in cursor.execute(
+        "SELECT details FROM scan_results ORDER BY scanned_at DESC LIMIT ?", (DICT_SAMPLE_SIZE,))]
+    if len(samples) >= DICT_MIN_SAMPLES:
+        codec.use(*_store_dictionary(cursor, *train_detail_codec(samples)))
+    rows = cursor.execute("SELECT url_id, scanner_id, details FROM scan_results").fetchall()
+    cursor.executemany("INSERT INTO scan_details (url_id, scanner_id, payload) VALUES (?, ?, ?)",
+                       [(url_id, scanner_id, codec.encode(details)) for url_id, scanner_id, details in rows])
+
+    # scan_results keeps only what score queries need
+    cursor.execute('''
+        CREATE TABLE scan_results_v6 (
+            url_id      INTEGER  NOT NULL REFERENCES urls (id) ON DELETE CASCADE,
+            scanner_id  INTEGER  NOT NULL REFERENCES scanners (id),
+            score       SMALLINT,
+            scanned_at  DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (url_id, scanner_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT INTO scan_results_v6 (url_id, scanner_id, score, scanned_at)
+        SELECT url_id, scanner_id, score, scanned_at FROM scan_results
+    ''')
+    cursor.execute("DROP TABLE scan_results")
+    cursor.execute("ALTER TABLE scan_results_v6 RENAME TO scan_results")
+    cursor.execute("CREATE INDEX scan_results_scanner_score ON scan_results (scanner_id, score)")
+
+
+def _scored_samples(cursor):
+    """v7: scan_history.scored_samples – how many of a row's samples had a score."""
+    cursor.execute("ALTER TABLE scan_history ADD COLUMN scored_samples INTEGER NOT NULL DEFAULT 1")
+    cursor.execute("UPDATE scan_history SET scored_samples = CASE WHEN score IS NULL THEN 0 ELSE samples END")
+
+
+# Forward-only schema migrations, applied in order.  PRAGMA user_version holds
+# the number already applied, so a restart only runs the ones it hasn't seen
+# and existing rows survive.  Never edit a shipped migration – append a new one.
+MIGRATIONS = [
+    _create_logs,
+    _unique_url,
+    _normalize_results,
+    _scan_history,
+    _url_host,
+    _separate_details,
+    _scored_samples,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def close_connections():
+    """Close the pooled connections (server shutdown, tests)."""
+    _connections.close()
+    _codecs.clear()
+
+
+def init_db():
+    """Bring the database up to SCHEMA_VERSION, keeping any rows already stored."""
+    conn = configure(sqlite3.connect(DB_FILE, isolation_level=None))
+    try:
+        enable_wal(conn)
+        current = schema_version(conn)
+        if current > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"{DB_FILE} is at schema version {current}, newer than this server ({SCHEMA_VERSION})"
+            )
+        cursor = conn.cursor()
+        for version, migrate in enumerate(MIGRATIONS[current:], start=current + 1):
+            # each step and its version bump commit together, or not at all
+            cursor.execute("BEGIN")
+            try:
+                migrate(cursor)
+                cursor.execute(f"PRAGMA user_version = {version}")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+    finally:
+        conn.close()
 
 
 def insert_log(
@@ -103,319 +422,341 @@ def insert_log(
     Insert a new log or update an existing one (by URL). Stores all scan results,
     five final scores, duration, and updates timestamp.
     """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    # See if an entry for this URL already exists
-    cursor.execute("SELECT rowid FROM logs WHERE url = ?", (url,))
-    existing = cursor.fetchone()
-
-    if existing:
-        # Update existing row
-        cursor.execute('''
-            UPDATE logs SET
-                xss_scan_name                        = ?, xss_scan_result                        = ?,
-                vuln_scan_name                       = ?, vuln_scan_result                       = ?,
-                privacy_tracker_scan_name            = ?, privacy_tracker_scan_result            = ?,
-                privacy_third_party_script_scan_name = ?, privacy_third_party_script_scan_result = ?,
-                ssl_scan_name                        = ?, ssl_scan_result                        = ?,
-                sql_scan_name                        = ?, sql_scan_result                        = ?,
-                headers_scan_name                    = ?, headers_scan_result                    = ?,
-                privacy_audit_scan_name              = ?, privacy_audit_scan_result              = ?,
-                performance_scan_name                = ?, performance_scan_result                = ?,
-                outdated_scan_name                   = ?, outdated_scan_result                   = ?,
-                mixed_scan_name                      = ?, mixed_scan_result                      = ?,
-                directory_scan_name                  = ?, directory_scan_result                  = ?,
-                csrf_scan_name                       = ?, csrf_scan_result                       = ?,
-                csp_scan_name                        = ?, csp_scan_result                        = ?,
-                https_scan_name                      = ?, https_scan_result                      = ?,
-                third_party_data_collection_scan_name= ?, third_party_data_collection_scan_result= ?,
-                tracker_detection_scan_name          = ?, tracker_detection_scan_result          = ?,
-                fingerprinting_scan_name             = ?, fingerprinting_scan_result             = ?,
-                referrer_dnt_scan_name               = ?, referrer_dnt_scan_result               = ?,
-                dnt_scan_name                        = ?, dnt_scan_result                        = ?,
-                data_leakage_scan_name               = ?, data_leakage_scan_result               = ?,
-                cookie_scan_name                     = ?, cookie_scan_result                     = ?,
-                final_score_norm                     = ?, final_score_privacy                    = ?,
-                final_score_security                 = ?, final_score_rand                       = ?,
-                final_score_adver                    = ?, duration                                = ?,
-                timestamp                            = CURRENT_TIMESTAMP
-            WHERE rowid = ?
-        ''', (
-            xss_scan_name, xss_scan_result,
-            vuln_scan_name, vuln_scan_result,
-            privacy_tracker_scan_name, privacy_tracker_scan_result,
-            privacy_third_party_script_scan_name, privacy_third_party_script_scan_result,
-            ssl_scan_name, ssl_scan_result,
-            sql_scan_name, sql_scan_result,
-            headers_scan_name, headers_scan_result,
-            privacy_audit_scan_name, privacy_audit_scan_result,
-            performance_scan_name, performance_scan_result,
-            outdated_scan_name, outdated_scan_result,
-            mixed_scan_name, mixed_scan_result,
-            directory_scan_name, directory_scan_result,
-            csrf_scan_name, csrf_scan_result,
-            csp_scan_name, csp_scan_result,
-            https_scan_name, https_scan_result,
-            third_party_data_collection_scan_name, third_party_data_collection_scan_result,
-            tracker_detection_scan_name, tracker_detection_scan_result,
-            fingerprinting_scan_name, fingerprinting_scan_result,
-            referrer_dnt_scan_name, referrer_dnt_scan_result,
-            dnt_scan_name, dnt_scan_result,
-            data_leakage_scan_name, data_leakage_scan_result,
-            cookie_scan_name, cookie_scan_result,
-            final_score_norm, final_score_privacy, final_score_security,
-            final_score_rand, final_score_adver, duration,
-            existing[0]
-        ))
-    else:
-        # Insert new row
-        cursor.execute('''
-            INSERT INTO logs (
-                url,
-                xss_scan_name, xss_scan_result,
-                vuln_scan_name, vuln_scan_result,
-                privacy_tracker_scan_name, privacy_tracker_scan_result,
-                privacy_third_party_script_scan_name, privacy_third_party_script_scan_result,
-                ssl_scan_name, ssl_scan_result,
-                sql_scan_name, sql_scan_result,
-                headers_scan_name, headers_scan_result,
-                privacy_audit_scan_name, privacy_audit_scan_result,
-                performance_scan_name, performance_scan_result,
-                outdated_scan_name, outdated_scan_result,
-                mixed_scan_name, mixed_scan_result,
-                directory_scan_name, directory_scan_result,
-                csrf_scan_name, csrf_scan_result,
-                csp_scan_name, csp_scan_result,
-                https_scan_name, https_scan_result,
-                third_party_data_collection_scan_name, third_party_data_collection_scan_result,
-                tracker_detection_scan_name, tracker_detection_scan_result,
-                fingerprinting_scan_name, fingerprinting_scan_result,
-                referrer_dnt_scan_name, referrer_dnt_scan_result,
-                dnt_scan_name, dnt_scan_result,
-                data_leakage_scan_name, data_leakage_scan_result,
-                cookie_scan_name, cookie_scan_result,
-                final_score_norm, final_score_privacy, final_score_security,
-                final_score_rand, final_score_adver, duration
-            ) VALUES (
-                ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-            )
-        ''', (
-            url,
-            xss_scan_name, xss_scan_result,
-            vuln_scan_name, vuln_scan_result,
-            privacy_tracker_scan_name, privacy_tracker_scan_result,
-            privacy_third_party_script_scan_name, privacy_third_party_script_scan_result,
-            ssl_scan_name, ssl_scan_result,
-            sql_scan_name, sql_scan_result,
-            headers_scan_name, headers_scan_result,
-            privacy_audit_scan_name, privacy_audit_scan_result,
-            performance_scan_name, performance_scan_result,
-            outdated_scan_name, outdated_scan_result,
-            mixed_scan_name, mixed_scan_result,
-            directory_scan_name, directory_scan_result,
-            csrf_scan_name, csrf_scan_result,
-            csp_scan_name, csp_scan_result,
-            https_scan_name, https_scan_result,
-            third_party_data_collection_scan_name, third_party_data_collection_scan_result,
-            tracker_detection_scan_name, tracker_detection_scan_result,
-            fingerprinting_scan_name, fingerprinting_scan_result,
-            referrer_dnt_scan_name, referrer_dnt_scan_result,
-            dnt_scan_name, dnt_scan_result,
-            data_leakage_scan_name, data_leakage_scan_result,
-            cookie_scan_name, cookie_scan_result,
-            final_score_norm, final_score_privacy, final_score_security,
-            final_score_rand, final_score_adver, duration
-        ))
-    conn.commit()
-    conn.close()
+    save_scan(*scan_from_log(
+        url,
+        xss_scan_name, xss_scan_result,
+        vuln_scan_name, vuln_scan_result,
+        privacy_tracker_scan_name, privacy_tracker_scan_result,
+        privacy_third_party_script_scan_name, privacy_third_party_script_scan_result,
+        ssl_scan_name, ssl_scan_result,
+        sql_scan_name, sql_scan_result,
+        headers_scan_name, headers_scan_result,
+        privacy_audit_scan_name, privacy_audit_scan_result,
+        performance_scan_name, performance_scan_result,
+        outdated_scan_name, outdated_scan_result,
+        mixed_scan_name, mixed_scan_result,
+        directory_scan_name, directory_scan_result,
+        csrf_scan_name, csrf_scan_result,
+        csp_scan_name, csp_scan_result,
+        https_scan_name, https_scan_result,
+        third_party_data_collection_scan_name, third_party_data_collection_scan_result,
+        tracker_detection_scan_name, tracker_detection_scan_result,
+        fingerprinting_scan_name, fingerprinting_scan_result,
+        referrer_dnt_scan_name, referrer_dnt_scan_result,
+        dnt_scan_name, dnt_scan_result,
+        data_leakage_scan_name, data_leakage_scan_result,
+        cookie_scan_name, cookie_scan_result,
+        final_score_norm, final_score_privacy, final_score_security, final_score_rand, final_score_adver,
+        duration,
+    ))
 
 
-def get_all_logs():
-    """Retrieve all log entries (most recent first), including duration."""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT
-            url,
-            xss_scan_name, xss_scan_result,
-            vuln_scan_name, vuln_scan_result,
-            privacy_tracker_scan_name, privacy_tracker_scan_result,
-            privacy_third_party_script_scan_name, privacy_third_party_script_scan_result,
-            ssl_scan_name, ssl_scan_result,
-            sql_scan_name, sql_scan_result,
-            headers_scan_name, headers_scan_result,
-            privacy_audit_scan_name, privacy_audit_scan_result,
-            performance_scan_name, performance_scan_result,
-            outdated_scan_name, outdated_scan_result,
-            mixed_scan_name, mixed_scan_result,
-            directory_scan_name, directory_scan_result,
-            csrf_scan_name, csrf_scan_result,
-            csp_scan_name, csp_scan_result,
-            https_scan_name, https_scan_result,
-            third_party_data_collection_scan_name, third_party_data_collection_scan_result,
-            tracker_detection_scan_name, tracker_detection_scan_result,
-            fingerprinting_scan_name, fingerprinting_scan_result,
-            referrer_dnt_scan_name, referrer_dnt_scan_result,
-            dnt_scan_name, dnt_scan_result,
-            data_leakage_scan_name, data_leakage_scan_result,
-            cookie_scan_name, cookie_scan_result,
-            final_score_norm, final_score_privacy, final_score_security,
-            final_score_rand, final_score_adver, duration, timestamp
-        FROM logs
-        ORDER BY timestamp DESC
-    ''')
-    rows = cursor.fetchall()
-    conn.close()
+# insert_log's name/result pairs follow the old logs columns, not the registry
+_LOG_KEYS = [name[:-len("_scan_name")] for name in inspect.signature(insert_log).parameters
+             if name.endswith("_scan_name")]
+
+
+def scan_from_log(url, *fields):
+    """insert_log's positional arguments -> save_scan's (url, results, final_scores, duration)."""
+    pairs = fields[:2 * len(_LOG_KEYS)]
+    final_scores = tuple(fields[2 * len(_LOG_KEYS):-1])
+    if len(final_scores) != len(FINAL_SCORES):
+        raise TypeError(f"expected {2 * len(_LOG_KEYS) + len(FINAL_SCORES) + 2} arguments")
+    results = [(key, pairs[2 * i], *split_result(pairs[2 * i + 1]))
+               for i, key in enumerate(_LOG_KEYS)]
+    return url, results, final_scores, fields[-1]
+
+
+def save_scan(url, results, final_scores, duration):
+    """
+    Store one scan of *url*.
+
+    results      -- [(scanner key, scanner name, score, details), ...]; a key
+                    not seen before simply adds a scanner
+    final_scores -- the five values named in FINAL_SCORES
+    """
+    save_scans([(url, results, final_scores, duration)])
+
+
+def save_scans(scans):
+    """Store several save_scan() argument tuples in one transaction."""
+    with _connections.transaction(DB_FILE) as conn:
+        cursor = conn.cursor()
+        for url, results, final_scores, duration in scans:
+            _save_scan(cursor, url, results, final_scores, duration)
+
+
+def _save_scan(cursor, url, results, final_scores, duration):
+    cursor.execute(f'''
+        INSERT INTO urls (url, host, {', '.join(FINAL_SCORES)}, duration)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (url) DO UPDATE SET
+            final_score_norm     = excluded.final_score_norm,
+            final_score_privacy  = excluded.final_score_privacy,
+            final_score_security = excluded.final_score_security,
+            final_score_rand     = excluded.final_score_rand,
+            final_score_adver    = excluded.final_score_adver,
+            duration             = excluded.duration,
+            timestamp            = CURRENT_TIMESTAMP
+    ''', (url, _host(url), *final_scores, duration))
+    url_id = cursor.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()[0]
+
+    cursor.executemany('''
+        INSERT INTO scanners (key, name) VALUES (?, ?)
+        ON CONFLICT (key) DO UPDATE SET name = excluded.name WHERE name != excluded.name
+    ''', [(key, name) for key, name, _, _ in results])
+    scanner_ids = dict(cursor.execute("SELECT key, id FROM scanners"))
+
+    cursor.executemany('''
+        INSERT INTO scan_results (url_id, scanner_id, score) VALUES (?, ?, ?)
+        ON CONFLICT (url_id, scanner_id) DO UPDATE SET
+            score      = excluded.score,
+            scanned_at = CURRENT_TIMESTAMP
+    ''', [(url_id, scanner_ids[key], score) for key, _, score, _ in results])
+
+    codec = details_codec()
+    cursor.executemany('''
+        INSERT OR REPLACE INTO scan_details (url_id, scanner_id, payload) VALUES (?, ?, ?)
+    ''', [(url_id, scanner_ids[key], codec.encode(details)) for key, _, _, details in results])
+
+    cursor.executemany('''
+        INSERT OR REPLACE INTO scan_history (url_id, scanned_at, scanner_id, score, scored_samples)
+        VALUES (?, CURRENT_TIMESTAMP, ?, ?, ?)
+    ''', [(url_id, scanner_ids[key], score, int(score is not None)) for key, _, score, _ in results])
+
+
+# One statement per read, so a page's summary and its results always come
+# from the same committed snapshot
+_LOGS_QUERY = f'''
+    SELECT u.id, u.url, {', '.join('u.' + c for c in FINAL_SCORES)}, u.duration, u.timestamp,
+           s.key, s.name, r.score, d.payload
+    FROM urls u
+    LEFT JOIN scan_results r ON r.url_id = u.id
+    LEFT JOIN scanners s ON s.id = r.scanner_id
+    LEFT JOIN scan_details d ON d.url_id = r.url_id AND d.scanner_id = r.scanner_id
+'''
+_ALL_LOGS_QUERY = _LOGS_QUERY + " ORDER BY u.timestamp DESC, u.id, s.id"
+_LOG_BY_URL_QUERY = _LOGS_QUERY + " WHERE u.url = ? ORDER BY s.id"
+_SUMMARY_WIDTH = 2 + len(FINAL_SCORES) + 2
+
+
+def record_for(url, results, final_scores, duration, timestamp):
+    """The get_log_by_url() dict for a scan that may not be stored yet."""
+    record = {'url': url}
+    for key, name, score, details in results:
+        record[f'{key}_scan_name'] = name
+        record[f'{key}_scan_result'] = format_result(score, details)
+    record.update(zip(FINAL_SCORES + ('duration', 'timestamp'),
+                      (*final_scores, duration, timestamp)))
+    return record
 
-    logs = []
+
+def _records(rows):
+    """Fold joined rows into the flat dicts the extension and logs page expect."""
+    codec = details_codec()
+    records = {}      # url id -> (record, summary columns after url)
     for row in rows:
-        logs.append({
-            'url':                              row[0],
-            'xss_scan_name':                    row[1],
-            'xss_scan_result':                  row[2],
-            'vuln_scan_name':                   row[3],
-            'vuln_scan_result':                 row[4],
-            'privacy_tracker_scan_name':        row[5],
-            'privacy_tracker_scan_result':      row[6],
-            'privacy_third_party_script_scan_name': row[7],
-            'privacy_third_party_script_scan_result': row[8],
-            'ssl_scan_name':                    row[9],
-            'ssl_scan_result':                  row[10],
-            'sql_scan_name':                    row[11],
-            'sql_scan_result':                  row[12],
-            'headers_scan_name':                row[13],
-            'headers_scan_result':              row[14],
-            'privacy_audit_scan_name':          row[15],
-            'privacy_audit_scan_result':        row[16],
-            'performance_scan_name':            row[17],
-            'performance_scan_result':          row[18],
-            'outdated_scan_name':               row[19],
-            'outdated_scan_result':             row[20],
-            'mixed_scan_name':                  row[21],
-            'mixed_scan_result':                row[22],
-            'directory_scan_name':              row[23],
-            'directory_scan_result':            row[24],
-            'csrf_scan_name':                   row[25],
-            'csrf_scan_result':                 row[26],
-            'csp_scan_name':                    row[27],
-            'csp_scan_result':                  row[28],
-            'https_scan_name':                  row[29],
-            'https_scan_result':                row[30],
-            'third_party_data_collection_scan_name': row[31],
-            'third_party_data_collection_scan_result': row[32],
-            'tracker_detection_scan_name':      row[33],
-            'tracker_detection_scan_result':    row[34],
-            'fingerprinting_scan_name':         row[35],
-            'fingerprinting_scan_result':       row[36],
-            'referrer_dnt_scan_name':           row[37],
-            'referrer_dnt_scan_result':         row[38],
-            'dnt_scan_name':                    row[39],
-            'dnt_scan_result':                  row[40],
-            'data_leakage_scan_name':           row[41],
-            'data_leakage_scan_result':         row[42],
-            'cookie_scan_name':                 row[43],
-            'cookie_scan_result':               row[44],
-            'final_score_norm':                 row[45],
-            'final_score_privacy':              row[46],
-            'final_score_security':             row[47],
-            'final_score_rand':                 row[48],
-            'final_score_adver':                row[49],
-            'duration':                         row[50],
-            'timestamp':                        row[51],
-        })
-    return logs
+        url_id, url, *tail = row[:_SUMMARY_WIDTH]
+        if url_id not in records:
+            records[url_id] = ({'url': url}, tail)
+        record = records[url_id][0]
+        key, name, score, payload = row[_SUMMARY_WIDTH:]
+        if key is not None:
+            details = codec.decode(payload)
+            record[f'{key}_scan_name'] = name
+            record[f'{key}_scan_result'] = format_result(score, details)
+    out = []
+    for record, tail in records.values():
+        record.update(zip(FINAL_SCORES + ('duration', 'timestamp'), tail))
+        out.append(record)
+    return out
+
+
+def get_all_logs():
+    """Retrieve all log entries (most recent first), including duration."""
+    return _records(_connections.connection(DB_FILE).execute(_ALL_LOGS_QUERY))
 
 
 def get_log_by_url(url):
     """Retrieve a single log entry by URL, including duration."""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT
-            url,
-            xss_scan_name, xss_scan_result,
-            vuln_scan_name, vuln_scan_result,
-            privacy_tracker_scan_name, privacy_tracker_scan_result,
-            privacy_third_party_script_scan_name, privacy_third_party_script_scan_result,
-            ssl_scan_name, ssl_scan_result,
-            sql_scan_name, sql_scan_result,
-            headers_scan_name, headers_scan_result,
-            privacy_audit_scan_name, privacy_audit_scan_result,
-            performance_scan_name, performance_scan_result,
-            outdated_scan_name, outdated_scan_result,
-            mixed_scan_name, mixed_scan_result,
-            directory_scan_name, directory_scan_result,
-            csrf_scan_name, csrf_scan_result,
-            csp_scan_name, csp_scan_result,
-            https_scan_name, https_scan_result,
-            third_party_data_collection_scan_name, third_party_data_collection_scan_result,
-            tracker_detection_scan_name, tracker_detection_scan_result,
-            fingerprinting_scan_name, fingerprinting_scan_result,
-            referrer_dnt_scan_name, referrer_dnt_scan_result,
-            dnt_scan_name, dnt_scan_result,
-            data_leakage_scan_name, data_leakage_scan_result,
-            cookie_scan_name, cookie_scan_result,
-            final_score_norm, final_score_privacy, final_score_security,
-            final_score_rand, final_score_adver, duration, timestamp
-        FROM logs WHERE url = ?
-    ''', (url,))
-    row = cursor.fetchone()
-    conn.close()
-
-    if not row:
-        return None
+    records = _records(_connections.connection(DB_FILE).execute(_LOG_BY_URL_QUERY, (url,)))
+    return records[0] if records else None
+
+
+# --------------------------------------------------------------------------- #
+# Paged listing
+# --------------------------------------------------------------------------- #
+# sort name -> urls column; each has an index, and id breaks ties
+LOG_SORTS = {
+    "timestamp": "timestamp",
+    "score":     "final_score_norm",
+    "privacy":   "final_score_privacy",
+    "security":  "final_score_security",
+    "duration":  "duration",
+}
+LOG_PAGE_SIZE = 50
+MAX_LOG_PAGE_SIZE = 500
+
+# only what the logs page shows
+_LIST_COLUMNS = f"id, url, {', '.join(FINAL_SCORES)}, duration, timestamp"
+_LIST_FIELDS = ('url',) + FINAL_SCORES + ('duration', 'timestamp')
+
+
+def encode_cursor(value, row_id):
+    raw = json.dumps([value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+    if not isinstance(row_id, int):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return value, row_id
+
+
+def log_filters(domain=None, min_score=None, max_score=None, scanner=None):
+    """WHERE clauses and parameters shared by list_logs and the exports."""
+    where, params = [], {}
+    if domain:
+        # the domain itself or any subdomain of it
+        domain = domain.lower().strip('.')
+        where.append("(host = :domain OR substr(host, -length(:dot_domain)) = :dot_domain)")
+        params.update(domain=domain, dot_domain='.' + domain)
+    if scanner is None:
+        # score range applies to the overall (normal-weighting) score
+        if min_score is not None:
+            where.append("final_score_norm >= :min_score")
+        if max_score is not None:
+            where.append("final_score_norm <= :max_score")
+    else:
+        # ... or to the named scanner's own score
+        scanner_where = ["r.url_id = urls.id", "s.key = :scanner"]
+        if min_score is not None:
+            scanner_where.append("r.score >= :min_score")
+        if max_score is not None:
+            scanner_where.append("r.score <= :max_score")
+        where.append("EXISTS (SELECT 1 FROM scan_results r JOIN scanners s ON s.id = r.scanner_id"
+                     f" WHERE {' AND '.join(scanner_where)})")
+        params['scanner'] = scanner
+    params.update(min_score=min_score, max_score=max_score)
+    return where, params
+
+
+def list_logs(limit=LOG_PAGE_SIZE, cursor=None, domain=None, min_score=None, max_score=None,
+              scanner=None, sort="timestamp", descending=True):
+    """
+    One page of log summaries and the cursor for the next page (None on the
+    last page).  Paging is keyset-based – (sort column, id) of the last row
+    seen – so every page costs the same however deep it is.
+    """
+    if sort not in LOG_SORTS:
+        raise ValueError(f"Unknown sort {sort!r}; expected one of {', '.join(LOG_SORTS)}")
+    column = LOG_SORTS[sort]
+    limit = max(1, min(int(limit), MAX_LOG_PAGE_SIZE))
+    where, params = log_filters(domain, min_score, max_score, scanner)
+    if cursor:
+        params['after_value'], params['after_id'] = decode_cursor(cursor)
+        where.append(f"({column}, id) {'<' if descending else '>'} (:after_value, :after_id)")
+    direction = "DESC" if descending else "ASC"
+    params['limit'] = limit + 1
+    rows = _connections.connection(DB_FILE).execute(
+        f"SELECT {_LIST_COLUMNS}, {column} FROM urls"
+        f"{' WHERE ' + ' AND '.join(where) if where else ''}"
+        f" ORDER BY {column} {direction}, id {direction} LIMIT :limit",
+        params,
+    ).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-1], rows[-1][0])
+    return [dict(zip(_LIST_FIELDS, row[1:-1])) for row in rows], next_cursor
+
+
+# --------------------------------------------------------------------------- #
+# Score history
+# --------------------------------------------------------------------------- #
+# retention – every scan is kept for HISTORY_RAW_DAYS, then one averaged row
+# per day until HISTORY_DAILY_DAYS, then one per (Monday-based) week
+HISTORY_RAW_DAYS = 30
+HISTORY_DAILY_DAYS = 180
+
+# Folds the rows of one resolution older than :cutoff into buckets of the
+# next.  Means are weighted by scored_samples – samples without a score
+# (e.g. incomplete scans) count towards samples but not the mean – which
+# keeps repeated compactions exact
+_ROLLUP = '''
+    INSERT INTO scan_history (url_id, scanned_at, scanner_id, resolution, score, samples, scored_samples)
+    SELECT url_id, {bucket}, scanner_id, :to,
+           SUM(score * scored_samples) / NULLIF(SUM(scored_samples), 0),
+           SUM(samples), SUM(scored_samples)
+    FROM scan_history
+    WHERE resolution = :from AND scanned_at < :cutoff
+    GROUP BY url_id, {bucket}, scanner_id
+    ON CONFLICT (url_id, scanned_at, scanner_id, resolution) DO UPDATE SET
+        score          = (COALESCE(score * scored_samples, 0)
+                          + COALESCE(excluded.score * excluded.scored_samples, 0))
+                         / NULLIF(scored_samples + excluded.scored_samples, 0),
+        samples        = samples + excluded.samples,
+        scored_samples = scored_samples + excluded.scored_samples
+'''
+_DAY = "datetime(date(scanned_at))"
+_WEEK = "datetime(date(scanned_at, '-6 days', 'weekday 1'))"
+
+
+def compact_history(now=None, raw_days=HISTORY_RAW_DAYS, daily_days=HISTORY_DAILY_DAYS):
+    """Roll old raw history into daily rows and old daily rows into weekly ones."""
+    now = now or "now"
+    with _connections.transaction(DB_FILE) as conn:
+        # cut-offs on bucket boundaries, so a bucket is only ever rolled up whole
+        day_cutoff, week_cutoff = conn.execute(
+            "SELECT datetime(date(:now, :raw)), datetime(date(:now, :daily, '-6 days', 'weekday 1'))",
+            {"now": now, "raw": f"-{raw_days} days", "daily": f"-{daily_days} days"},
+        ).fetchone()
+        for source, target, bucket, cutoff in (("raw", "day", _DAY, day_cutoff),
+                                               ("day", "week", _WEEK, week_cutoff)):
+            params = {"from": source, "to": target, "cutoff": cutoff}
+            conn.execute(_ROLLUP.format(bucket=bucket), params)
+            conn.execute(
+                "DELETE FROM scan_history WHERE resolution = :from AND scanned_at < :cutoff",
+                params,
+            )
+
+
+_TREND_QUERY = '''
+    SELECT h.scanned_at, h.resolution, h.samples, s.key, h.score
+    FROM scan_history h JOIN scanners s ON s.id = h.scanner_id
+    WHERE h.url_id = (SELECT id FROM urls WHERE url = :url)
+      AND h.scanned_at >= datetime(:since) AND h.scanned_at < datetime(:until)
+'''
+
+
+def get_trend(url, since=None, until=None, scanner=None):
+    """
+    Score history for *url*, oldest first, optionally within [since, until)
+    (ISO dates or datetimes) and for one scanner key:
+    [{'scanned_at', 'resolution', 'samples', 'scores': {scanner key: score}}, ...]
+    """
+    query = _TREND_QUERY
+    params = {"url": url, "since": since or "0001-01-01", "until": until or "9999-12-31"}
+    if scanner is not None:
+        query += " AND s.key = :scanner"
+        params["scanner"] = scanner
+    query += " ORDER BY h.scanned_at"
 
-    return {
-        'url':                              row[0],
-        'xss_scan_name':                    row[1],
-        'xss_scan_result':                  row[2],
-        'vuln_scan_name':                   row[3],
-        'vuln_scan_result':                 row[4],
-        'privacy_tracker_scan_name':        row[5],
-        'privacy_tracker_scan_result':      row[6],
-        'privacy_third_party_script_scan_name': row[7],
-        'privacy_third_party_script_scan_result': row[8],
-        'ssl_scan_name':                    row[9],
-        'ssl_scan_result':                  row[10],
-        'sql_scan_name':                    row[11],
-        'sql_scan_result':                  row[12],
-        'headers_scan_name':                row[13],
-        'headers_scan_result':              row[14],
-        'privacy_audit_scan_name':          row[15],
-        'privacy_audit_scan_result':        row[16],
-        'performance_scan_name':            row[17],
-        'performance_scan_result':          row[18],
-        'outdated_scan_name':               row[19],
-        'outdated_scan_result':             row[20],
-        'mixed_scan_name':                  row[21],
-        'mixed_scan_result':                row[22],
-        'directory_scan_name':              row[23],
-        'directory_scan_result':            row[24],
-        'csrf_scan_name':                   row[25],
-        'csrf_scan_result':                 row[26],
-        'csp_scan_name':                    row[27],
-        'csp_scan_result':                  row[28],
-        'https_scan_name':                  row[29],
-        'https_scan_result':                row[30],
-        'third_party_data_collection_scan_name': row[31],
-        'third_party_data_collection_scan_result': row[32],
-        'tracker_detection_scan_name':      row[33],
-        'tracker_detection_scan_result':    row[34],
-        'fingerprinting_scan_name':         row[35],
-        'fingerprinting_scan_result':       row[36],
-        'referrer_dnt_scan_name':           row[37],
-        'referrer_dnt_scan_result':         row[38],
-        'dnt_scan_name':                    row[39],
-        'dnt_scan_result':                  row[40],
-        'data_leakage_scan_name':           row[41],
-        'data_leakage_scan_result':         row[42],
-        'cookie_scan_name':                 row[43],
-        'cookie_scan_result':               row[44],
-        'final_score_norm':                 row[45],
-        'final_score_privacy':              row[46],
-        'final_score_security':             row[47],
-        'final_score_rand':                 row[48],
-        'final_score_adver':                row[49],
-        'duration':                         row[50],
-        'timestamp':                        row[51],
-    }
+    points = {}
+    for scanned_at, resolution, samples, key, score in \
+            _connections.connection(DB_FILE).execute(query, params):
+        point = points.get((scanned_at, resolution))
+        if point is None:
+            point = points[(scanned_at, resolution)] = {
+                'scanned_at': scanned_at, 'resolution': resolution,
+                'samples': samples, 'scores': {},
+            }
+        point['samples'] = max(point['samples'], samples)
+        point['scores'][key] = score
+    return list(points.values())
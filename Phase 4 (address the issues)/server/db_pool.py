@@ -0,0 +1,97 @@
+# db_pool.py
+
+"""
+Per-thread SQLite connections for database.py.
+
+Opening a connection for every query re-reads the schema, throws away the
+page cache and the prepared-statement cache, and – in the default rollback
+journal mode – lets a writer block every reader.  The
+:class:`ConnectionManager` instead keeps one long-lived connection per
+(thread, database file), each configured once with:
+
+  • WAL journal mode: readers see the last committed snapshot and never
+    wait for the writer (nor it for them)
+  • synchronous=NORMAL: safe in WAL mode, no fsync on every commit
+  • a larger page cache and memory-mapped reads
+  • a statement cache, so the fixed SQL in database.py is prepared once
+    per connection and reused
+
+Connections are only ever used by the thread that opened them; they are
+created with ``check_same_thread=False`` purely so :meth:`close` can shut
+them all down from the shutdown handler.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+# defaults – tweak per deployment
+BUSY_TIMEOUT_MS = 5000                 # a second writer waits rather than fails
+CACHE_SIZE_KIB = 16 * 1024             # per connection
+MMAP_SIZE = 256 * 1024 * 1024
+CACHED_STATEMENTS = 256
+
+PRAGMAS = (
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA cache_size = -{CACHE_SIZE_KIB}",
+    f"PRAGMA mmap_size = {MMAP_SIZE}",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+
+
+def enable_wal(conn: sqlite3.Connection) -> str:
+    """Switch the database file to WAL (persistent); returns the mode in effect."""
+    return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+
+
+def configure(conn: sqlite3.Connection) -> sqlite3.Connection:
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionManager:
+    """One configured connection per thread and database file."""
+
+    def __init__(self, cached_statements: int = CACHED_STATEMENTS):
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def connection(self, db_file: str) -> sqlite3.Connection:
+        """This thread's connection to *db_file* (opened on first use)."""
+        conns: Dict[str, sqlite3.Connection] = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get(db_file)
+        if conn is None:
+            conn = sqlite3.connect(db_file, check_same_thread=False,
+                                   cached_statements=self.cached_statements)
+            configure(conn)
+            conns[db_file] = conn
+            with self._lock:
+                self._all.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self, db_file: str) -> Iterator[sqlite3.Connection]:
+        """This thread's connection; commits on success, rolls back on error."""
+        conn = self.connection(db_file)
+        with conn:
+            yield conn
+
+    def close(self) -> None:
+        """Close every connection this manager opened, in any thread."""
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            conn.close()
+        # threads that come back later must reopen
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return len(self._all)
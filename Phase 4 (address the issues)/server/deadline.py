@@ -0,0 +1,56 @@
+# deadline.py
+
+"""
+End-to-end time budget for one scan.
+
+:func:`deadline_scope` sets the moment all of a scan's work must be over
+in a context variable.  asyncio copies the context into every task the
+scan starts, so the budget reaches each stage and scanner without being
+passed along, and the network layers (``async_http``, ``tls_probe``)
+:func:`clamp` their own timeouts to it: no request outlives the scan that
+made it.
+
+Outside a scope there is no deadline and :func:`clamp` returns timeouts
+unchanged, so command-line use and the tests are unaffected.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("scan_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The scan's budget ran out before this call could start."""
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[float]:
+    """Give work started inside the block *seconds* to finish (a tighter outer deadline wins)."""
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current scope, or None outside one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def clamp(timeout: float) -> float:
+    """*timeout*, shortened to what is left of the budget; raises once it has run out."""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("scan deadline exceeded")
+    return min(timeout, left)
@@ -0,0 +1,148 @@
+# detail_codec.py
+
+"""
+Compression for scan detail text.
+
+Scanner details are short and extremely repetitive ("Missing
+X-Frame-Options (−2)", "No CSP header found. Major security risk!").
+Compressed one at a time they barely shrink; compressed against a
+dictionary of typical findings they shrink to a few bytes of references.
+
+Every payload carries a 3-byte header – codec, then the id of the
+dictionary it was compressed with – so dictionaries can be retrained
+without rewriting old rows:
+
+    RAW   utf-8 text, for details too short to be worth compressing
+    ZLIB  raw deflate with a preset dictionary (standard library)
+    ZSTD  zstd with a trained dictionary, when ``zstandard`` is installed
+
+:func:`train` builds a dictionary from sample details: a real zstd
+dictionary when ``zstandard`` is available, otherwise a zlib preset
+dictionary made of the most frequent findings.
+"""
+
+import struct
+import threading
+import zlib
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:        # optional: zlib is used instead
+    zstandard = None
+
+RAW, ZLIB, ZSTD = 0, 1, 2
+CODEC_NAMES = {RAW: "raw", ZLIB: "zlib", ZSTD: "zstd"}
+
+MIN_COMPRESS = 48                 # bytes; shorter details are stored as-is
+ZLIB_DICT_SIZE = 32 * 1024        # deflate's window – larger is ignored
+ZSTD_DICT_SIZE = 64 * 1024
+ZSTD_LEVEL = 9
+
+_HEADER = struct.Struct(">BH")    # codec, dictionary id (0 = none)
+
+
+def default_codec() -> int:
+    return ZSTD if zstandard is not None else ZLIB
+
+
+def train(samples: Iterable[str], codec: Optional[int] = None) -> Tuple[int, bytes]:
+    """(codec, dictionary bytes) trained on *samples*."""
+    codec = default_codec() if codec is None else codec
+    samples = [s for s in samples if s]
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd dictionaries need the 'zstandard' package")
+        trained = zstandard.train_dictionary(ZSTD_DICT_SIZE, [s.encode() for s in samples])
+        return ZSTD, trained.as_bytes()
+    # deflate matches against the *end* of the preset dictionary most
+    # cheaply, so the most common findings go last
+    counts = Counter(part for s in samples for part in s.split("; "))
+    out, size = [], 0
+    for part, _ in counts.most_common():
+        chunk = part.encode() + b"; "
+        if size + len(chunk) > ZLIB_DICT_SIZE:
+            break
+        out.append(chunk)
+        size += len(chunk)
+    return ZLIB, b"".join(reversed(out))
+
+
+class DetailCodec:
+    """Encodes with the newest dictionary; decodes with whichever one a payload names."""
+
+    def __init__(self, load_dictionary: Callable[[int], Tuple[int, bytes]]):
+        # load_dictionary(id) -> (codec, bytes); used for ids not seen yet
+        self._load = load_dictionary
+        self._dicts: Dict[int, Tuple[int, bytes]] = {}
+        self._zstd_dicts: Dict[int, object] = {}
+        # zstandard (de)compressors must not be shared between threads, and
+        # this codec is (async_db's readers and its writer): one pair per thread
+        self._local = threading.local()
+        self.active: int = 0          # dictionary id new payloads use
+
+    def use(self, dict_id: int, codec: int, data: bytes) -> None:
+        """Register a dictionary and compress new details with it."""
+        self._dicts[dict_id] = (codec, data)
+        self.active = dict_id
+
+    def _dictionary(self, dict_id: int) -> Tuple[int, bytes]:
+        entry = self._dicts.get(dict_id)
+        if entry is None:
+            entry = self._dicts[dict_id] = self._load(dict_id)
+        return entry
+
+    def _zstd_pair(self, dict_id: int):
+        pairs = getattr(self._local, "zstd", None)
+        if pairs is None:
+            pairs = self._local.zstd = {}
+        pair = pairs.get(dict_id)
+        if pair is None:
+            if zstandard is None:
+                raise RuntimeError("zstd-compressed details need the 'zstandard' package")
+            kwargs = {}
+            if dict_id:
+                zdict = self._zstd_dicts.get(dict_id)
+                if zdict is None:
+                    zdict = self._zstd_dicts[dict_id] = \
+                        zstandard.ZstdCompressionDict(self._dictionary(dict_id)[1])
+                kwargs["dict_data"] = zdict
+            pair = pairs[dict_id] = (zstandard.ZstdCompressor(level=ZSTD_LEVEL, **kwargs),
+                                     zstandard.ZstdDecompressor(**kwargs))
+        return pair
+
+    # ---- encode ----------------------------------------------------------- #
+    def encode(self, text: str) -> bytes:
+        raw = text.encode()
+        if len(raw) < MIN_COMPRESS:
+            return _HEADER.pack(RAW, 0) + raw
+        dict_id = self.active
+        codec = self._dictionary(dict_id)[0] if dict_id else default_codec()
+        if codec == ZSTD:
+            body = self._zstd_pair(dict_id)[0].compress(raw)
+        else:
+            zdict = self._dictionary(dict_id)[1] if dict_id else b""
+            comp = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=zdict) if zdict \
+                else zlib.compressobj(9, zlib.DEFLATED, -15)
+            body = comp.compress(raw) + comp.flush()
+        if len(body) >= len(raw):
+            return _HEADER.pack(RAW, 0) + raw
+        return _HEADER.pack(codec, dict_id) + body
+
+    # ---- decode ----------------------------------------------------------- #
+    def decode(self, payload) -> str:
+        """Text for a stored payload (plain str values pass straight through)."""
+        if payload is None or isinstance(payload, str):
+            return payload
+        codec, dict_id = _HEADER.unpack_from(payload)
+        body = bytes(payload[_HEADER.size:])
+        if codec == RAW:
+            return body.decode()
+        if codec == ZSTD:
+            return self._zstd_pair(dict_id)[1].decompress(body).decode()
+        if codec == ZLIB:
+            zdict = self._dictionary(dict_id)[1] if dict_id else b""
+            decomp = zlib.decompressobj(-15, zdict=zdict) if zdict else zlib.decompressobj(-15)
+            return (decomp.decompress(body) + decomp.flush()).decode()
+        raise ValueError(f"Unknown detail codec {codec}")
@@ -0,0 +1,226 @@
+# export_logs.py
+
+"""
+Streaming export of stored scans as CSV, NDJSON or Parquet.
+
+Rows come straight off a SQLite cursor in ``fetchmany`` batches and are
+encoded batch by batch, so an export of millions of scans runs in constant
+memory – both behind ``GET /logs/export`` and from the command line:
+
+    python export_logs.py --format csv --domain example.com > scans.csv
+    python export_logs.py --format parquet -o scans.parquet
+
+Each row is one URL: its summary (final scores, duration, timestamp) and
+one ``<scanner>_score`` column per scanner, plus ``<scanner>_details``
+with ``--details``.  Filters are the ones the /logs listing takes.
+
+Parquet needs ``pyarrow``; CSV and NDJSON use only the standard library.
+"""
+
+import csv
+import io
+import json
+import sqlite3
+from typing import Any, Dict, Iterator, List, Sequence
+
+import database
+from db_pool import configure
+
+FORMATS = ("csv", "ndjson", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+BATCH_ROWS = 1000              # URLs encoded per chunk / Parquet row group
+
+_SUMMARY = ("url", "host") + database.FINAL_SCORES + ("duration", "timestamp")
+
+
+def _open():
+    # its own connection: a streaming response may resume the generator on
+    # a different worker thread each time, and holds the read open for long
+    return configure(sqlite3.connect(database.DB_FILE, check_same_thread=False))
+
+
+def columns(scanner_keys: Sequence[str], details: bool = False) -> List[str]:
+    out = list(_SUMMARY)
+    for key in scanner_keys:
+        out.append(f"{key}_score")
+        if details:
+            out.append(f"{key}_details")
+    return out
+
+
+def iter_rows(details: bool = False, batch_rows: int = BATCH_ROWS,
+              **filters) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield lists of up to *batch_rows* flat row dicts, keyed by columns()
+    in that order.  *filters* are list_logs' domain / min_score /
+    max_score / scanner.
+    """
+    conn = _open()
+    try:
+        keys = [key for (key,) in conn.execute("SELECT key FROM scanners ORDER BY id")]
+        where, params = database.log_filters(**filters)
+        # the urls filter runs first; results follow in (url_id, scanner_id)
+        # primary-key order, so consecutive rows belong to the same URL
+        # detail payloads are only joined (and decompressed) when asked for
+        cursor = conn.execute(f'''
+            SELECT u.id, {', '.join('u.' + c for c in _SUMMARY)}, s.key, r.score
+                   {', d.payload' if details else ''}
+            FROM (SELECT * FROM urls{' WHERE ' + ' AND '.join(where) if where else ''}) u
+            JOIN scan_results r ON r.url_id = u.id
+            JOIN scanners s ON s.id = r.scanner_id
+            {'LEFT JOIN scan_details d ON d.url_id = r.url_id AND d.scanner_id = r.scanner_id'
+             if details else ''}
+            ORDER BY u.id, r.scanner_id
+        ''', params)
+        codec = database.details_codec() if details else None
+
+        header = columns(keys, details)
+        batch: List[Dict[str, Any]] = []
+        current_id, row_out = None, None
+        while True:
+            fetched = cursor.fetchmany(batch_rows)
+            if not fetched:
+                break
+            for url_id, *rest in fetched:
+                summary, result = rest[:len(_SUMMARY)], rest[len(_SUMMARY):]
+                if url_id != current_id:
+                    if row_out is not None:
+                        batch.append(row_out)
+                        if len(batch) >= batch_rows:
+                            yield batch
+                            batch = []
+                    current_id = url_id
+                    row_out = dict.fromkeys(header)
+                    row_out.update(zip(_SUMMARY, summary))
+                row_out[f"{result[0]}_score"] = result[1]
+                if details:
+                    row_out[f"{result[0]}_details"] = codec.decode(result[2])
+        if row_out is not None:
+            batch.append(row_out)
+        if batch:
+            yield batch
+    finally:
+        conn.close()
+
+
+def scanner_keys() -> List[str]:
+    conn = _open()
+    try:
+        return [key for (key,) in conn.execute("SELECT key FROM scanners ORDER BY id")]
+    finally:
+        conn.close()
+
+
+# --------------------------------------------------------------------------- #
+# Encoders – each yields bytes chunks
+# --------------------------------------------------------------------------- #
+def _csv(batches, header) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=header)
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def _ndjson(batches, header) -> Iterator[bytes]:
+    for batch in batches:
+        yield "".join(json.dumps(row) + "\n" for row in batch).encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since last asked."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        out, self._chunks = b"".join(self._chunks), []
+        return out
+
+
+def _parquet(batches, header) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (name, pa.string() if name in ("url", "host", "timestamp") or name.endswith("_details")
+         else pa.float64())
+        for name in header
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_ENCODERS = {"csv": _csv, "ndjson": _ndjson, "parquet": _parquet}
+
+
+def check_format(fmt: str) -> None:
+    """ValueError for an unknown format, ImportError if its library is missing."""
+    if fmt not in _ENCODERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if fmt == "parquet":
+        import pyarrow.parquet  # noqa: F401
+
+
+def export(fmt: str, details: bool = False, **filters) -> Iterator[bytes]:
+    """The whole export as a stream of bytes chunks; nothing is read until iterated."""
+    check_format(fmt)
+    return _stream(fmt, details, filters)
+
+
+def _stream(fmt, details, filters):
+    header = columns(scanner_keys(), details)
+    yield from _ENCODERS[fmt](iter_rows(details=details, **filters), header)
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Export stored scans without loading them into memory.")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    parser.add_argument("--db", default=database.DB_FILE, help="SQLite database file")
+    parser.add_argument("--domain")
+    parser.add_argument("--scanner", help="apply the score range to this scanner")
+    parser.add_argument("--min-score", type=float)
+    parser.add_argument("--max-score", type=float)
+    parser.add_argument("--details", action="store_true", help="include each scanner's details")
+    args = parser.parse_args()
+
+    database.DB_FILE = args.db
+    try:
+        chunks = export(args.format, details=args.details, domain=args.domain,
+                        scanner=args.scanner, min_score=args.min_score, max_score=args.max_score)
+    except ImportError as exc:
+        parser.error(f"{args.format} export needs an extra package: {exc}")
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
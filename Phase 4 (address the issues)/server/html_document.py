@@ -0,0 +1,340 @@
+# html_document.py
+
+"""
+Parse-once HTML document shared by the scanners.
+
+Most analyzers only look at a handful of tag types, so instead of each one
+building its own ``BeautifulSoup`` tree we parse the page a single time and
+keep flat, read-only indexes of the interesting elements:
+
+  • scripts        – every <script>, in document order
+  • links / imgs / iframes / metas
+  • resources      – <script>, <img>, <iframe>, <link> in document order
+  • forms          – each <form> with its hidden <input>s attached
+  • with_src / with_href – any element carrying that attribute
+
+Scanner helpers accept either raw markup or a :class:`ParsedDocument`
+(see :func:`as_document`), so they can still be called with plain HTML.
+
+Parsing goes through a pluggable backend.  The C-accelerated parsers
+(selectolax, then lxml) are used when installed; otherwise we use the
+"stream" backend, a stdlib tokenizer that emits only the indexed tags in a
+single pass without building a tree.  BeautifulSoup's ``html.parser`` is
+kept as the reference implementation.  All backends must produce the same
+indexes – see server_tests/html_backend_conformance_test.py.
+"""
+
+import importlib
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import (Callable, Dict, Iterable, Iterator, List, Mapping,
+                    Optional, Tuple, Union)
+
+from bs4 import BeautifulSoup
+
+# Tags that get their own index.
+_INDEXED_TAGS = ("script", "link", "img", "iframe", "form", "meta")
+_RESOURCE_TAGS = ("script", "img", "iframe", "link")
+
+
+@dataclass(frozen=True)
+class Element:
+    """One indexed tag: name, attributes and (for scripts) its text."""
+    name: str
+    attrs: Mapping[str, str] = field(default_factory=dict)
+    text: Optional[str] = None
+    inputs: Tuple["Element", ...] = ()   # hidden <input>s, forms only
+
+    def get(self, key: str, default=None):
+        return self.attrs.get(key, default)
+
+    def has_attr(self, key: str) -> bool:
+        return key in self.attrs
+
+    def __getitem__(self, key: str) -> str:
+        return self.attrs[key]
+
+
+@dataclass(frozen=True)
+class ParsedDocument:
+    """Flat tag indexes for one HTML page."""
+    scripts: Tuple[Element, ...] = ()
+    links: Tuple[Element, ...] = ()
+    imgs: Tuple[Element, ...] = ()
+    iframes: Tuple[Element, ...] = ()
+    forms: Tuple[Element, ...] = ()
+    metas: Tuple[Element, ...] = ()
+    resources: Tuple[Element, ...] = ()
+    with_src: Tuple[Element, ...] = ()
+    with_href: Tuple[Element, ...] = ()
+
+    @property
+    def inline_scripts(self) -> Tuple[Element, ...]:
+        """<script> tags with no (or an empty) src attribute."""
+        return tuple(s for s in self.scripts if not s.get("src"))
+
+    @property
+    def external_scripts(self) -> Tuple[Element, ...]:
+        """<script> tags that carry a src attribute."""
+        return tuple(s for s in self.scripts if s.has_attr("src"))
+
+    def find_meta(self, name: str) -> Optional[Element]:
+        """First <meta name=...> matching *name* case-insensitively."""
+        wanted = name.lower()
+        for meta in self.metas:
+            if (meta.get("name") or "").lower() == wanted:
+                return meta
+        return None
+
+
+# --------------------------------------------------------------------------- #
+# Parser backends
+# --------------------------------------------------------------------------- #
+# Each backend walks the page once and yields Elements in document order;
+# _build() then sorts them into the indexes.  Backends are tried in
+# _PREFERENCE order and the first one whose library imports is the default.
+
+def _wanted(name: str, attrs) -> bool:
+    return name in _INDEXED_TAGS or "src" in attrs or "href" in attrs
+
+
+def _attrs(tag) -> dict:
+    """Flatten bs4's multi-valued attributes (class, rel, ...) to strings."""
+    return {
+        k: " ".join(v) if isinstance(v, list) else v
+        for k, v in tag.attrs.items()
+    }
+
+
+def _walk_soup(soup) -> Iterator[Element]:
+    for tag in soup.find_all(True):
+        name = tag.name
+        if not _wanted(name, tag.attrs):
+            continue
+        if name == "script":
+            yield Element(name, _attrs(tag), tag.string)
+        elif name == "form":
+            hidden = tuple(Element("input", _attrs(inp))
+                           for inp in tag.find_all("input", type="hidden"))
+            yield Element(name, _attrs(tag), inputs=hidden)
+        else:
+            yield Element(name, _attrs(tag))
+
+
+def _parse_html_parser(html: str) -> Iterator[Element]:
+    return _walk_soup(BeautifulSoup(html, "html.parser"))
+
+
+def _parse_lxml(html: str) -> Iterator[Element]:
+    import lxml.html
+
+    if not html.strip():
+        return
+    try:
+        root = lxml.html.document_fromstring(html)
+    except ValueError:
+        # e.g. a str carrying an XML encoding declaration
+        yield from _parse_html_parser(html)
+        return
+    for node in root.iter():
+        name = node.tag
+        if not isinstance(name, str):       # comments, processing instructions
+            continue
+        attrs = dict(node.attrib)
+        if not _wanted(name, attrs):
+            continue
+        if name == "script":
+            yield Element(name, attrs, node.text or None)
+        elif name == "form":
+            hidden = tuple(Element("input", dict(inp.attrib)) for inp in node.iter("input")
+                           if inp.get("type") == "hidden")
+            yield Element(name, attrs, inputs=hidden)
+        else:
+            yield Element(name, attrs)
+
+
+def _lexbor_attrs(node) -> dict:
+    # valueless attributes come back as None; bs4 gives ""
+    return {k: ("" if v is None else v) for k, v in node.attributes.items()}
+
+
+def _parse_selectolax(html: str) -> Iterator[Element]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    for node in tree.css("*"):
+        name = node.tag
+        attrs = _lexbor_attrs(node)
+        if not _wanted(name, attrs):
+            continue
+        if name == "script":
+            yield Element(name, attrs, node.text(deep=True) or None)
+        elif name == "form":
+            hidden = tuple(Element("input", a) for a in map(_lexbor_attrs, node.css("input"))
+                           if a.get("type") == "hidden")
+            yield Element(name, attrs, inputs=hidden)
+        else:
+            yield Element(name, attrs)
+
+
+class _TagExtractor(HTMLParser):
+    """
+    Single-pass tokenizer that keeps only the indexed elements.
+
+    No tree is built: tags we don't index are dropped as soon as they are
+    seen, so memory grows with the number of interesting tags rather than
+    with the size of the page.  Scripts and forms get a placeholder slot at
+    their start tag (to keep document order) that is filled in once their
+    text / hidden inputs are known.  Tag boundaries follow bs4's
+    html.parser tree builder, so the output matches that backend.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.slots: List[Optional[Element]] = []
+        self._script = None     # (slot, attrs, text chunks) while inside <script>
+        self._forms = []        # open forms: (slot, attrs, hidden inputs)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: ("" if v is None else v) for k, v in attrs}
+        if tag == "input" and attrs.get("type") == "hidden":
+            for _, _, hidden in self._forms:
+                hidden.append(Element("input", attrs))
+        if not _wanted(tag, attrs):
+            return
+        if tag == "script":
+            self._script = (len(self.slots), attrs, [])
+            self.slots.append(None)
+        elif tag == "form":
+            self._forms.append((len(self.slots), attrs, []))
+            self.slots.append(None)
+        else:
+            self.slots.append(Element(tag, attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script[2].append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._script is not None:
+            slot, attrs, chunks = self._script
+            self.slots[slot] = Element(tag, attrs, "".join(chunks) or None)
+            self._script = None
+        elif tag == "form" and self._forms:
+            slot, attrs, hidden = self._forms.pop()
+            self.slots[slot] = Element(tag, attrs, inputs=tuple(hidden))
+
+    def close(self):
+        super().close()
+        # anything left open runs to the end of the document
+        self.handle_endtag("script")
+        while self._forms:
+            self.handle_endtag("form")
+
+
+def _stream_elements(chunks: Iterable[str]) -> Iterator[Element]:
+    extractor = _TagExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+    extractor.close()
+    return iter(extractor.slots)
+
+
+def _parse_stream(html: str) -> Iterator[Element]:
+    return _stream_elements((html,))
+
+
+# name -> (module that must import, walker)
+_BACKENDS: Dict[str, Tuple[Optional[str], Callable[[str], Iterator[Element]]]] = {
+    "selectolax":  ("selectolax.lexbor", _parse_selectolax),
+    "lxml":        ("lxml.html", _parse_lxml),
+    "stream":      (None, _parse_stream),
+    "html.parser": (None, _parse_html_parser),
+}
+_PREFERENCE = ("selectolax", "lxml", "stream", "html.parser")
+
+
+def _importable(module: Optional[str]) -> bool:
+    if module is None:
+        return True
+    try:
+        importlib.import_module(module)
+    except ImportError:
+        return False
+    return True
+
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first."""
+    return [name for name in _PREFERENCE if _importable(_BACKENDS[name][0])]
+
+
+_backend = available_backends()[0]
+
+
+def get_backend() -> str:
+    """Name of the backend parse_document() uses by default."""
+    return _backend
+
+
+def set_backend(name: str) -> str:
+    """Switch the default backend; returns the previous one."""
+    global _backend
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name}")
+    if not _importable(_BACKENDS[name][0]):
+        raise ValueError(f"HTML parser backend not installed: {name}")
+    previous, _backend = _backend, name
+    return previous
+
+
+def _build(elements: Iterable[Element]) -> ParsedDocument:
+    buckets = {name: [] for name in _INDEXED_TAGS}
+    resources, with_src, with_href = [], [], []
+
+    for el in elements:
+        if el.name in buckets:
+            buckets[el.name].append(el)
+        if el.name in _RESOURCE_TAGS:
+            resources.append(el)
+        if "src" in el.attrs:
+            with_src.append(el)
+        if "href" in el.attrs:
+            with_href.append(el)
+
+    return ParsedDocument(
+        scripts=tuple(buckets["script"]),
+        links=tuple(buckets["link"]),
+        imgs=tuple(buckets["img"]),
+        iframes=tuple(buckets["iframe"]),
+        forms=tuple(buckets["form"]),
+        metas=tuple(buckets["meta"]),
+        resources=tuple(resources),
+        with_src=tuple(with_src),
+        with_href=tuple(with_href),
+    )
+
+
+def parse_document(html: str, backend: Optional[str] = None) -> ParsedDocument:
+    """Parse *html* once and build the tag indexes."""
+    walker = _BACKENDS[backend or _backend][1]
+    return _build(walker(html or ""))
+
+
+def parse_stream(chunks: Iterable[str]) -> ParsedDocument:
+    """
+    Build the indexes from HTML arriving in pieces (e.g. a streamed
+    response body) without ever holding a tree.
+    """
+    return _build(_stream_elements(chunks))
+
+
+def as_document(markup: Union[str, ParsedDocument, None]) -> ParsedDocument:
+    """Return *markup* unchanged if already parsed, otherwise parse it."""
+    if isinstance(markup, ParsedDocument):
+        return markup
+    return parse_document(markup or "")
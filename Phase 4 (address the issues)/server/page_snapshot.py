@@ -0,0 +1,133 @@
+# page_snapshot.py
+
+"""
+Single-fetch page snapshot shared by every passive scanner.
+
+Instead of each analyzer calling ``requests.get(url)`` on its own, the
+server fetches the page once into an immutable :class:`PageSnapshot` and
+hands that same object to every ``analyze(snapshot)`` entry point.
+
+The snapshot keeps everything the scanners look at:
+
+  • requested URL, final URL and redirect history
+  • status code, response headers and HTTP version
+  • raw ``Set-Cookie`` lines plus the parsed cookie objects
+  • body bytes and decoded text
+  • request timing
+
+Fetch failures are captured in ``snapshot.error`` rather than raised, so
+each analyzer can keep its own "could not fetch" wording.
+
+``snapshot.document`` parses the body on first use and caches it, so the
+page is parsed at most once however many analyzers ask for it.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional, Tuple
+
+from requests.structures import CaseInsensitiveDict
+
+from html_document import ParsedDocument, parse_document
+from transport import get_transport
+
+# Request headers for the shared fetch.  DNT is sent so the DNT scanners
+# can still see whether the server echoes it back.
+DEFAULT_REQUEST_HEADERS = {"DNT": "1"}
+DEFAULT_TIMEOUT = 10
+
+
+@dataclass(frozen=True)
+class PageSnapshot:
+    """Everything one GET of a page told us, frozen for sharing."""
+    url: str
+    final_url: str = ""
+    status_code: int = 0
+    history: Tuple[str, ...] = ()
+    headers: Mapping[str, str] = field(default_factory=CaseInsensitiveDict)
+    set_cookie: Tuple[str, ...] = ()
+    cookies: Tuple[Any, ...] = ()
+    content: bytes = b""
+    text: str = ""
+    http_version: Optional[int] = None
+    elapsed: float = 0.0
+    fetched_at: float = 0.0
+    error: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock,
+                                  init=False, repr=False, compare=False)
+
+    @property
+    def ok(self) -> bool:
+        """True when the fetch worked and the server did not answer 4xx/5xx."""
+        return self.error is None and (self.status_code == 0 or self.status_code < 400)
+
+    @property
+    def document(self) -> ParsedDocument:
+        """The parsed body, built on first access and shared after that."""
+        doc = self.__dict__.get("_document")
+        if doc is None:
+            # analyzers run on a thread pool; make sure only one parses
+            with self._lock:
+                doc = self.__dict__.get("_document")
+                if doc is None:
+                    doc = parse_document(self.text)
+                    object.__setattr__(self, "_document", doc)
+        return doc
+
+
+def _raw_set_cookie(resp) -> Tuple[str, ...]:
+    """Pull the raw Set-Cookie lines off the urllib3 response, if any."""
+    raw = getattr(resp, "raw", None)
+    raw_headers = getattr(raw, "headers", None)
+    if raw_headers is not None and hasattr(raw_headers, "getlist"):
+        return tuple(raw_headers.getlist("Set-Cookie"))
+    headers = getattr(resp, "headers", None) or {}
+    value = headers.get("Set-Cookie")
+    return (value,) if value else ()
+
+
+def snapshot_from_response(url: str, resp, elapsed: float = 0.0) -> PageSnapshot:
+    """
+    Freeze a ``requests.Response`` (or anything shaped like one) into a
+    :class:`PageSnapshot`.  Missing attributes fall back to empty values.
+    """
+    text = getattr(resp, "text", None) or ""
+    content = getattr(resp, "content", None)
+    if content is None:
+        content = text.encode("utf-8", errors="replace")
+    history = tuple(getattr(r, "url", "") for r in (getattr(resp, "history", None) or ()))
+
+    return PageSnapshot(
+        url=url,
+        final_url=getattr(resp, "url", None) or url,
+        status_code=getattr(resp, "status_code", 0) or 0,
+        history=history,
+        headers=CaseInsensitiveDict(getattr(resp, "headers", None) or {}),
+        set_cookie=_raw_set_cookie(resp),
+        cookies=tuple(getattr(resp, "cookies", None) or ()),
+        content=content,
+        text=text,
+        http_version=getattr(getattr(resp, "raw", None), "version", None),
+        elapsed=elapsed,
+        fetched_at=time.time(),
+    )
+
+
+def error_snapshot(url: str, exc: BaseException) -> PageSnapshot:
+    """Snapshot for a fetch that never produced a response."""
+    return PageSnapshot(url=url, final_url=url, error=str(exc), fetched_at=time.time())
+
+
+def fetch_snapshot(url: str, timeout: int = DEFAULT_TIMEOUT,
+                   headers: Optional[dict] = None) -> PageSnapshot:
+    """GET *url* once and return its snapshot (never raises)."""
+    kwargs = {"timeout": timeout}
+    if headers:
+        kwargs["headers"] = headers
+    start = time.time()
+    try:
+        resp = get_transport().get(url, **kwargs)
+    except Exception as exc:
+        return error_snapshot(url, exc)
+    return snapshot_from_response(url, resp, elapsed=time.time() - start)
@@ -0,0 +1,157 @@
+# scan_cache.py
+
+"""
+Two-level result cache for /log.
+
+Some scans only depend on the *origin* (scheme://host:port), not on the
+page that was asked for: the TLS certificate and HTTPS set-up, the
+directory-listing probes, the vulnerability cross-reference (which looks
+at the site root) and the header checks.  Their results are kept in an
+in-memory, origin-scoped cache, so browsing ten pages of one site runs
+them once.
+
+Page-scoped entries are the per-URL rows stored by ``database.insert_log``;
+:meth:`ScanCache.page_state` classifies a row by its ``timestamp``:
+
+    fresh    younger than the page TTL          -> serve it
+    stale    younger than the page max age      -> serve it, rescan in background
+    expired  older, missing or unreadable       -> rescan before answering
+
+The two levels have separate TTLs.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Optional
+from urllib.parse import urlparse
+
+from scanners import ORIGIN_KEYS
+
+# defaults – tweak per deployment
+ORIGIN_TTL = 6 * 60 * 60      # certificates, server config: change rarely
+PAGE_TTL = 60 * 60            # page content changes more often
+PAGE_MAX_AGE = 24 * 60 * 60   # stale rows older than this are not served
+MAX_ORIGINS = 1024
+
+# scans whose result depends only on the origin (scope=ORIGIN in the registry)
+ORIGIN_SCANS = ORIGIN_KEYS
+
+# page_state() results
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+# SQLite's CURRENT_TIMESTAMP (UTC)
+_DB_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def origin_of(url: str) -> str:
+    """scheme://host:port for *url*, with the default port filled in."""
+    p = urlparse(url)
+    port = p.port or (443 if p.scheme == "https" else 80)
+    return f"{p.scheme}://{(p.hostname or '').lower()}:{port}"
+
+
+class TTLCache:
+    """Thread-safe LRU map whose entries expire *ttl* seconds after being set."""
+
+    def __init__(self, ttl: float, max_entries: int = MAX_ORIGINS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ScanCache:
+    """Origin-scoped scan results in memory; page-scoped freshness by DB timestamp."""
+
+    def __init__(self, origin_ttl: float = ORIGIN_TTL, page_ttl: float = PAGE_TTL,
+                 page_max_age: float = PAGE_MAX_AGE, max_origins: int = MAX_ORIGINS):
+        self.page_ttl = page_ttl
+        self.page_max_age = max(page_max_age, page_ttl)
+        self.origins = TTLCache(origin_ttl, max_origins)
+        self._revalidating = set()
+        self._lock = threading.Lock()
+
+    # ---- origin level ----------------------------------------------------- #
+    def get_origin(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached {scan: (score, details)} for *url*'s origin, or None."""
+        return self.origins.get(origin_of(url))
+
+    def put_origin(self, url: str, results: Dict[str, Any]) -> None:
+        self.origins.put(origin_of(url), {k: results[k] for k in ORIGIN_SCANS})
+
+    # ---- page level ------------------------------------------------------- #
+    def page_age(self, record: Dict[str, Any]) -> Optional[float]:
+        """Seconds since *record* (a get_log_by_url row) was written."""
+        stamp = record.get("timestamp")
+        if not stamp:
+            return None
+        try:
+            written = datetime.strptime(stamp, _DB_TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            return None
+        return (datetime.now(timezone.utc) - written).total_seconds()
+
+    def page_state(self, record: Optional[Dict[str, Any]]) -> str:
+        """FRESH, STALE or EXPIRED for *record* (None counts as expired)."""
+        if not record:
+            return EXPIRED
+        age = self.page_age(record)
+        if age is None or age >= self.page_max_age:
+            return EXPIRED
+        return FRESH if age < self.page_ttl else STALE
+
+    def page_fresh(self, record: Optional[Dict[str, Any]]) -> bool:
+        """True if *record* exists and is younger than the page TTL."""
+        return self.page_state(record) == FRESH
+
+    # ---- background revalidation ----------------------------------------- #
+    def begin_revalidate(self, key: str) -> bool:
+        """Claim the background rescan of *key*; False if one is already running."""
+        with self._lock:
+            if key in self._revalidating:
+                return False
+            self._revalidating.add(key)
+            return True
+
+    def end_revalidate(self, key: str) -> None:
+        with self._lock:
+            self._revalidating.discard(key)
+
+    def clear(self) -> None:
+        self.origins.clear()
@@ -0,0 +1,66 @@
+# scan_events.py
+
+"""
+Progress events of in-flight scans, for ``GET /log/stream``.
+
+A scan publishes an event as each scanner finishes (and provisional
+scores after it); :class:`ScanEvents` fans them out to every subscriber
+of that URL.  Events already published are replayed to a subscriber
+that joins mid-scan – e.g. a second popup whose request was coalesced
+onto the running scan – so every stream sees every scanner.
+
+:func:`sse` frames an event for a ``text/event-stream`` response.
+"""
+
+import asyncio
+import json
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+Event = Tuple[str, Any]             # (event name, JSON-serialisable data)
+
+
+def sse(event: str, data: Any) -> str:
+    """One Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class ScanEvents:
+    """Per-URL fan-out of scan progress, with replay for late subscribers."""
+
+    def __init__(self):
+        self._history: Dict[str, List[Event]] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def begin(self, url: str) -> None:
+        """A scan of *url* is starting; forget the previous one's events."""
+        self._history[url] = []
+
+    def publish(self, url: str, event: str, data: Any) -> None:
+        history = self._history.get(url)
+        if history is not None:           # only while the scan is running
+            history.append((event, data))
+        for queue in self._subscribers.get(url, ()):
+            queue.put_nowait((event, data))
+
+    def end(self, url: str) -> None:
+        """The scan of *url* is over; later subscribers get no replay."""
+        self._history.pop(url, None)
+
+    @contextmanager
+    def subscribe(self, url: str) -> Iterator[asyncio.Queue]:
+        """A queue of *url*'s events, starting with those already published."""
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in self._history.get(url, ()):
+            queue.put_nowait(item)
+        self._subscribers.setdefault(url, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(url)
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[url]
+
+    def __len__(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
@@ -0,0 +1,151 @@
+# scan_executor.py
+
+"""
+Dedicated, instrumented thread pools for scan work.
+
+asyncio's default executor is shared with everything else in the process
+and sized from the CPU count, so a few concurrent scans can fill it.  The
+:class:`ScanExecutor` gives scans their own two pools instead, so one kind
+of work cannot starve the other:
+
+  • ``io``  – blocking network work.  It is installed as the event loop's
+    default executor, which is where asyncio sends the DNS lookups
+    (``getaddrinfo``) of the TLS probe and any other
+    ``run_in_executor(None, …)`` call
+  • ``cpu`` – parsing pages and the analyzers that walk the parsed
+    document (registry cost class CPU), which would otherwise run on, and
+    stall, the event loop
+
+Each pool counts what it does – queue depth, busy threads, time spent
+waiting and running – and :meth:`ScanExecutor.stats` reports it (served
+by ``GET /metrics/scan_executor``).
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# defaults – tweak per deployment
+IO_THREADS = 32                             # mostly waiting on sockets
+CPU_THREADS = min(4, os.cpu_count() or 1)   # the GIL caps what more would buy
+
+
+class InstrumentedPool(ThreadPoolExecutor):
+    """A ThreadPoolExecutor that keeps queue-depth and utilization counters."""
+
+    def __init__(self, name: str, max_workers: int,
+                 clock: Callable[[], float] = time.perf_counter):
+        super().__init__(max_workers=max_workers, thread_name_prefix=f"scan-{name}")
+        self.name = name
+        self.max_workers = max_workers
+        self._clock = clock
+        self._stats_lock = threading.Lock()
+        self._created = clock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_queued = 0
+        self._wait_seconds = 0.0
+        self._busy_seconds = 0.0
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        submitted = self._clock()
+        with self._stats_lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        def call():
+            started = self._clock()
+            with self._stats_lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_seconds += started - submitted
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._stats_lock:
+                    self._running -= 1
+                    self._busy_seconds += self._clock() - started
+                    if ok:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        try:
+            return super().submit(call)
+        except BaseException:
+            with self._stats_lock:
+                self._queued -= 1
+            raise
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Await *fn(*args, **kwargs)* on this pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self, functools.partial(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            finished = self._completed + self._failed
+            uptime = max(self._clock() - self._created, 1e-9)
+            return {
+                "threads": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "max_queued": self._max_queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "busy_seconds": round(self._busy_seconds, 3),
+                "wait_seconds": round(self._wait_seconds, 3),
+                "avg_wait_ms": round(1000 * self._wait_seconds / finished, 2) if finished else 0.0,
+                # share of thread-time spent on finished calls since start
+                "utilization": round(self._busy_seconds / (uptime * self.max_workers), 4),
+            }
+
+
+class ScanExecutor:
+    """Separate I/O and CPU pools for scan work."""
+
+    def __init__(self, io_threads: int = IO_THREADS, cpu_threads: int = CPU_THREADS):
+        self.io = InstrumentedPool("io", io_threads)
+        self.cpu = InstrumentedPool("cpu", cpu_threads)
+
+    def install(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Make the I/O pool the loop's default executor (DNS, stray run_in_executor calls)."""
+        (loop or asyncio.get_running_loop()).set_default_executor(self.io)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {"io": self.io.stats(), "cpu": self.cpu.stats()}
+
+    def shutdown(self) -> None:
+        """Drop queued work; calls already running finish on their own."""
+        self.io.shutdown(wait=False, cancel_futures=True)
+        self.cpu.shutdown(wait=False, cancel_futures=True)
+
+
+# --------------------------------------------------------------------------- #
+# Process-wide instance
+# --------------------------------------------------------------------------- #
+_executor: Optional[ScanExecutor] = None
+
+
+def get_scan_executor() -> ScanExecutor:
+    """The shared executor (created on first use)."""
+    global _executor
+    if _executor is None:
+        _executor = ScanExecutor()
+    return _executor
+
+
+def close_scan_executor() -> None:
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
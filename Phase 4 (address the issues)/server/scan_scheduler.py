@@ -0,0 +1,223 @@
+# scan_scheduler.py
+
+"""
+Dependency-aware scheduling of the stages of one scan.
+
+A scan is a small DAG rather than a fixed sequence:
+
+    fetch:page ──► parse:page ──► scan:<html scanners>
+        │    └──────────────────► scan:<header scanners>, scan:<probe scanners>
+        └──► probe:tls ─────────► scan:ssl, scan:https
+    fetch:root ──► parse:root ──► scan:vuln          (site root, when it differs)
+
+:class:`ScanGraph` starts every stage the moment its inputs exist, so
+header-only checks finish while the page is still being parsed and the
+TLS handshake, directory probes and NVD lookups overlap the parse.  A
+scan therefore takes as long as its slowest real chain of dependencies –
+its *critical path*, which :meth:`ScanGraph.trace` reports alongside
+every stage's timing.
+
+With a timeout, :meth:`ScanGraph.run` answers with the stages that made
+it and leaves the rest running, so a caller can reply on time and fill
+the gaps in later with :meth:`ScanGraph.finish`.  Each scanner stage is
+bounded by its declared timeout and the scan's deadline (``deadline``);
+a scanner that times out or fails is recorded as incomplete, so it never
+takes its siblings' results down with it.
+
+:func:`plan_scan` builds the graph for a set of registry entries from
+what they declare (see ``scanners``); only the stages they need are added.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from deadline import DeadlineExceeded, clamp
+from scanners import HTML, ROOT, TLS, ScannerSpec
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    """When one stage ran, relative to the start of its graph (seconds)."""
+    name: str
+    deps: Tuple[str, ...]
+    start: float
+    end: float
+
+    @property
+    def elapsed(self) -> float:
+        return self.end - self.start
+
+
+class ScanGraph:
+    """Runs async stages as soon as the stages they depend on have finished."""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter,
+                 on_done: Optional[Callable[[str, Any], None]] = None):
+        # on_done(name, result) is called as each stage finishes
+        self._clock = clock
+        self._on_done = on_done
+        self._stages: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...]]] = {}
+        self._timings: Dict[str, StageTiming] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._t0 = 0.0
+
+    def add(self, name: str, run: Callable[..., Awaitable[Any]], deps: Sequence[str] = ()) -> None:
+        """
+        Add a stage; *run* is called with its dependencies' results, in
+        *deps* order.  Dependencies must already be in the graph, which
+        keeps it acyclic.
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage {name!r} already added")
+        missing = [dep for dep in deps if dep not in self._stages]
+        if missing:
+            raise ValueError(f"Stage {name!r} depends on unknown stages {missing}")
+        self._stages[name] = (run, tuple(deps))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stages
+
+    async def run(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run every stage; returns their results by name.  With *timeout*,
+        returns after at most that many seconds with whatever has finished;
+        the other stages keep running (see :meth:`finish`).  A failure
+        cancels the rest.
+        """
+        self._timings = {}
+        self._t0 = self._clock()
+        self._tasks = tasks = {}
+        for name, (run, deps) in self._stages.items():      # insertion order is topological
+            tasks[name] = asyncio.ensure_future(
+                self._stage(name, run, deps, [tasks[dep] for dep in deps]))
+        try:
+            done, _ = await asyncio.wait(tasks.values(), timeout=timeout,
+                                         return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        except BaseException:
+            self.cancel()
+            raise
+        return {name: task.result() for name, task in tasks.items() if task.done()}
+
+    @property
+    def unfinished(self) -> List[str]:
+        """Stages still running after :meth:`run` returned."""
+        return [name for name, task in self._tasks.items() if not task.done()]
+
+    async def finish(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait up to *timeout* for the unfinished stages and return the
+        results of those that succeeded; the rest are cancelled.
+        """
+        pending = [task for task in self._tasks.values() if not task.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+            self.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return {name: task.result() for name, task in self._tasks.items()
+                if task.done() and not task.cancelled() and task.exception() is None}
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+
+    async def _stage(self, name, run, deps, dep_tasks):
+        args = [await task for task in dep_tasks]
+        start = self._clock()
+        result = await run(*args)
+        self._timings[name] = StageTiming(name, deps, start - self._t0, self._clock() - self._t0)
+        if self._on_done is not None:
+            self._on_done(name, result)
+        return result
+
+    # ---- reporting -------------------------------------------------------- #
+    def timings(self) -> List[StageTiming]:
+        """Finished stages, in the order they started."""
+        return sorted(self._timings.values(), key=lambda t: t.start)
+
+    def critical_path(self) -> List[StageTiming]:
+        """
+        The chain of stages that determined when the graph finished: from
+        the last stage to end, repeatedly step to whichever dependency
+        finished last (the one it was actually waiting on).
+        """
+        if not self._timings:
+            return []
+        stage = max(self._timings.values(), key=lambda t: t.end)
+        path = [stage]
+        while stage.deps:
+            stage = max((self._timings[dep] for dep in stage.deps), key=lambda t: t.end)
+            path.append(stage)
+        return path[::-1]
+
+    def trace(self) -> Dict[str, Any]:
+        """Timings in milliseconds, JSON-ready."""
+        def ms(seconds):
+            return round(seconds * 1000, 1)
+
+        path = self.critical_path()
+        return {
+            "total_ms": ms(path[-1].end) if path else 0.0,
+            "critical_path": [t.name for t in path],
+            "stages": [{"name": t.name, "start_ms": ms(t.start), "end_ms": ms(t.end)}
+                       for t in self.timings()],
+        }
+
+
+def plan_scan(specs: Sequence[ScannerSpec], page_url: str, root_url: Optional[str],
+              fetch: Callable[[str], Awaitable[Any]],
+              parse: Callable[[Any], Awaitable[Any]],
+              probe_tls: Callable[[Any], Awaitable[Any]],
+              graph: Optional[ScanGraph] = None) -> ScanGraph:
+    """
+    Graph for running *specs* against *page_url*.
+
+    root_url   the site root, when it is a different page (else the page
+               stands in for it)
+    fetch      url -> snapshot
+    parse      snapshot -> the same snapshot, with its document built
+    probe_tls  page snapshot -> TLS probe
+
+    Results are under ``fetch:page`` (the snapshot) and ``scan:<key>``.
+    """
+    if graph is None:
+        graph = ScanGraph()
+    graph.add("fetch:page", lambda: fetch(page_url))
+
+    def snapshot_stage(spec):
+        source = "root" if ROOT in spec.inputs and root_url else "page"
+        if source == "root" and "fetch:root" not in graph:
+            graph.add("fetch:root", lambda: fetch(root_url))
+        if HTML not in spec.inputs:
+            return f"fetch:{source}"
+        if f"parse:{source}" not in graph:
+            graph.add(f"parse:{source}", parse, deps=(f"fetch:{source}",))
+        return f"parse:{source}"
+
+    for spec in specs:
+        deps = [snapshot_stage(spec)]
+        if TLS in spec.inputs:
+            if "probe:tls" not in graph:
+                graph.add("probe:tls", probe_tls, deps=("fetch:page",))
+            deps.append("probe:tls")
+        graph.add(f"scan:{spec.key}", _runner(spec), deps=deps)
+    return graph
+
+
+def _runner(spec: ScannerSpec):
+    async def run(snapshot, tls=None):
+        try:
+            return await asyncio.wait_for(spec.run(snapshot, tls=tls), clamp(spec.timeout))
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            return spec.incomplete(f"timed out after {spec.timeout:g}s")
+        except Exception as exc:
+            logger.warning("Scanner %s failed", spec.key, exc_info=True)
+            return spec.incomplete(f"failed: {type(exc).__name__}: {exc}")
+    return run
@@ -0,0 +1,192 @@
+# scanners.py
+
+"""
+Declarative registry of the passive scanners.
+
+Every scanner module is described once, here, by a :class:`ScannerSpec`:
+
+    key      column prefix in the stored rows (``<key>_scan_result``)
+    name     display name shown in the extension and on /logs
+    module   dotted path of the scanner module: ``analyze(snapshot)``, plus
+             ``analyze_async`` for the ones that wait on the network
+    scope    ORIGIN – depends only on scheme://host:port, shared site-wide
+             PAGE   – depends on the page that was asked for
+    inputs   what the scanner reads, so the server fetches, parses and
+             probes only what the pending scanners need:
+               HEADERS  the fetched response (status, headers, cookies, body text)
+               HTML     the parsed document
+               TLS      the shared TLS probe of the page's origin
+               ROOT     run against the site root instead of the page
+               PROBES   makes network requests of its own
+    cost     CHEAP (header / regex checks; ``analyze`` runs inline), CPU
+             (walks the parsed document; ``analyze`` runs on the scan
+             executor's CPU pool) or NETWORK (waits on requests of its own;
+             ``analyze_async`` is awaited, as it is for TLS scanners, which
+             may probe when no shared probe is passed)
+    timeout  seconds the scanner may take; past that (or past the scan's
+             deadline) its result is :meth:`ScannerSpec.incomplete`
+
+The server drives fetching, scanning and scoring from :data:`REGISTRY`, so
+adding a scanner means adding an entry here (and a weight to each system
+in ``server.PRECONFIGURED_WEIGHTS``, which follow this order).
+
+Scanner modules are imported on first use, so the metadata can be read
+(by the cache, the database tests, …) without pulling in the scanners'
+own dependencies.
+"""
+
+import importlib
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from scan_executor import get_scan_executor
+
+# scopes
+ORIGIN = "origin"
+PAGE = "page"
+
+# inputs
+HEADERS = "headers"
+HTML = "html"
+TLS = "tls"
+ROOT = "root"
+PROBES = "probes"
+
+# cost classes
+CHEAP = "cheap"
+CPU = "cpu"
+NETWORK = "network"
+
+Result = Tuple[str, str, Any, str]        # (key, name, score, details) – save_scan's shape
+
+# details of a scanner that had not finished; its score is None, so the
+# weighted scores are taken over the scanners that did finish
+INCOMPLETE = "Incomplete"
+
+
+@dataclass(frozen=True)
+class ScannerSpec:
+    """One scanner: what it is, what it needs and what it costs."""
+    key: str
+    name: str
+    module: str
+    scope: str = PAGE
+    inputs: FrozenSet[str] = frozenset({HEADERS})
+    cost: str = CHEAP
+    timeout: float = 5.0
+
+    @property
+    def analyzer(self):
+        """The scanner module (imported on first use)."""
+        return importlib.import_module(self.module)
+
+    async def run(self, page, root=None, tls=None) -> Result:
+        """Run the scanner on the shared snapshots and return its result row."""
+        snapshot = root if ROOT in self.inputs and root is not None else page
+        kwargs = {"tls": tls} if TLS in self.inputs else {}
+        if self.cost == NETWORK or TLS in self.inputs:
+            score, details = await self.analyzer.analyze_async(snapshot, **kwargs)
+        elif self.cost == CPU:
+            # walks the parsed document: keep it off the event loop
+            score, details = await get_scan_executor().cpu.run(self.analyzer.analyze,
+                                                               snapshot, **kwargs)
+        else:
+            score, details = self.analyzer.analyze(snapshot, **kwargs)
+        return self.result(score, details)
+
+    def incomplete(self, reason: str = "still running at the scan deadline") -> Result:
+        """Result row for a scanner that did not finish."""
+        return self.key, self.name, None, f"{INCOMPLETE}: {reason}"
+
+    def result(self, score, details) -> Result:
+        """Normalize an analyzer's (score, details) into a result row."""
+        if not isinstance(details, str):
+            details = "; ".join(details)
+        try:
+            score = float(score)
+        except (TypeError, ValueError):
+            return self.key, self.name, None, details
+        return self.key, self.name, int(score) if score.is_integer() else score, details
+
+
+# Registry order is the weight order in server.PRECONFIGURED_WEIGHTS.
+REGISTRY: Tuple[ScannerSpec, ...] = (
+    ScannerSpec("xss", "Passive XSS Security Scan",
+                "Security_scans.Passive_XSS_Security_Scanner",
+                inputs=frozenset({HEADERS, HTML}), cost=CPU),
+    ScannerSpec("vuln", "Passive Vulnerability Cross-Reference Scan",
+                "Security_scans.Passive_Vulnerability_Cross_Reference_Scanner",
+                scope=ORIGIN, inputs=frozenset({HEADERS, HTML, ROOT, PROBES}),
+                cost=NETWORK, timeout=30.0),
+    ScannerSpec("privacy_tracker", "Passive Privacy Tracker Script Scan",
+                "Privacy_scan.Passive_Tracker_Script_Scanner",
+                inputs=frozenset({HTML}), cost=CPU),
+    ScannerSpec("privacy_third_party_script", "Passive Privacy Third-Party Script Evaluation Scan",
+                "Privacy_scan.Passive_Third_Party_Script_Evaluation_Scanner",
+                inputs=frozenset({HTML}), cost=CPU),
+    ScannerSpec("ssl", "Passive SSL/TLS Certificate Validation Scan",
+                "Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner",
+                scope=ORIGIN, inputs=frozenset({TLS})),
+    ScannerSpec("sql", "Passive SQL Injection Security Scan",
+                "Security_scans.Passive_SQL_Injection_Security_Scanner"),
+    ScannerSpec("headers", "Passive Security Headers Scan",
+                "Security_scans.Passive_Security_Headers_Scanner",
+                scope=ORIGIN),
+    ScannerSpec("privacy_audit", "Passive Privacy & Tracker Audit Scan",
+                "Privacy_scan.Passive_Privacy_and_Tracker_Audit_Scanner"),
+    ScannerSpec("performance", "Passive Performance & Configuration Analysis Scan",
+                "Security_scans.Passive_Performance_and_Configuration_Analysis_Scanner"),
+    ScannerSpec("outdated", "Passive Outdated Plugin Security Scan",
+                "Security_scans.Passive_Outdated_Plugin_Security_Scanner"),
+    ScannerSpec("mixed", "Passive Mixed Content Detection Scan",
+                "Security_scans.Passive_Mixed_Content_Detection_Scanner",
+                inputs=frozenset({HTML}), cost=CPU),
+    ScannerSpec("directory", "Passive Directory Listing Security Scan",
+                "Security_scans.Passive_Directory_Listing_Security_Scanner",
+                scope=ORIGIN, inputs=frozenset({PROBES}), cost=NETWORK, timeout=15.0),
+    ScannerSpec("csrf", "Passive CSRF Security Scan",
+                "Security_scans.Passive_CSRF_Security_Scanner",
+                inputs=frozenset({HEADERS, HTML}), cost=CPU),
+    ScannerSpec("csp", "Passive CSP Security Scan",
+                "Security_scans.Passive_CSP_Security_Scanner"),
+    ScannerSpec("https", "Passive HTTPS Security Scan",
+                "Security_scans.Passive_HTTPS_Scanner",
+                scope=ORIGIN, inputs=frozenset({TLS})),
+    ScannerSpec("third_party_data_collection", "Passive Third-Party Data Collection Scan",
+                "Privacy_scan.Passive_Third_Party_Data_Collection_Scanner"),
+    ScannerSpec("tracker_detection", "Passive Tracker Detection Scan",
+                "Privacy_scan.Passive_Tracker_Detection_Scan",
+                inputs=frozenset({HEADERS, HTML}), cost=CPU),
+    ScannerSpec("fingerprinting", "Passive Fingerprinting Detection Scan",
+                "Privacy_scan.Passive_Fingerprinting_Detection_Scan",
+                inputs=frozenset({HTML}), cost=CPU),
+    ScannerSpec("referrer_dnt", "Passive Referrer & DNT Analysis Scan",
+                "Privacy_scan.Passive_Referrer_DNT_Analysis_Scan",
+                inputs=frozenset({HEADERS, HTML}), cost=CPU),
+    ScannerSpec("data_leakage", "Passive Data Leakage HTTP Headers Scan",
+                "Privacy_scan.Passive_Data_Leakage_HTTP_Headers_Scan",
+                scope=ORIGIN),
+    ScannerSpec("dnt", "Passive Do Not Track Support Scan",
+                "Privacy_scan.Passive_Do_Not_Track_Support_Scan",
+                inputs=frozenset({HEADERS, HTML}), cost=CPU),
+    ScannerSpec("cookie", "Passive Cookie Privacy Scan",
+                "Privacy_scan.Passive_Cookie_Privacy_Scan"),
+)
+
+BY_KEY: Dict[str, ScannerSpec] = {spec.key: spec for spec in REGISTRY}
+ORIGIN_KEYS: FrozenSet[str] = frozenset(s.key for s in REGISTRY if s.scope == ORIGIN)
+
+
+def is_incomplete(result: Result) -> bool:
+    return result[2] is None and result[3].startswith(INCOMPLETE)
+
+
+def inputs_of(specs: Iterable[ScannerSpec]) -> FrozenSet[str]:
+    """Everything *specs* need between them."""
+    return frozenset().union(*(spec.inputs for spec in specs))
+
+
+def in_order(results: Dict[str, Result],
+             specs: Optional[Iterable[ScannerSpec]] = None) -> List[Result]:
+    """*results* (by key) as a list in registry order."""
+    return [results[spec.key] for spec in (REGISTRY if specs is None else specs)]
@@ -52,11 +52,7 @@ def calculate_final_score(*scan_results, weights=None):
         match = pattern.search(result)
         if match:
             try:
-                score = float(match.group(1))
-                # Round to nearest whole number and clamp between 1 and 10
-                score = int(round(score))
-                score = max(1, min(score, 10))
-                scores.append(score)
+                scores.append(float(match.group(1)))
             except ValueError:
                 continue
 
@@ -68,9 +64,35 @@ def calculate_final_score(*scan_results, weights=None):
         weights = [1] * len(scores)
     if len(weights) != len(scores):
         raise ValueError("The number of weights must match the number of scan results.")
+    return weighted_score(scores, weights)
+
+
+def weighted_score(scores, weights=None):
+    """
+    Weighted average of numeric scanner scores, as calculate_final_score
+    computes it, without the round trip through "Score: X/10" strings.
+
+    Each score is rounded to a whole number and clamped between 1 and 10.
+    A score of None (a scanner that produced no number) is left out
+    together with its weight.
+
+    Returns:
+      int: The final weighted score between 1 and 10, or 0 if there are no scores.
+    """
+    if weights is None:
+        weights = [1] * len(scores)
+    if len(weights) != len(scores):
+        raise ValueError("The number of weights must match the number of scan results.")
+
+    pairs = [(max(1, min(int(round(score)), 10)), weight)
+             for score, weight in zip(scores, weights) if score is not None]
+    if not pairs:
+        return 0
 
-    weighted_sum = sum(score * weight for score, weight in zip(scores, weights))
-    total_weight = sum(weights)
+    weighted_sum = sum(score * weight for score, weight in pairs)
+    total_weight = sum(weight for _, weight in pairs)
+    if not total_weight:
+        return 0
     final_score = int(round(weighted_sum / total_weight))
     final_score = max(1, min(final_score, 10))
     return final_score
@@ -4,42 +4,37 @@ import os
 import logging
 import random
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Optional
 from urllib.parse import urlparse, urlunparse
 
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import Depends, FastAPI, Request, HTTPException
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-from database import init_db, insert_log, get_all_logs, get_log_by_url
-from score_calculator import calculate_final_score
-
-# Import the scan functions
-from Security_scans.Passive_XSS_Security_Scanner import analyze_xss_security
-from Security_scans.Passive_Vulnerability_Cross_Reference_Scanner import analyze_vulnerabilities
-from Privacy_scan.Passive_Tracker_Script_Scanner import analyze_tracker_security
-from Privacy_scan.Passive_Third_Party_Script_Evaluation_Scanner import analyze_third_party_script_evaluation
-from Privacy_scan.Passive_Privacy_and_Tracker_Audit_Scanner import analyze_privacy
-from Security_scans.Passive_SSL_TLS_Certificate_Validation_Scanner import analyze_certificate, get_hostname
-from Security_scans.Passive_SQL_Injection_Security_Scanner import analyze_sql_security
-from Security_scans.Passive_Security_Headers_Scanner import analyze_security_headers
-from Security_scans.Passive_Performance_and_Configuration_Analysis_Scanner import analyze_performance
-from Security_scans.Passive_Outdated_Plugin_Security_Scanner import analyze_outdated_plugins
-from Security_scans.Passive_Mixed_Content_Detection_Scanner import analyze_mixed_content
-from Security_scans.Passive_Directory_Listing_Security_Scanner import analyze_directory_security
-from Security_scans.Passive_CSRF_Security_Scanner import analyze_csrf_security
-from Security_scans.Passive_CSP_Security_Scanner import analyze_csp_security
-from Security_scans.Passive_HTTPS_Scanner import analyze_https_security
-from Privacy_scan.Passive_Third_Party_Data_Collection_Scanner import analyze_third_party_data_collection
-from Privacy_scan.Passive_Tracker_Detection_Scan import analyze_tracker_detection
-from Privacy_scan.Passive_Fingerprinting_Detection_Scan import analyze_fingerprinting_detection
-from Privacy_scan.Passive_Referrer_DNT_Analysis_Scan import analyze_referrer_dnt
-from Privacy_scan.Passive_Data_Leakage_HTTP_Headers_Scan import analyze_data_leakage_headers
-from Privacy_scan.Passive_Do_Not_Track_Support_Scan import analyze_dnt_support
-from Privacy_scan.Passive_Cookie_Privacy_Scan import analyze_cookie_privacy
+from async_db import (close_db, compact_history_async, get_log_by_url_async,
+                      get_trend_async, init_db_async, list_logs_async,
+                      train_detail_dictionary_async)
+from database import FINAL_SCORES, LOG_PAGE_SIZE, LOG_SORTS, SCANNERS, split_result
+from write_behind import WriteBehindWriter
+import export_logs
+from score_calculator import weighted_score
+import scanners
+from scan_cache import EXPIRED, PAGE_TTL, STALE, ScanCache, TTLCache
+from scan_scheduler import ScanGraph, plan_scan
+from scan_events import ScanEvents, sse
+from deadline import deadline_scope, remaining
+from scan_executor import close_scan_executor, get_scan_executor
+from single_flight import SingleFlight
+
+from async_http import close_engine, fetch_snapshot_async
+from transport import TransportManager, get_transport, install_transport
+from page_snapshot import DEFAULT_REQUEST_HEADERS
+from tls_probe import probe_snapshot_async
+from Security_scans.Passive_Vulnerability_Cross_Reference_Scanner import get_base_url
 
 app = FastAPI()
 app.add_middleware(
@@ -52,17 +47,44 @@ app.add_middleware(
 
 templates = Jinja2Templates(directory="templates")
 
-# Preconfigured weight systems
+# Preconfigured weight systems – one weight per scanner, in scanners.REGISTRY order
 PRECONFIGURED_WEIGHTS = {
     "normal":  [8, 10, 5, 5, 9, 9, 7, 5, 3, 4, 7, 5, 8, 10, 20, 7, 7, 7, 5, 7, 5, 7],
     "security":[10,10, 2, 2,10,10, 9, 2, 2, 5, 9, 7,10,10,10, 3, 3, 3, 2, 8, 2, 5],
     "privacy": [ 0, 0,10,10, 0, 0, 0,10, 3, 0, 0, 0, 0, 0, 0,10,10,10,10,10,10,10],
-    "random":  [random.randint(1,5) for _ in range(22)],
+    "random":  [random.randint(1,5) for _ in scanners.REGISTRY],
     # adversarial is computed below
 }
 
 current_weight_system = "normal"
 
+# Origin-level scan results are shared between pages of the same site
+scan_cache = ScanCache()
+
+# Progress of running scans, for /log/stream
+scan_events = ScanEvents()
+
+# Stage timings and critical path of recent scans, for /scan_trace
+scan_traces = TTLCache(ttl=PAGE_TTL, max_entries=1024)
+
+# Concurrent /log calls for the same normalized URL share one scan
+scan_flights = SingleFlight()
+
+# Completed scans are committed in batches; reads see them before that
+write_behind = WriteBehindWriter()
+
+# /log answers within RESPONSE_DEADLINE seconds with the scanners that have
+# finished; the rest are stored as incomplete and filled in when they finish.
+# No part of a scan runs past SCAN_DEADLINE.
+RESPONSE_DEADLINE = 8.0
+SCAN_DEADLINE = 45.0
+
+# normalized URL -> token of the scan still finishing in the background, if any
+latest_scans = {}
+
+# How often old score history is rolled up into daily / weekly rows
+HISTORY_COMPACT_INTERVAL = 60 * 60
+
 class URLRequest(BaseModel):
     url: str
 
@@ -76,8 +98,44 @@ def normalize_url(url: str) -> str:
     return urlunparse((parsed.scheme, parsed.netloc, normalized_path, '', '', ''))
 
 @app.on_event("startup")
-def startup_event():
-    init_db()
+async def startup_event():
+    await init_db_async()
+    # scan work gets its own pools; DNS lookups go to the I/O one
+    get_scan_executor().install()
+    # import every scanner now, so a broken one fails startup, not a scan
+    for spec in scanners.REGISTRY:
+        spec.analyzer
+    write_behind.start()
+    install_transport(TransportManager())
+    app.state.history_task = asyncio.ensure_future(compact_history_periodically())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.history_task.cancel()
+    await close_engine()
+    transport = get_transport()
+    if isinstance(transport, TransportManager):
+        transport.close()
+    install_transport(None)
+    await write_behind.close()
+    await close_db()
+    close_scan_executor()
+
+async def compact_history_periodically():
+    while True:
+        try:
+            await compact_history_async()
+        except Exception:
+            logging.getLogger(__name__).exception("Score history compaction failed")
+        try:
+            await train_detail_dictionary_async()   # no-op once trained
+        except Exception:
+            logging.getLogger(__name__).exception("Detail dictionary training failed")
+        await asyncio.sleep(HISTORY_COMPACT_INTERVAL)
+
+async def lookup_log(normalized_url: str):
+    """The stored record, or the not-yet-flushed one if a scan just finished."""
+    return write_behind.pending(normalized_url) or await get_log_by_url_async(normalized_url)
 
 def log_access(request: Request, normalized_url: str):
     custom_logger = logging.getLogger("custom_access")
@@ -99,210 +157,298 @@ async def log_url(data: URLRequest, request: Request):
     original_url = data.url
     normalized_url = normalize_url(original_url)
 
-    # Return cached result if recent
-    existing = get_log_by_url(normalized_url)
-    if existing:
+    # Fresh results are served as-is; stale ones are served straight away
+    # while a background rescan refreshes them; expired ones block on a rescan
+    existing = await lookup_log(normalized_url)
+    state = scan_cache.page_state(existing)
+    if state == STALE and scan_cache.begin_revalidate(normalized_url):
+        asyncio.ensure_future(revalidate(original_url, normalized_url))
+    if state != EXPIRED:
         log_access(request, normalized_url)
         return existing
 
-    # Start timing
-    start_time = datetime.utcnow()
+    record = await scan_url(original_url, normalized_url)
+    log_access(request, normalized_url)
+    return record
 
-    # Run all scans
-    loop = asyncio.get_event_loop()
-    host = get_hostname(original_url)
-    results = await asyncio.gather(
-        loop.run_in_executor(None, analyze_xss_security, original_url),
-        loop.run_in_executor(None, analyze_vulnerabilities, original_url),
-        loop.run_in_executor(None, analyze_tracker_security, original_url),
-        loop.run_in_executor(None, analyze_third_party_script_evaluation, original_url),
-        loop.run_in_executor(None, analyze_certificate, host),
-        loop.run_in_executor(None, analyze_sql_security, original_url),
-        loop.run_in_executor(None, analyze_security_headers, original_url),
-        loop.run_in_executor(None, analyze_privacy, original_url),
-        loop.run_in_executor(None, analyze_performance, original_url),
-        loop.run_in_executor(None, analyze_outdated_plugins, original_url),
-        loop.run_in_executor(None, analyze_mixed_content, original_url),
-        loop.run_in_executor(None, analyze_directory_security, original_url),
-        loop.run_in_executor(None, analyze_csrf_security, original_url),
-        loop.run_in_executor(None, analyze_csp_security, original_url),
-        loop.run_in_executor(None, analyze_https_security, original_url),
-        loop.run_in_executor(None, analyze_third_party_data_collection, original_url),
-        loop.run_in_executor(None, analyze_tracker_detection, original_url),
-        loop.run_in_executor(None, analyze_fingerprinting_detection, original_url),
-        loop.run_in_executor(None, analyze_referrer_dnt, original_url),
-        loop.run_in_executor(None, analyze_data_leakage_headers, original_url),
-        loop.run_in_executor(None, analyze_dnt_support, original_url),
-        loop.run_in_executor(None, analyze_cookie_privacy, original_url),
-    )
+@app.get("/log/stream")
+async def stream_log(url: str, request: Request):
+    """
+    /log as Server-Sent Events: a ``scanner`` event per scanner as it
+    finishes, a ``provisional`` event with the weighted scores so far after
+    each, then ``final`` with the record /log would return (or ``error``).
+    """
+    normalized_url = normalize_url(url)
+    existing = await lookup_log(normalized_url)
+    state = scan_cache.page_state(existing)
+    if state == STALE and scan_cache.begin_revalidate(normalized_url):
+        asyncio.ensure_future(revalidate(url, normalized_url))
+    log_access(request, normalized_url)
 
-    (
-      (xss_score, xss_details),
-      (vuln_score, vuln_details),
-      (privacy_tracker_score, privacy_tracker_details),
-      (privacy_third_party_script_score, privacy_third_party_script_details),
-      (ssl_score, ssl_details),
-      (sql_score, sql_details),
-      (headers_score, headers_details),
-      (privacy_audit_score, privacy_audit_details),
-      (performance_score, performance_details),
-      (outdated_score, outdated_details),
-      (mixed_score, mixed_details),
-      (directory_score, directory_details),
-      (csrf_score, csrf_details),
-      (csp_score, csp_details),
-      (https_score, https_details),
-      (third_party_data_collection_score, third_party_data_collection_details),
-      (tracker_detection_score, tracker_detection_details),
-      (fingerprinting_score, fingerprinting_details),
-      (referrer_dnt_score, referrer_dnt_details),
-      (data_leakage_score, data_leakage_details),
-      (dnt_score, dnt_details),
-      (cookie_score, cookie_details),
-    ) = results
-
-    def join_details(d):
-        return d if isinstance(d, str) else "; ".join(d)
-
-    xss_details = join_details(xss_details)
-    vuln_details = join_details(vuln_details)
-    privacy_tracker_details = join_details(privacy_tracker_details)
-    privacy_third_party_script_details = join_details(privacy_third_party_script_details)
-    ssl_details = join_details(ssl_details)
-    sql_details = join_details(sql_details)
-    headers_details = join_details(headers_details)
-    privacy_audit_details = join_details(privacy_audit_details)
-    performance_details = join_details(performance_details)
-    outdated_details = join_details(outdated_details)
-    mixed_details = join_details(mixed_details)
-    directory_details = join_details(directory_details)
-    csrf_details = join_details(csrf_details)
-    csp_details = join_details(csp_details)
-    https_details = join_details(https_details)
-    third_party_data_collection_details = join_details(third_party_data_collection_details)
-    tracker_detection_details = join_details(tracker_detection_details)
-    fingerprinting_details = join_details(fingerprinting_details)
-    referrer_dnt_details = join_details(referrer_dnt_details)
-    data_leakage_details = join_details(data_leakage_details)
-    dnt_details = join_details(dnt_details)
-    cookie_details = join_details(cookie_details)
-
-    # Format scan results
-    xss_scan_result = f"Score: {xss_score}/10 - {xss_details}"
-    vuln_scan_result = f"Score: {vuln_score}/10 - {vuln_details}"
-    privacy_tracker_scan_result = f"Score: {privacy_tracker_score}/10 - {privacy_tracker_details}"
-    privacy_third_party_script_scan_result = f"Score: {privacy_third_party_script_score}/10 - {privacy_third_party_script_details}"
-    ssl_scan_result = f"Score: {ssl_score}/10 - {ssl_details}"
-    sql_scan_result = f"Score: {sql_score}/10 - {sql_details}"
-    headers_scan_result = f"Score: {headers_score}/10 - {headers_details}"
-    privacy_audit_scan_result = f"Score: {privacy_audit_score}/10 - {privacy_audit_details}"
-    performance_scan_result = f"Score: {performance_score}/10 - {performance_details}"
-    outdated_scan_result = f"Score: {outdated_score}/10 - {outdated_details}"
-    mixed_scan_result = f"Score: {mixed_score}/10 - {mixed_details}"
-    directory_scan_result = f"Score: {directory_score}/10 - {directory_details}"
-    csrf_scan_result = f"Score: {csrf_score}/10 - {csrf_details}"
-    csp_scan_result = f"Score: {csp_score}/10 - {csp_details}"
-    https_scan_result = f"Score: {https_score}/10 - {https_details}"
-    third_party_data_collection_scan_result = f"Score: {third_party_data_collection_score}/10 - {third_party_data_collection_details}"
-    tracker_detection_scan_result = f"Score: {tracker_detection_score}/10 - {tracker_detection_details}"
-    fingerprinting_scan_result = f"Score: {fingerprinting_score}/10 - {fingerprinting_details}"
-    referrer_dnt_scan_result = f"Score: {referrer_dnt_score}/10 - {referrer_dnt_details}"
-    data_leakage_scan_result = f"Score: {data_leakage_score}/10 - {data_leakage_details}"
-    dnt_scan_result = f"Score: {dnt_score}/10 - {dnt_details}"
-    cookie_scan_result = f"Score: {cookie_score}/10 - {cookie_details}"
-
-    # Compute final scores
-    final_score_norm = calculate_final_score(
-        xss_scan_result, vuln_scan_result, privacy_tracker_scan_result,
-        privacy_third_party_script_scan_result, ssl_scan_result, sql_scan_result,
-        headers_scan_result, privacy_audit_scan_result, performance_scan_result,
-        outdated_scan_result, mixed_scan_result, directory_scan_result,
-        csrf_scan_result, csp_scan_result, https_scan_result,
-        third_party_data_collection_scan_result, tracker_detection_scan_result,
-        fingerprinting_scan_result, referrer_dnt_scan_result,
-        data_leakage_scan_result, dnt_scan_result, cookie_scan_result,
-        weights=PRECONFIGURED_WEIGHTS["normal"]
-    )
-    final_score_privacy = calculate_final_score(
-        xss_scan_result, vuln_scan_result, privacy_tracker_scan_result,
-        privacy_third_party_script_scan_result, ssl_scan_result, sql_scan_result,
-        headers_scan_result, privacy_audit_scan_result, performance_scan_result,
-        outdated_scan_result, mixed_scan_result, directory_scan_result,
-        csrf_scan_result, csp_scan_result, https_scan_result,
-        third_party_data_collection_scan_result, tracker_detection_scan_result,
-        fingerprinting_scan_result, referrer_dnt_scan_result,
-        data_leakage_scan_result, dnt_scan_result, cookie_scan_result,
-        weights=PRECONFIGURED_WEIGHTS["privacy"]
-    )
-    final_score_security = calculate_final_score(
-        xss_scan_result, vuln_scan_result, privacy_tracker_scan_result,
-        privacy_third_party_script_scan_result, ssl_scan_result, sql_scan_result,
-        headers_scan_result, privacy_audit_scan_result, performance_scan_result,
-        outdated_scan_result, mixed_scan_result, directory_scan_result,
-        csrf_scan_result, csp_scan_result, https_scan_result,
-        third_party_data_collection_scan_result, tracker_detection_scan_result,
-        fingerprinting_scan_result, referrer_dnt_scan_result,
-        data_leakage_scan_result, dnt_scan_result, cookie_scan_result,
-        weights=PRECONFIGURED_WEIGHTS["security"]
-    )
-    final_score_rand = calculate_final_score(
-        xss_scan_result, vuln_scan_result, privacy_tracker_scan_result,
-        privacy_third_party_script_scan_result, ssl_scan_result, sql_scan_result,
-        headers_scan_result, privacy_audit_scan_result, performance_scan_result,
-        outdated_scan_result, mixed_scan_result, directory_scan_result,
-        csrf_scan_result, csp_scan_result, https_scan_result,
-        third_party_data_collection_scan_result, tracker_detection_scan_result,
-        fingerprinting_scan_result, referrer_dnt_scan_result,
-        data_leakage_scan_result, dnt_scan_result, cookie_scan_result,
-        weights=PRECONFIGURED_WEIGHTS["random"]
-    )
+    def stored_events(record, seen=()):
+        for key, name in SCANNERS:
+            if key not in seen and f"{key}_scan_result" in record:
+                score, details = split_result(record[f"{key}_scan_result"])
+                yield sse("scanner", scanner_event((key, name, score, details)))
+
+    async def events():
+        if state != EXPIRED:
+            for frame in stored_events(existing):
+                yield frame
+            yield sse("final", existing)
+            return
+        seen = set()
+        with scan_events.subscribe(normalized_url) as queue:
+            # the scan itself is shielded by single-flight: a closed stream
+            # stops listening, not scanning
+            scan = asyncio.ensure_future(scan_url(url, normalized_url))
+            while not (scan.done() and queue.empty()):
+                get = asyncio.ensure_future(queue.get())
+                await asyncio.wait({get, scan}, return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    get.cancel()
+                    continue
+                event, data = get.result()
+                if event == "scanner":
+                    seen.add(data["key"])
+                yield sse(event, data)
+        try:
+            record = scan.result()
+        except Exception as exc:
+            logging.getLogger(__name__).exception("Streamed scan of %s failed", normalized_url)
+            yield sse("error", {"detail": str(exc)})
+            return
+        # a stream that joined after the scan's events were gone still gets them
+        for frame in stored_events(record, seen):
+            yield frame
+        yield sse("final", record)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+async def revalidate(original_url: str, normalized_url: str):
+    try:
+        await scan_url(original_url, normalized_url)
+    except Exception:
+        logging.getLogger(__name__).exception("Background rescan of %s failed", normalized_url)
+    finally:
+        scan_cache.end_revalidate(normalized_url)
+
+async def scan_url(original_url: str, normalized_url: str):
+    """Run every scanner against *original_url*, queue the row and return it.
+
+    Callers that arrive while a scan of the same normalized URL is running
+    wait for that scan instead of starting another.
+    """
+    return await scan_flights.do(normalized_url, lambda: _run_scan(original_url, normalized_url))
+
+def compute_final_scores(by_key):
+    """The five FINAL_SCORES for scanner results by key; missing scanners are left out."""
+    scores = [by_key[spec.key][2] if spec.key in by_key else None for spec in scanners.REGISTRY]
+    final_score_norm = weighted_score(scores, PRECONFIGURED_WEIGHTS["normal"])
+    final_score_privacy = weighted_score(scores, PRECONFIGURED_WEIGHTS["privacy"])
+    final_score_security = weighted_score(scores, PRECONFIGURED_WEIGHTS["security"])
+    final_score_rand = weighted_score(scores, PRECONFIGURED_WEIGHTS["random"])
     final_score_adver = (
         random.choice([10,0])
         if final_score_norm in [4,5,6]
         else 11 - final_score_norm
     )
+    return (final_score_norm, final_score_privacy, final_score_security,
+            final_score_rand, final_score_adver)
+
+def scanner_event(result):
+    key, name, score, details = result
+    return {"key": key, "name": name, "score": score, "details": details}
+
+async def parse_snapshot(snapshot):
+    # Parsing a large page is CPU-heavy, so it runs on the scan executor's
+    # CPU pool; the analyzers then just read the shared indexes
+    await get_scan_executor().cpu.run(lambda: snapshot.document)
+    return snapshot
+
+async def _run_scan(original_url: str, normalized_url: str):
+    # Start timing
+    start_time = datetime.utcnow()
+
+    # Origin-only scans (TLS, HTTPS, directory probes, vulnerability
+    # cross-reference, header checks) are reused across the whole site;
+    # only what the remaining scanners need is fetched, probed and parsed
+    cached = scan_cache.get_origin(original_url) or {}
+    pending = [spec for spec in scanners.REGISTRY if spec.key not in cached]
+
+    # /log/stream subscribers see each result as it lands, with the
+    # weighted scores of everything finished so far
+    done = dict(cached)
+
+    def publish(result):
+        done[result[0]] = result
+        scan_events.publish(normalized_url, "scanner", scanner_event(result))
+        scan_events.publish(normalized_url, "provisional", {
+            "url": normalized_url, "completed": len(done), "total": len(scanners.REGISTRY),
+            **dict(zip(FINAL_SCORES, compute_final_scores(done))),
+        })
+
+    def on_stage(name, result):
+        if name.startswith("scan:"):
+            publish(result)
+
+    scan_events.begin(normalized_url)
+    for result in scanners.in_order(cached, [s for s in scanners.REGISTRY if s.key in cached]):
+        publish(result)
+
+    # The vulnerability cross-reference looks at the site root, so only
+    # fetch that separately when the page is somewhere else on the site
+    root_url = get_base_url(original_url)
+    if normalize_url(root_url) == normalize_url(original_url):
+        root_url = None
+
+    # Every stage starts as soon as its inputs exist: header checks run
+    # while the page is parsed, the TLS handshake and the probes overlap both
+    graph = plan_scan(pending, original_url, root_url,
+                      fetch=lambda url: fetch_snapshot_async(url, headers=DEFAULT_REQUEST_HEADERS),
+                      parse=parse_snapshot, probe_tls=probe_snapshot_async,
+                      graph=ScanGraph(on_done=on_stage))
+    latest_scans.pop(normalized_url, None)     # an older scan's late results are stale now
+
+    # Nothing the scan starts – stage, scanner or request – runs past
+    # SCAN_DEADLINE; /log answers by RESPONSE_DEADLINE with what has finished
+    with deadline_scope(SCAN_DEADLINE):
+        try:
+            outputs = await graph.run(timeout=RESPONSE_DEADLINE)
+        finally:
+            scan_events.end(normalized_url)
+        record = store_scan(graph, original_url, normalized_url, cached, pending,
+                            outputs, start_time)
+        if graph.unfinished:
+            # the stragglers carry on; their results replace the partial row
+            token = latest_scans[normalized_url] = object()
+            asyncio.ensure_future(complete_scan(graph, token, original_url, normalized_url,
+                                                cached, pending, outputs, start_time))
+    return record
+
+async def complete_scan(graph, token, original_url, normalized_url, cached, pending,
+                        outputs, start_time):
+    try:
+        outputs = {**outputs, **await graph.finish(timeout=remaining())}
+        # a newer scan of the URL wins over this one's late results
+        if latest_scans.get(normalized_url) is token:
+            store_scan(graph, original_url, normalized_url, cached, pending, outputs, start_time)
+    except Exception:
+        logging.getLogger(__name__).exception("Completing the scan of %s failed", normalized_url)
+    finally:
+        if latest_scans.get(normalized_url) is token:
+            del latest_scans[normalized_url]
+
+def store_scan(graph, original_url, normalized_url, cached, pending, outputs, start_time):
+    """Score what *outputs* holds (missing scanners count as incomplete) and queue the row."""
+    page = outputs.get("fetch:page")
+    by_key = dict(cached)
+    for spec in pending:
+        by_key[spec.key] = outputs.get(f"scan:{spec.key}") or spec.incomplete()
+
+    trace = graph.trace()
+    scan_traces.put(normalized_url, trace)
+    logging.getLogger(__name__).debug("Scan of %s took %.1f ms; critical path %s",
+                                      normalized_url, trace["total_ms"],
+                                      " -> ".join(trace["critical_path"]))
+
+    # Don't let an unreachable site, or a half-finished origin scan, pin
+    # its result for the origin TTL
+    if not cached and page is not None and page.error is None \
+            and not any(scanners.is_incomplete(by_key[key]) for key in scanners.ORIGIN_KEYS):
+        scan_cache.put_origin(original_url, by_key)
+
+    results = scanners.in_order(by_key)
+
+    # Compute final scores; incomplete scanners are left out and the
+    # weights renormalized over the ones that finished
+    final_scores = compute_final_scores(by_key)
 
     # Stop timing
     duration = (datetime.utcnow() - start_time).total_seconds()
 
-    # Insert into DB
-    insert_log(
-        normalized_url,
-        "Passive XSS Security Scan", xss_scan_result,
-        "Passive Vulnerability Cross-Reference Scan", vuln_scan_result,
-        "Passive Privacy Tracker Script Scan", privacy_tracker_scan_result,
-        "Passive Privacy Third-Party Script Evaluation Scan", privacy_third_party_script_scan_result,
-        "Passive SSL/TLS Certificate Validation Scan", ssl_scan_result,
-        "Passive SQL Injection Security Scan", sql_scan_result,
-        "Passive Security Headers Scan", headers_scan_result,
-        "Passive Privacy & Tracker Audit Scan", privacy_audit_scan_result,
-        "Passive Performance & Configuration Analysis Scan", performance_scan_result,
-        "Passive Outdated Plugin Security Scan", outdated_scan_result,
-        "Passive Mixed Content Detection Scan", mixed_scan_result,
-        "Passive Directory Listing Security Scan", directory_scan_result,
-        "Passive CSRF Security Scan", csrf_scan_result,
-        "Passive CSP Security Scan", csp_scan_result,
-        "Passive HTTPS Security Scan", https_scan_result,
-        "Passive Third-Party Data Collection Scan", third_party_data_collection_scan_result,
-        "Passive Tracker Detection Scan", tracker_detection_scan_result,
-        "Passive Fingerprinting Detection Scan", fingerprinting_scan_result,
-        "Passive Referrer & DNT Analysis Scan", referrer_dnt_scan_result,
-        "Passive Data Leakage HTTP Headers Scan", data_leakage_scan_result,
-        "Passive Do Not Track Support Scan", dnt_scan_result,
-        "Passive Cookie Privacy Scan", cookie_scan_result,
-        final_score_norm, final_score_privacy, final_score_security,
-        final_score_rand, final_score_adver,
-        duration
-    )
+    # Queue for the next batched write; the record is readable immediately
+    return write_behind.submit(normalized_url, results, final_scores, duration)
 
-    # Return the full record (including all *_scan_name fields) on first scan
-    log_access(request, normalized_url)
-    return get_log_by_url(normalized_url)
+class LogQuery(BaseModel):
+    limit: int = LOG_PAGE_SIZE
+    cursor: Optional[str] = None
+    domain: Optional[str] = None
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+    scanner: Optional[str] = None
+    sort: str = "timestamp"
+    order: str = "desc"
+
+async def fetch_log_page(query: LogQuery):
+    if query.order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    filters = query.model_dump(exclude={"order"})
+    try:
+        logs_data, next_cursor = await list_logs_async(descending=query.order == "desc", **filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # the default first page also shows scans still waiting for their batch
+    if query.cursor is None and query.sort == "timestamp" and query.order == "desc" \
+            and not any((query.domain, query.scanner, query.min_score is not None,
+                         query.max_score is not None)):
+        logs_data = write_behind.merge(logs_data)
+    return logs_data, next_cursor
 
 @app.get("/logs", response_class=HTMLResponse)
-async def view_logs(request: Request):
-    logs_data = get_all_logs()
-    return templates.TemplateResponse("logs.html", {"request": request, "logs": logs_data})
+async def view_logs(request: Request, query: LogQuery = Depends()):
+    logs_data, next_cursor = await fetch_log_page(query)
+    next_url = None
+    if next_cursor:
+        params = {k: v for k, v in query.model_dump().items() if v is not None}
+        next_url = request.url.include_query_params(**{**params, "cursor": next_cursor})
+    return templates.TemplateResponse("logs.html", {
+        "request": request, "logs": logs_data, "query": query,
+        "sorts": LOG_SORTS, "scanners": SCANNERS, "next_url": next_url,
+    })
+
+@app.get("/logs/export")
+async def export_log_rows(format: str = "csv", details: bool = False,
+                          domain: Optional[str] = None, scanner: Optional[str] = None,
+                          min_score: Optional[float] = None, max_score: Optional[float] = None):
+    try:
+        export_logs.check_format(format)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except ImportError:
+        raise HTTPException(status_code=501, detail=f"{format} export is not available on this server")
+    # a sync generator: Starlette pulls each chunk on a worker thread, so the
+    # SQLite reads and encoding stay off the event loop
+    chunks = export_logs.export(format, details=details, domain=domain, scanner=scanner,
+                                min_score=min_score, max_score=max_score)
+    return StreamingResponse(chunks, media_type=export_logs.MEDIA_TYPES[format], headers={
+        "Content-Disposition": f'attachment; filename="scan_logs.{format}"',
+    })
+
+@app.get("/api/logs")
+async def api_logs(query: LogQuery = Depends()):
+    logs_data, next_cursor = await fetch_log_page(query)
+    return {"logs": logs_data, "next_cursor": next_cursor}
+
+@app.get("/trend")
+async def score_trend(url: str, since: Optional[str] = None, until: Optional[str] = None,
+                      scanner: Optional[str] = None):
+    normalized_url = normalize_url(url)
+    points = await get_trend_async(normalized_url, since, until, scanner)
+    return {"url": normalized_url, "points": points}
+
+@app.get("/scan_trace")
+async def scan_trace(url: str):
+    normalized_url = normalize_url(url)
+    trace = scan_traces.get(normalized_url)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No recent scan of this URL")
+    return {"url": normalized_url, **trace}
+
+@app.get("/metrics/scan_executor")
+async def scan_executor_metrics():
+    return get_scan_executor().stats()
 
 @app.get("/Passive_CSP_Security_Scanner_Fail", response_class=HTMLResponse)
 async def show_fail_page(request: Request):
@@ -0,0 +1,98 @@
+"""
+Checks for async_db – database calls leave the event loop free.
+
+– temporary SQLite file
+– std-lib only
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import async_db
+import database
+
+
+def _row(url, score):
+    args = [url]
+    for i in range(22):
+        args += [f"scan {i}", f"Score: {score}/10 - ok"]
+    return args + [score] * 5 + [0.1]
+
+
+class AsyncDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(database, "DB_FILE", os.path.join(tmp.name, "test.sqlite"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, coro_fn):
+        async def runner():
+            try:
+                return await coro_fn()
+            finally:
+                await async_db.close_db()
+        return asyncio.run(runner())
+
+    def test_round_trip(self):
+        async def scenario():
+            await async_db.init_db_async()
+            await async_db.insert_log_async(*_row("https://a.example/", 6))
+            one = await async_db.get_log_by_url_async("https://a.example/")
+            every = await async_db.get_all_logs_async()
+            return one, every
+
+        one, every = self._run(scenario)
+        self.assertEqual(one["final_score_norm"], 6)
+        self.assertEqual([r["url"] for r in every], ["https://a.example/"])
+
+    def test_calls_run_off_the_loop_thread(self):
+        seen = []
+
+        def probe(url):
+            seen.append(threading.current_thread().name)
+            time.sleep(0.05)
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.ensure_future(ticker())
+            with mock.patch.object(database, "get_log_by_url", probe):
+                await async_db.get_log_by_url_async("x")
+            task.cancel()
+            return ticks
+
+        ticks = self._run(scenario)
+        self.assertTrue(seen[0].startswith("db-read"))
+        self.assertGreater(ticks, 3)          # the loop kept running meanwhile
+
+    def test_writes_share_one_thread(self):
+        names = set()
+
+        def record(*args):
+            names.add(threading.current_thread().name)
+
+        async def scenario():
+            with mock.patch.object(database, "insert_log", record):
+                await asyncio.gather(*(async_db.insert_log_async(i) for i in range(8)))
+
+        self._run(scenario)
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names.pop().startswith("db-write"))
+
+
+if __name__ == "__main__":
+    unittest.main()
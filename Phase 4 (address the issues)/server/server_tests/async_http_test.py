@@ -0,0 +1,173 @@
+"""
+Checks for async_http – the pooled asyncio HTTP layer.
+
+– offline: httpx.MockTransport stands in for the network
+– std-lib unittest, no pytest plugins needed
+"""
+
+import asyncio
+import unittest
+
+import httpx
+from urllib3.util.retry import Retry
+
+import async_http
+from async_http import AsyncHTTPEngine, fetch_snapshot_async
+from transport import DEFAULT_RETRY, TransportManager
+
+
+def _run(coro_fn):
+    """Run *coro_fn* with a mock-backed engine installed for this loop."""
+    async def runner():
+        try:
+            return await coro_fn()
+        finally:
+            await async_http.close_engine()
+    return asyncio.run(runner())
+
+
+class SnapshotFromHttpxTest(unittest.TestCase):
+
+    def test_snapshot_matches_sync_shape(self):
+        def handler(request):
+            if request.url.path == "/old":
+                return httpx.Response(301, headers={"Location": "https://site.example/new"})
+            return httpx.Response(
+                200,
+                headers=[("Content-Type", "text/html"),
+                         ("Set-Cookie", "sid=1; Secure; HttpOnly"),
+                         ("Set-Cookie", "_ga=2")],
+                text="<script>var a=1</script>",
+            )
+
+        async def go():
+            async_http.install_engine(AsyncHTTPEngine(transport=httpx.MockTransport(handler)))
+            return await fetch_snapshot_async("https://site.example/old", headers={"DNT": "1"})
+
+        snap = _run(go)
+        self.assertTrue(snap.ok)
+        self.assertEqual(snap.final_url, "https://site.example/new")
+        self.assertEqual(snap.history, ("https://site.example/old",))
+        self.assertEqual(snap.headers["content-type"], "text/html")
+        self.assertEqual(snap.set_cookie, ("sid=1; Secure; HttpOnly", "_ga=2"))
+        # cookie objects, like requests' jar, not bare names
+        self.assertEqual(sorted(c.name for c in snap.cookies), ["_ga", "sid"])
+        self.assertEqual(snap.http_version, 11)
+        self.assertEqual(len(snap.document.inline_scripts), 1)
+
+    def test_fetch_errors_are_captured(self):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        async def go():
+            async_http.install_engine(AsyncHTTPEngine(transport=httpx.MockTransport(handler)))
+            return await fetch_snapshot_async("https://down.example/")
+
+        snap = _run(go)
+        self.assertFalse(snap.ok)
+        self.assertIn("refused", snap.error)
+
+
+class PerHostLimitTest(unittest.TestCase):
+
+    def test_concurrency_is_bounded_per_host(self):
+        in_flight = {"a.example": 0, "b.example": 0}
+        peak = dict(in_flight)
+
+        async def handler(request):
+            host = request.url.host
+            in_flight[host] += 1
+            peak[host] = max(peak[host], in_flight[host])
+            await asyncio.sleep(0.01)
+            in_flight[host] -= 1
+            return httpx.Response(200, text="ok")
+
+        async def go():
+            engine = AsyncHTTPEngine(per_host_limit=2, transport=httpx.MockTransport(handler))
+            async_http.install_engine(engine)
+            urls = [f"https://{h}/{i}" for h in in_flight for i in range(6)]
+            await asyncio.gather(*(engine.get(u) for u in urls))
+
+        _run(go)
+        self.assertEqual(peak, {"a.example": 2, "b.example": 2})
+
+    def test_idle_host_limits_are_bounded(self):
+        release = asyncio.Event()
+
+        async def handler(request):
+            if request.url.host == "busy.example":
+                await release.wait()
+            return httpx.Response(200, text="ok")
+
+        async def go():
+            engine = AsyncHTTPEngine(per_host_limit=1, max_tracked_hosts=3,
+                                     transport=httpx.MockTransport(handler))
+            async_http.install_engine(engine)
+            busy = asyncio.ensure_future(engine.get("https://busy.example/"))
+            await asyncio.sleep(0.01)
+            for i in range(10):
+                await engine.get(f"https://{i}.example/")
+            tracked = list(engine._host_slots)
+            release.set()
+            await busy
+            return tracked
+
+        tracked = _run(go)
+        # the oldest host is kept while a request holds its slot
+        self.assertEqual(tracked, ["busy.example", "8.example", "9.example"])
+
+
+class RetryTest(unittest.TestCase):
+
+    def _calls(self, engine_kwargs, outcomes, method="GET"):
+        """Run one request against a handler replaying *outcomes*; (status or error, calls)."""
+        calls = []
+
+        def handler(request):
+            outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+            calls.append(request.method)
+            if isinstance(outcome, type):
+                raise outcome("boom", request=request)
+            return httpx.Response(outcome)
+
+        async def go():
+            engine = AsyncHTTPEngine(transport=httpx.MockTransport(handler), **engine_kwargs)
+            async_http.install_engine(engine)
+            try:
+                return (await engine.request(method, "https://site.example/")).status_code
+            except httpx.TransportError as exc:
+                return type(exc)
+
+        return _run(go), len(calls)
+
+    def test_no_policy_no_retries(self):
+        self.assertEqual(self._calls({}, [503, 200]), (503, 1))
+
+    def test_status_and_connect_failures_are_retried(self):
+        retry = Retry(total=2, backoff_factor=0, status_forcelist=(503,))
+        self.assertEqual(self._calls({"retry": retry}, [503, 503, 200]), (200, 3))
+        self.assertEqual(self._calls({"retry": retry}, [httpx.ConnectError, 200]), (200, 2))
+
+    def test_retries_are_bounded(self):
+        retry = Retry(total=2, backoff_factor=0, status_forcelist=(503,))
+        self.assertEqual(self._calls({"retry": retry}, [503]), (503, 3))
+        self.assertEqual(self._calls({"retry": retry}, [httpx.ConnectError]),
+                         (httpx.ConnectError, 3))
+
+    def test_default_policy_skips_reads_and_unlisted_methods(self):
+        retry = DEFAULT_RETRY.new(backoff_factor=0)
+        self.assertEqual(self._calls({"retry": retry}, [httpx.ReadTimeout, 200]),
+                         (httpx.ReadTimeout, 1))
+        self.assertEqual(self._calls({"retry": retry}, [503, 200], method="POST"), (503, 1))
+
+    def test_engine_follows_installed_transport(self):
+        manager = TransportManager(pool_maxsize=3)
+        self.addCleanup(manager.close)
+        engine = AsyncHTTPEngine.from_transport(manager)
+        self.assertEqual(engine.per_host_limit, 3)
+        self.assertIs(engine.retry, manager.max_retries)
+        asyncio.run(engine.aclose())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,464 @@
+"""
+Checks for database – schema migrations keep stored scans across restarts.
+
+– temporary SQLite file, no server
+– std-lib only
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import database
+
+_SCANS = 22
+
+
+def _row(url, score):
+    args = [url]
+    for i in range(_SCANS):
+        args += [f"scan {i}", f"Score: {score}/10 - ok"]
+    return args + [score] * 5 + [0.1]
+
+
+def _insert(url, score=5.0):
+    database.insert_log(*_row(url, score))
+
+
+def _legacy_insert(db_file, *rows):
+    """Write rows the way pre-index builds could: plain INSERTs, duplicates allowed."""
+    conn = sqlite3.connect(db_file)
+    for url, score in rows:
+        conn.execute(f"INSERT INTO logs VALUES ({', '.join('?' * 51)}, CURRENT_TIMESTAMP)",
+                     _row(url, score))
+    conn.commit()
+    conn.close()
+
+
+class MigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_file = os.path.join(tmp.name, "test.sqlite")
+        patcher = mock.patch.object(database, "DB_FILE", self.db_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_connections)
+
+    def _version(self):
+        conn = sqlite3.connect(self.db_file)
+        try:
+            return database.schema_version(conn)
+        finally:
+            conn.close()
+
+    def test_fresh_database_reaches_current_version(self):
+        database.init_db()
+        self.assertEqual(self._version(), database.SCHEMA_VERSION)
+
+    def test_restart_keeps_rows(self):
+        database.init_db()
+        _insert("https://a.example/")
+
+        database.init_db()
+        row = database.get_log_by_url("https://a.example/")
+        self.assertIsNotNone(row)
+        self.assertEqual(row["final_score_norm"], 5.0)
+
+    def test_unversioned_database_is_adopted(self):
+        # databases written before migrations existed have user_version 0
+        conn = sqlite3.connect(self.db_file)
+        database._create_logs(conn.cursor())
+        conn.commit()
+        conn.close()
+        _legacy_insert(self.db_file, ("https://legacy.example/", 5.0))
+
+        database.init_db()
+        self.assertEqual(self._version(), database.SCHEMA_VERSION)
+        self.assertIsNotNone(database.get_log_by_url("https://legacy.example/"))
+
+    def test_newer_database_is_refused(self):
+        conn = sqlite3.connect(self.db_file)
+        conn.execute(f"PRAGMA user_version = {database.SCHEMA_VERSION + 1}")
+        conn.close()
+
+        with self.assertRaises(RuntimeError):
+            database.init_db()
+
+    def test_failed_migration_rolls_back(self):
+        def broken(cursor):
+            cursor.execute("CREATE TABLE half_done (x)")
+            raise sqlite3.OperationalError("boom")
+
+        database.init_db()
+        with mock.patch.object(database, "MIGRATIONS", database.MIGRATIONS + [broken]), \
+                mock.patch.object(database, "SCHEMA_VERSION", database.SCHEMA_VERSION + 1):
+            with self.assertRaises(sqlite3.OperationalError):
+                database.init_db()
+
+        self.assertEqual(self._version(), database.SCHEMA_VERSION)
+        conn = sqlite3.connect(self.db_file)
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        conn.close()
+        self.assertNotIn("half_done", tables)
+
+
+class UpsertTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(database, "DB_FILE", os.path.join(tmp.name, "test.sqlite"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_connections)
+        database.init_db()
+
+    def test_rescan_updates_the_existing_row(self):
+        _insert("https://a.example/", score=3.0)
+        _insert("https://a.example/", score=8.0)
+
+        logs = database.get_all_logs()
+        self.assertEqual(len(logs), 1)
+        self.assertEqual(logs[0]["final_score_norm"], 8.0)
+
+    def test_url_lookup_uses_the_index(self):
+        conn = sqlite3.connect(database.DB_FILE)
+        plan = " ".join(str(r) for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM urls WHERE url = ?", ("x",)))
+        conn.close()
+        self.assertIn("USING INDEX", plan)
+
+    def test_duplicate_legacy_rows_are_collapsed(self):
+        os.remove(database.DB_FILE)
+        with mock.patch.object(database, "MIGRATIONS", database.MIGRATIONS[:1]):
+            database.init_db()
+        _legacy_insert(database.DB_FILE, ("https://dup.example/", 1.0),
+                       ("https://dup.example/", 9.0))
+
+        database.init_db()
+        logs = database.get_all_logs()
+        self.assertEqual(len(logs), 1)
+        self.assertEqual(logs[0]["final_score_norm"], 9.0)
+
+
+class NormalizedSchemaTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_file = os.path.join(tmp.name, "test.sqlite")
+        patcher = mock.patch.object(database, "DB_FILE", self.db_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_connections)
+
+    def test_record_shape_matches_the_old_columns(self):
+        database.init_db()
+        _insert("https://a.example/", score=7)
+
+        record = database.get_log_by_url("https://a.example/")
+        keys = ["url"]
+        for key, _ in database.SCANNERS:
+            keys += [f"{key}_scan_name", f"{key}_scan_result"]
+        keys += list(database.FINAL_SCORES) + ["duration", "timestamp"]
+        self.assertEqual(list(record), keys)
+        self.assertEqual(record["xss_scan_name"], "scan 0")
+        self.assertEqual(record["xss_scan_result"], "Score: 7/10 - ok")
+
+    def test_insert_log_keeps_its_argument_order(self):
+        # positional pairs follow the old columns (dnt before data_leakage),
+        # whatever order the registry lists the scanners in
+        database.init_db()
+        _insert("https://a.example/")
+        record = database.get_log_by_url("https://a.example/")
+        self.assertEqual(record["dnt_scan_name"], "scan 19")
+        self.assertEqual(record["data_leakage_scan_name"], "scan 20")
+
+    def test_scores_are_stored_as_numbers(self):
+        database.init_db()
+        _insert("https://a.example/", score=4)
+
+        conn = sqlite3.connect(self.db_file)
+        scores = {r[0] for r in conn.execute("SELECT score FROM scan_results")}
+        conn.close()
+        self.assertEqual(scores, {4})
+
+    def test_legacy_rows_are_migrated(self):
+        with mock.patch.object(database, "MIGRATIONS", database.MIGRATIONS[:2]):
+            database.init_db()
+        _legacy_insert(self.db_file, ("https://old.example/", 6))
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("UPDATE logs SET sql_scan_result = 'not a score line'")
+        conn.commit()
+        conn.close()
+
+        database.init_db()
+        record = database.get_log_by_url("https://old.example/")
+        self.assertEqual(record["xss_scan_result"], "Score: 6/10 - ok")
+        self.assertEqual(record["sql_scan_result"], "not a score line")
+        self.assertEqual(record["final_score_norm"], 6)
+
+    def test_legacy_swapped_columns_follow_their_names(self):
+        # old server.py passed data_leakage and dnt to insert_log in swapped order
+        with mock.patch.object(database, "MIGRATIONS", database.MIGRATIONS[:2]):
+            database.init_db()
+        _legacy_insert(self.db_file, ("https://old.example/", 6))
+        conn = sqlite3.connect(self.db_file)
+        conn.execute('''
+            UPDATE logs SET
+                dnt_scan_name = 'Passive Data Leakage HTTP Headers Scan',
+                dnt_scan_result = 'Score: 7/10 - Server: Server',
+                data_leakage_scan_name = 'Passive Do Not Track Support Scan',
+                data_leakage_scan_result = 'Score: 4/10 - No DNT header echoed'
+        ''')
+        conn.commit()
+        conn.close()
+
+        database.init_db()
+        record = database.get_log_by_url("https://old.example/")
+        self.assertEqual(record["dnt_scan_name"], "Passive Do Not Track Support Scan")
+        self.assertEqual(record["dnt_scan_result"], "Score: 4/10 - No DNT header echoed")
+        self.assertEqual(record["data_leakage_scan_name"], "Passive Data Leakage HTTP Headers Scan")
+        self.assertEqual(record["data_leakage_scan_result"], "Score: 7/10 - Server: Server")
+        self.assertEqual(record["xss_scan_name"], "scan 0")      # unknown names keep their column
+
+    def test_new_scanner_needs_no_schema_change(self):
+        database.init_db()
+        database.save_scan("https://a.example/",
+                           [("xss", "XSS", 5, "fine"), ("brand_new", "Brand New Scan", 9, "")],
+                           (5, 5, 5, 5, 5), 0.2)
+
+        record = database.get_log_by_url("https://a.example/")
+        self.assertEqual(record["brand_new_scan_name"], "Brand New Scan")
+        self.assertEqual(record["brand_new_scan_result"], "Score: 9/10 - ")
+
+    def test_split_result_round_trip(self):
+        for text in ("Score: 3/10 - a; b", "Score: 10/10 - ", "Score: 2/10 - x - y\nz"):
+            self.assertEqual(database.format_result(*database.split_result(text)), text)
+        self.assertEqual(database.split_result("garbage"), (None, "garbage"))
+
+
+class ListLogsTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(database, "DB_FILE", os.path.join(tmp.name, "test.sqlite"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_connections)
+        database.init_db()
+        for i, host in enumerate(["a.example", "shop.a.example", "b.example", "nota.example"]):
+            _insert(f"https://{host}/", score=i + 2)
+
+    def _walk(self, **filters):
+        urls, cursor = [], None
+        while True:
+            page, cursor = database.list_logs(limit=1, cursor=cursor, **filters)
+            urls += [row["url"] for row in page]
+            if cursor is None:
+                return urls
+
+    def test_pages_cover_every_row_once(self):
+        everything = [r["url"] for r in database.list_logs(limit=100)[0]]
+        self.assertEqual(sorted(self._walk()), sorted(everything))
+        self.assertEqual(len(everything), 4)
+
+    def test_sorting_pushed_down(self):
+        self.assertEqual(self._walk(sort="score", descending=False), [
+            "https://a.example/", "https://shop.a.example/",
+            "https://b.example/", "https://nota.example/",
+        ])
+
+    def test_domain_includes_subdomains_only(self):
+        self.assertEqual(sorted(self._walk(domain="A.example")),
+                         ["https://a.example/", "https://shop.a.example/"])
+
+    def test_score_range_overall_and_per_scanner(self):
+        self.assertEqual(sorted(self._walk(min_score=3, max_score=4)),
+                         ["https://b.example/", "https://shop.a.example/"])
+        self.assertEqual(self._walk(scanner="csp", min_score=5), ["https://nota.example/"])
+
+    def test_only_summary_columns(self):
+        [row], _ = database.list_logs(limit=1)
+        self.assertEqual(set(row), {"url", "duration", "timestamp", *database.FINAL_SCORES})
+
+    def test_bad_input_is_rejected(self):
+        with self.assertRaises(ValueError):
+            database.list_logs(sort="url; DROP TABLE urls")
+        with self.assertRaises(ValueError):
+            database.list_logs(cursor="not-a-cursor")
+
+
+class DetailStorageTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_file = os.path.join(tmp.name, "test.sqlite")
+        patcher = mock.patch.object(database, "DB_FILE", self.db_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_connections)
+        database.init_db()
+
+    def _long_insert(self, url):
+        args = [url]
+        for i in range(22):
+            args += [f"scan {i}", f"Score: 4/10 - Missing X-Frame-Options (-2); "
+                                  f"No CSP header found. Major security risk! ({i})"]
+        database.insert_log(*args, *([4] * 5), 0.1)
+
+    def _payload(self, url):
+        conn = sqlite3.connect(self.db_file)
+        [payload] = conn.execute("SELECT d.payload FROM scan_details d JOIN urls u ON u.id = d.url_id"
+                                 " WHERE u.url = ? LIMIT 1", (url,)).fetchone()
+        conn.close()
+        return payload
+
+    def test_details_round_trip(self):
+        self._long_insert("https://a.example/")
+        record = database.get_log_by_url("https://a.example/")
+        self.assertTrue(record["csp_scan_result"].endswith("risk! (13)"))
+        self.assertIsInstance(self._payload("https://a.example/"), bytes)
+
+    def test_dictionary_trained_once_enough_details_exist(self):
+        self.assertIsNone(database.train_detail_dictionary())       # too few yet
+        with mock.patch.object(database, "DICT_MIN_SAMPLES", 40):
+            for i in range(2):
+                self._long_insert(f"https://{i}.example/")
+            dict_id = database.train_detail_dictionary()
+            self.assertIsNotNone(dict_id)
+            self.assertIsNone(database.train_detail_dictionary())   # already trained
+
+        self._long_insert("https://after.example/")
+        self.assertNotIn(b"X-Frame-Options", self._payload("https://after.example/"))
+        database.close_connections()                                 # cold codec cache
+        for url in ("https://0.example/", "https://after.example/"):
+            self.assertIn("Major security risk", database.get_log_by_url(url)["xss_scan_result"])
+
+    def test_score_queries_skip_details(self):
+        conn = sqlite3.connect(self.db_file)
+        for sql in (database._TREND_QUERY, "SELECT score FROM scan_results WHERE scanner_id = 1"):
+            plan = " ".join(str(r) for r in conn.execute(
+                "EXPLAIN QUERY PLAN " + sql, {"url": "x", "since": "2026", "until": "2027"}))
+            self.assertNotIn("scan_details", plan)
+        conn.close()
+
+    def test_legacy_details_migrated(self):
+        os.remove(self.db_file)
+        database.close_connections()
+        with mock.patch.object(database, "MIGRATIONS", database.MIGRATIONS[:5]):
+            database.init_db()
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("INSERT INTO urls (url, final_score_norm, final_score_privacy, final_score_security,"
+                     " final_score_rand, final_score_adver, duration) VALUES ('https://old/', 1, 1, 1, 1, 1, 0)")
+        conn.execute("INSERT INTO scan_results (url_id, scanner_id, score, details) VALUES (1, 1, 3, 'old words')")
+        conn.commit()
+        conn.close()
+
+        database.init_db()
+        self.assertEqual(database.get_log_by_url("https://old/")["xss_scan_result"],
+                         "Score: 3/10 - old words")
+
+
+class HistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_file = os.path.join(tmp.name, "test.sqlite")
+        patcher = mock.patch.object(database, "DB_FILE", self.db_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_connections)
+        database.init_db()
+        _insert("https://a.example/", score=5)
+
+    def _backfill(self, *points, replace=True):
+        """Raw history rows for scanner 1 of https://a.example/ at given times."""
+        conn = sqlite3.connect(self.db_file)
+        if replace:
+            conn.execute("DELETE FROM scan_history")
+        conn.executemany(
+            "INSERT INTO scan_history (url_id, scanned_at, scanner_id, score, scored_samples) "
+            "VALUES (1, ?, 1, ?, ?)",
+            [(at, score, int(score is not None)) for at, score in points])
+        conn.commit()
+        conn.close()
+
+    def test_rescans_append_history(self):
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("UPDATE scan_history SET scanned_at = '2020-01-01 00:00:00'")
+        conn.commit()
+        conn.close()
+        _insert("https://a.example/", score=8)
+
+        trend = database.get_trend("https://a.example/", scanner="xss")
+        self.assertEqual([p["scores"]["xss"] for p in trend], [5, 8])
+        self.assertEqual(len(database.get_all_logs()), 1)     # latest view unchanged
+
+    def test_compaction_rolls_up_by_day_then_week(self):
+        self._backfill(
+            ("2026-01-05 09:00:00", 2), ("2026-01-05 18:00:00", 4),   # Monday
+            ("2026-01-07 12:00:00", 9),                               # same week
+            ("2026-06-01 10:00:00", 6), ("2026-06-01 11:00:00", 8),   # daily range
+            ("2026-07-01 10:00:00", 7),                               # still raw
+        )
+        database.compact_history(now="2026-07-10 12:00:00", raw_days=30, daily_days=90)
+
+        trend = [(p["scanned_at"], p["resolution"], p["samples"], p["scores"]["xss"])
+                 for p in database.get_trend("https://a.example/")]
+        self.assertEqual(trend, [
+            ("2026-01-05 00:00:00", "week", 3, 5.0),
+            ("2026-06-01 00:00:00", "day", 2, 7.0),
+            ("2026-07-01 10:00:00", "raw", 1, 7.0),
+        ])
+
+    def test_compaction_is_idempotent(self):
+        self._backfill(("2026-01-05 09:00:00", 2), ("2026-01-06 09:00:00", 4))
+        database.compact_history(now="2026-07-10", raw_days=30, daily_days=90)
+        database.compact_history(now="2026-07-10", raw_days=30, daily_days=90)
+
+        [point] = database.get_trend("https://a.example/")
+        self.assertEqual((point["samples"], point["scores"]["xss"]), (2, 3.0))
+
+    def test_compaction_averages_only_scored_samples(self):
+        # an incomplete scan stores no score: it counts as a sample, not as a zero
+        self._backfill(("2026-01-05 09:00:00", 8), ("2026-01-05 10:00:00", None),
+                       ("2026-01-06 09:00:00", 4))
+        database.compact_history(now="2026-07-10", raw_days=30, daily_days=90)
+        [point] = database.get_trend("https://a.example/")
+        self.assertEqual((point["samples"], point["scores"]["xss"]), (3, 6.0))
+
+        # late rows for the same week land on the existing weekly row
+        self._backfill(("2026-01-07 09:00:00", None), ("2026-01-08 09:00:00", 9), replace=False)
+        database.compact_history(now="2026-07-10", raw_days=30, daily_days=90)
+        [point] = database.get_trend("https://a.example/")
+        self.assertEqual((point["samples"], point["scores"]["xss"]), (5, 7.0))
+
+    def test_compaction_keeps_unscored_buckets_null(self):
+        self._backfill(("2026-01-05 09:00:00", None), ("2026-01-05 10:00:00", None))
+        database.compact_history(now="2026-07-10", raw_days=30, daily_days=90)
+        [point] = database.get_trend("https://a.example/")
+        self.assertEqual((point["samples"], point["scores"]["xss"]), (2, None))
+
+    def test_trend_window_and_index(self):
+        self._backfill(("2026-01-01 00:00:00", 1), ("2026-02-01 00:00:00", 2))
+        trend = database.get_trend("https://a.example/", since="2026-01-15", until="2026-03-01")
+        self.assertEqual([p["scores"]["xss"] for p in trend], [2])
+
+        conn = sqlite3.connect(self.db_file)
+        plan = " ".join(str(r) for r in conn.execute(
+            "EXPLAIN QUERY PLAN " + database._TREND_QUERY,
+            {"url": "x", "since": "2026-01-01", "until": "2026-02-01"}))
+        conn.close()
+        self.assertIn("PRIMARY KEY (url_id=? AND scanned_at>? AND scanned_at<?)", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
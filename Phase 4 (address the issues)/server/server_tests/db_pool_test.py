@@ -0,0 +1,82 @@
+"""
+Checks for db_pool – per-thread connections, WAL, readers never blocked.
+
+– temporary SQLite file
+– std-lib only
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from db_pool import ConnectionManager, enable_wal
+
+
+class ConnectionManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_file = os.path.join(tmp.name, "pool.sqlite")
+        conn = sqlite3.connect(self.db_file)
+        enable_wal(conn)
+        conn.execute("CREATE TABLE t (x)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+        conn.close()
+        self.pool = ConnectionManager()
+        self.addCleanup(self.pool.close)
+
+    def _in_thread(self, fn):
+        out = []
+        worker = threading.Thread(target=lambda: out.append(fn()))
+        worker.start()
+        worker.join(5)
+        return out[0]
+
+    def test_one_connection_per_thread(self):
+        here = self.pool.connection(self.db_file)
+        self.assertIs(self.pool.connection(self.db_file), here)
+
+        there = self._in_thread(lambda: self.pool.connection(self.db_file))
+        self.assertIsNot(there, here)
+        self.assertEqual(len(self.pool), 2)
+
+    def test_pragmas_applied(self):
+        conn = self.pool.connection(self.db_file)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)    # NORMAL
+        self.assertEqual(conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+
+    def test_reader_not_blocked_by_open_write(self):
+        writer = self.pool.connection(self.db_file)
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("INSERT INTO t VALUES (2)")
+        try:
+            # uncommitted row is invisible, and the read doesn't wait for it
+            count = self._in_thread(lambda: self.pool.connection(self.db_file)
+                                    .execute("SELECT COUNT(*) FROM t").fetchone()[0])
+            self.assertEqual(count, 1)
+        finally:
+            writer.rollback()
+
+    def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.pool.transaction(self.db_file) as conn:
+                conn.execute("INSERT INTO t VALUES (3)")
+                raise RuntimeError("boom")
+        count = self.pool.connection(self.db_file).execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_close_then_reopen(self):
+        first = self.pool.connection(self.db_file)
+        self.pool.close()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            first.execute("SELECT 1")
+        self.assertIsNot(self.pool.connection(self.db_file), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
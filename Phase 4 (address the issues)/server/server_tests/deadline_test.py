@@ -0,0 +1,53 @@
+"""
+Checks for deadline – per-scan time budgets.
+
+– no network
+– std-lib only
+"""
+
+import asyncio
+import unittest
+
+from deadline import DeadlineExceeded, clamp, deadline_scope, remaining
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def test_no_scope_no_deadline(self):
+        self.assertIsNone(remaining())
+        self.assertEqual(clamp(10), 10)
+
+    def test_clamped_to_what_is_left(self):
+        with deadline_scope(2):
+            self.assertLessEqual(clamp(10), 2)
+            self.assertEqual(clamp(0.5), 0.5)
+        self.assertIsNone(remaining())
+
+    def test_tighter_outer_deadline_wins(self):
+        with deadline_scope(1):
+            with deadline_scope(60):
+                self.assertLessEqual(remaining(), 1)
+
+    def test_exhausted_budget_raises(self):
+        with deadline_scope(0):
+            with self.assertRaises(DeadlineExceeded):
+                clamp(5)
+        self.assertTrue(issubclass(DeadlineExceeded, TimeoutError))
+
+    def test_tasks_inherit_the_deadline(self):
+        async def child():
+            await asyncio.sleep(0)
+            return remaining()
+
+        async def runner():
+            with deadline_scope(3):
+                task = asyncio.ensure_future(child())
+            return await task          # still bounded after the block exits
+
+        left = asyncio.run(runner())
+        self.assertIsNotNone(left)
+        self.assertLessEqual(left, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
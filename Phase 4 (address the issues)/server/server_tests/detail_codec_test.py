@@ -0,0 +1,103 @@
+"""
+Checks for detail_codec – dictionary compression of scan details.
+
+– std-lib only (zstd paths run only when zstandard is installed)
+"""
+
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import detail_codec
+from detail_codec import RAW, ZLIB, ZSTD, DetailCodec
+
+_FINDINGS = [
+    "Missing X-Frame-Options (-2)",
+    "No CSP header found. Major security risk!",
+    "Strict-Transport-Security header missing (-2)",
+    "Cookie 'session' set without the Secure flag",
+    "Referrer-Policy missing; full URLs may leak to third parties",
+]
+
+
+def _samples(n=300):
+    return ["; ".join(_FINDINGS[i % 5:] + _FINDINGS[:i % 5]) for i in range(n)]
+
+
+class DetailCodecTest(unittest.TestCase):
+
+    def _codec(self, *dictionaries):
+        store = dict(dictionaries)
+        codec = DetailCodec(lambda dict_id: store[dict_id])
+        return codec, store
+
+    def test_short_text_stored_raw(self):
+        codec, _ = self._codec()
+        payload = codec.encode("No issues.")
+        self.assertEqual(payload[0], RAW)
+        self.assertEqual(codec.decode(payload), "No issues.")
+
+    def test_round_trip_without_dictionary(self):
+        codec, _ = self._codec()
+        text = _samples(1)[0]
+        self.assertEqual(codec.decode(codec.encode(text)), text)
+
+    def test_dictionary_shrinks_typical_findings(self):
+        plain, _ = self._codec()
+        kind, data = detail_codec.train(_samples(), codec=ZLIB)
+        trained, _ = self._codec((1, (kind, data)))
+        trained.use(1, kind, data)
+
+        text = _samples()[7]
+        with_dict = trained.encode(text)
+        self.assertEqual(trained.decode(with_dict), text)
+        self.assertLess(len(with_dict), len(plain.encode(text)) / 2)
+
+    def test_old_payloads_survive_a_new_dictionary(self):
+        first = detail_codec.train(_samples(), codec=ZLIB)
+        second = detail_codec.train(["something else entirely; " * 4] * 50, codec=ZLIB)
+        codec, _ = self._codec((1, first), (2, second))
+        codec.use(1, *first)
+        text = _samples()[3]
+        old = codec.encode(text)
+        codec.use(2, *second)
+
+        fresh, _ = self._codec((1, first), (2, second))    # nothing cached
+        self.assertEqual(fresh.decode(old), text)
+
+    def test_plain_strings_pass_through(self):
+        codec, _ = self._codec()
+        self.assertEqual(codec.decode("legacy text"), "legacy text")
+        self.assertIsNone(codec.decode(None))
+
+    def test_zstd(self):
+        if detail_codec.zstandard is None:
+            self.skipTest("zstandard not installed")
+        kind, data = detail_codec.train(_samples(2000), codec=ZSTD)
+        codec, _ = self._codec((1, (kind, data)))
+        codec.use(1, kind, data)
+        text = _samples()[11]
+        self.assertEqual(codec.decode(codec.encode(text)), text)
+
+    def test_zstd_objects_are_per_thread(self):
+        if detail_codec.zstandard is None:
+            self.skipTest("zstandard not installed")
+        kind, data = detail_codec.train(_samples(2000), codec=ZSTD)
+        codec, _ = self._codec((1, (kind, data)))
+        codec.use(1, kind, data)
+        mine = codec._zstd_pair(1)
+        theirs = []
+        worker = threading.Thread(target=lambda: theirs.append(codec._zstd_pair(1)))
+        worker.start()
+        worker.join()
+        self.assertIsNot(mine[0], theirs[0][0])
+        self.assertIsNot(mine[1], theirs[0][1])
+
+        texts = _samples(400)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            decoded = list(pool.map(lambda t: codec.decode(codec.encode(t)), texts))
+        self.assertEqual(decoded, texts)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Checks for export_logs – streamed CSV / NDJSON exports.
+
+– temporary SQLite file
+– std-lib only (Parquet is checked only when pyarrow is installed)
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import database
+import export_logs
+
+
+def _insert(url, score):
+    args = [url]
+    for i in range(22):
+        args += [f"scan {i}", f"Score: {score}/10 - finding {i}"]
+    database.insert_log(*args, *([score] * 5), 0.1)
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(database, "DB_FILE", os.path.join(tmp.name, "test.sqlite"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database.close_connections)
+        database.init_db()
+        for i in range(7):
+            _insert(f"https://site{i}.example/", score=i + 1)
+        _insert("https://shop.site1.example/", score=9)
+
+    def test_csv(self):
+        text = b"".join(export_logs.export("csv")).decode()
+        rows = list(csv.DictReader(io.StringIO(text)))
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(rows[0]["url"], "https://site0.example/")
+        self.assertEqual(rows[0]["xss_score"], "1")
+        self.assertNotIn("xss_details", rows[0])
+
+    def test_ndjson_with_filters_and_details(self):
+        chunks = export_logs.export("ndjson", details=True, domain="site1.example")
+        rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+        self.assertEqual([r["url"] for r in rows],
+                         ["https://site1.example/", "https://shop.site1.example/"])
+        self.assertEqual(rows[0]["cookie_details"], "finding 21")
+
+    def test_streams_in_batches(self):
+        batches = list(export_logs.iter_rows(batch_rows=3))
+        self.assertEqual([len(b) for b in batches], [3, 3, 2])
+        # every batch carries whole rows: all 22 scanners present
+        self.assertTrue(all(r["cookie_score"] is not None for b in batches for r in b))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_logs.export("xlsx")
+
+    def test_parquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+        data = b"".join(export_logs.export("parquet", min_score=5))
+        table = pq.read_table(io.BytesIO(data))
+        self.assertEqual(table.num_rows, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
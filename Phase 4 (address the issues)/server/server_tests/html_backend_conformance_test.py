@@ -0,0 +1,99 @@
+"""
+Conformance check for the HTML parser backends.
+
+Every installed backend must give the same tag indexes – and therefore the
+same scanner findings – as the stdlib html.parser on the templates/ pages.
+Backends that are not installed are skipped.
+
+– offline, std-lib only (plus whatever parsers happen to be installed)
+"""
+
+import glob
+import os
+import unittest
+
+import html_document
+from page_snapshot import PageSnapshot
+from Security_scans import (
+    Passive_CSRF_Security_Scanner,
+    Passive_Mixed_Content_Detection_Scanner,
+    Passive_Vulnerability_Cross_Reference_Scanner,
+    Passive_XSS_Security_Scanner,
+)
+from Privacy_scan import (
+    Passive_Do_Not_Track_Support_Scan,
+    Passive_Fingerprinting_Detection_Scan,
+    Passive_Referrer_DNT_Analysis_Scan,
+    Passive_Third_Party_Script_Evaluation_Scanner,
+    Passive_Tracker_Detection_Scan,
+    Passive_Tracker_Script_Scanner,
+)
+
+_TEMPLATES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+_FIXTURES = sorted(glob.glob(os.path.join(_TEMPLATES, "*.html")))
+
+# analyzers that read the parsed document
+_ANALYZERS = (
+    Passive_XSS_Security_Scanner,
+    Passive_CSRF_Security_Scanner,
+    Passive_Mixed_Content_Detection_Scanner,
+    Passive_Do_Not_Track_Support_Scan,
+    Passive_Fingerprinting_Detection_Scan,
+    Passive_Referrer_DNT_Analysis_Scan,
+    Passive_Third_Party_Script_Evaluation_Scanner,
+    Passive_Tracker_Detection_Scan,
+    Passive_Tracker_Script_Scanner,
+)
+_REFERENCE = "html.parser"
+
+
+def _findings(html: str, backend: str) -> dict:
+    previous = html_document.set_backend(backend)
+    try:
+        snap = PageSnapshot(url="https://example.com/page?q=1",
+                            final_url="https://example.com/page", text=html)
+        out = {mod.__name__: mod.analyze(snap) for mod in _ANALYZERS}
+        out["detect_technologies"] = (
+            Passive_Vulnerability_Cross_Reference_Scanner.detect_technologies(
+                "https://example.com", {}, snap.document))
+        return out
+    finally:
+        html_document.set_backend(previous)
+
+
+class BackendConformanceTest(unittest.TestCase):
+
+    def test_fixtures_present(self):
+        self.assertTrue(_FIXTURES, "no templates/*.html fixtures found")
+
+    def test_default_backend_is_installed(self):
+        self.assertIn(html_document.get_backend(), html_document.available_backends())
+        self.assertIn(_REFERENCE, html_document.available_backends())
+
+    def test_unknown_backend_rejected(self):
+        with self.assertRaises(ValueError):
+            html_document.set_backend("no-such-parser")
+
+    def _check_backend(self, backend: str):
+        if backend not in html_document.available_backends():
+            self.skipTest(f"{backend} not installed")
+        for path in _FIXTURES:
+            with open(path, encoding="utf-8") as fh:
+                html = fh.read()
+            with self.subTest(fixture=os.path.basename(path)):
+                self.assertEqual(html_document.parse_document(html, backend),
+                                 html_document.parse_document(html, _REFERENCE))
+                self.assertEqual(_findings(html, backend), _findings(html, _REFERENCE))
+
+    def test_lxml_matches_html_parser(self):
+        self._check_backend("lxml")
+
+    def test_selectolax_matches_html_parser(self):
+        self._check_backend("selectolax")
+
+    def test_stream_matches_html_parser(self):
+        self._check_backend("stream")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
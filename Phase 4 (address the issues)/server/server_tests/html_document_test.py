@@ -0,0 +1,102 @@
+"""
+Checks for html_document – the parse-once tag indexes.
+
+– offline, std-lib only
+– one small page exercising every index
+"""
+
+import threading
+import unittest
+from unittest.mock import patch
+
+import html_document
+from html_document import ParsedDocument, as_document, parse_document, parse_stream
+from page_snapshot import PageSnapshot
+
+_PAGE = """
+<html><head>
+  <meta name="DNT" content="1">
+  <link rel="stylesheet" href="http://cdn.example/site.css">
+  <script src="https://cdn.example/jquery-3.6.0.min.js" integrity="x"></script>
+  <script>var t = Intl.DateTimeFormat().resolvedOptions().timeZone;</script>
+  <script src=""></script>
+</head><body>
+  <img src="/logo.png">
+  <iframe src="http://ads.example/frame"></iframe>
+  <a href="/about">about</a>
+  <form><input type="hidden" name="csrf_token"><input name="q"></form>
+  <video src="http://media.example/clip.mp4"></video>
+</body></html>
+"""
+
+
+class ParsedDocumentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = parse_document(_PAGE)
+
+    def test_script_indexes(self):
+        self.assertEqual(len(self.doc.scripts), 3)
+        # empty src counts as inline, but still "has" the attribute
+        self.assertEqual(len(self.doc.inline_scripts), 2)
+        self.assertEqual(len(self.doc.external_scripts), 2)
+        self.assertIn("timeZone", self.doc.inline_scripts[0].text)
+        self.assertEqual(self.doc.external_scripts[0]["integrity"], "x")
+
+    def test_resource_order_and_attr_indexes(self):
+        self.assertEqual([el.name for el in self.doc.resources],
+                         ["link", "script", "script", "script", "img", "iframe"])
+        self.assertIn("video", [el.name for el in self.doc.with_src])
+        self.assertIn("a", [el.name for el in self.doc.with_href])
+        self.assertEqual(self.doc.links[0].get("rel"), "stylesheet")
+
+    def test_forms_keep_only_hidden_inputs(self):
+        (form,) = self.doc.forms
+        self.assertEqual([i.get("name") for i in form.inputs], ["csrf_token"])
+
+    def test_find_meta_is_case_insensitive(self):
+        self.assertEqual(self.doc.find_meta("dnt").get("content"), "1")
+        self.assertIsNone(self.doc.find_meta("robots"))
+
+    def test_as_document_passes_parsed_through(self):
+        self.assertIs(as_document(self.doc), self.doc)
+        self.assertIsInstance(as_document(None), ParsedDocument)
+
+
+class StreamExtractorTest(unittest.TestCase):
+
+    def test_chunked_feed_matches_whole_page(self):
+        # split inside tags and inside script text on purpose
+        chunks = [_PAGE[i:i + 17] for i in range(0, len(_PAGE), 17)]
+        self.assertEqual(parse_stream(chunks), parse_document(_PAGE, "stream"))
+        self.assertEqual(parse_stream(chunks), parse_document(_PAGE, "html.parser"))
+
+    def test_nested_and_unclosed_forms(self):
+        html = ("<form id=a><input type=hidden name=outer>"
+                "<form id=b><input type=hidden name=inner></form>"
+                "<input type=hidden name=tail>")
+        doc = parse_document(html, "stream")
+        self.assertEqual(doc, parse_document(html, "html.parser"))
+        self.assertEqual([i.get("name") for i in doc.forms[0].inputs],
+                         ["outer", "inner", "tail"])
+        self.assertEqual([i.get("name") for i in doc.forms[1].inputs], ["inner"])
+
+
+class SnapshotDocumentTest(unittest.TestCase):
+
+    def test_document_parsed_once_across_threads(self):
+        snap = PageSnapshot(url="https://example.com", text=_PAGE)
+        with patch.object(html_document, "parse_document",
+                          wraps=html_document.parse_document) as spy, \
+             patch("page_snapshot.parse_document", spy):
+            threads = [threading.Thread(target=lambda: snap.document) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(spy.call_count, 1)
+        self.assertIs(snap.document, snap.document)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
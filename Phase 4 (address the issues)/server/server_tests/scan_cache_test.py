@@ -0,0 +1,103 @@
+"""
+Checks for scan_cache – origin-scoped results and page TTLs.
+
+– fake clock, no network
+– std-lib only
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from scan_cache import (EXPIRED, FRESH, ORIGIN_SCANS, STALE, ScanCache,
+                        TTLCache, origin_of)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def test_entries_expire(self):
+        clock = _Clock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.put("a", 1)
+
+        clock.now = 9
+        self.assertEqual(cache.get("a"), 1)
+        clock.now = 10
+        self.assertIsNone(cache.get("a"))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(ttl=60, max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+
+def _stamp(ago):
+    when = datetime.now(timezone.utc) - timedelta(seconds=ago)
+    return {"timestamp": when.strftime("%Y-%m-%d %H:%M:%S")}
+
+
+class ScanCacheTest(unittest.TestCase):
+
+    def _results(self):
+        return {name: (7, [name]) for name in ORIGIN_SCANS | {"xss"}}
+
+    def test_origin_shared_across_pages(self):
+        cache = ScanCache()
+        cache.put_origin("https://Site.example/a", self._results())
+
+        hit = cache.get_origin("https://site.example:443/some/other/page?q=1")
+        self.assertIsNotNone(hit)
+        self.assertEqual(set(hit), ORIGIN_SCANS)      # page scans never stored
+
+    def test_other_origins_miss(self):
+        cache = ScanCache()
+        cache.put_origin("https://site.example/", self._results())
+
+        self.assertIsNone(cache.get_origin("http://site.example/"))
+        self.assertIsNone(cache.get_origin("https://site.example:8443/"))
+        self.assertIsNone(cache.get_origin("https://other.example/"))
+
+    def test_page_freshness_uses_db_timestamp(self):
+        cache = ScanCache(page_ttl=60)
+
+        self.assertTrue(cache.page_fresh(_stamp(10)))
+        self.assertFalse(cache.page_fresh(_stamp(120)))
+        self.assertFalse(cache.page_fresh(None))
+        self.assertFalse(cache.page_fresh({"timestamp": "garbage"}))
+
+    def test_page_states(self):
+        cache = ScanCache(page_ttl=60, page_max_age=600)
+
+        self.assertEqual(cache.page_state(_stamp(10)), FRESH)
+        self.assertEqual(cache.page_state(_stamp(120)), STALE)
+        self.assertEqual(cache.page_state(_stamp(1200)), EXPIRED)
+        self.assertEqual(cache.page_state(None), EXPIRED)
+
+    def test_one_revalidation_per_key(self):
+        cache = ScanCache()
+
+        self.assertTrue(cache.begin_revalidate("https://a.example/"))
+        self.assertFalse(cache.begin_revalidate("https://a.example/"))
+        cache.end_revalidate("https://a.example/")
+        self.assertTrue(cache.begin_revalidate("https://a.example/"))
+
+    def test_origin_of_fills_default_port(self):
+        self.assertEqual(origin_of("https://a.example/x"), "https://a.example:443")
+        self.assertEqual(origin_of("http://A.example/"), "http://a.example:80")
+
+
+if __name__ == "__main__":
+    unittest.main()
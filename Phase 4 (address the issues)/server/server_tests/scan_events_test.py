@@ -0,0 +1,94 @@
+"""
+Checks for scan_events – progress fan-out and SSE framing.
+
+– no network
+– std-lib only
+"""
+
+import asyncio
+import json
+import unittest
+
+from scan_events import ScanEvents, sse
+from scan_scheduler import ScanGraph
+
+
+class ScanEventsTest(unittest.TestCase):
+
+    def test_every_subscriber_gets_every_event(self):
+        async def runner():
+            events = ScanEvents()
+            events.begin("u")
+            with events.subscribe("u") as a, events.subscribe("u") as b:
+                events.publish("u", "scanner", {"key": "csp"})
+                return a.get_nowait(), b.get_nowait(), len(events)
+
+        a, b, subscribers = asyncio.run(runner())
+        self.assertEqual(a, ("scanner", {"key": "csp"}))
+        self.assertEqual(a, b)
+        self.assertEqual(subscribers, 2)
+
+    def test_late_subscriber_gets_a_replay(self):
+        async def runner():
+            events = ScanEvents()
+            events.begin("u")
+            events.publish("u", "scanner", 1)
+            events.publish("u", "provisional", 2)
+            with events.subscribe("u") as queue:
+                events.publish("u", "scanner", 3)
+                return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        self.assertEqual(asyncio.run(runner()),
+                         [("scanner", 1), ("provisional", 2), ("scanner", 3)])
+
+    def test_no_replay_after_the_scan_ends_or_across_urls(self):
+        async def runner():
+            events = ScanEvents()
+            events.begin("u")
+            events.publish("u", "scanner", 1)
+            events.end("u")
+            with events.subscribe("u") as queue, events.subscribe("v") as other:
+                events.publish("v", "scanner", 2)
+                return queue.qsize(), other.qsize()
+
+        self.assertEqual(asyncio.run(runner()), (0, 1))
+
+    def test_unsubscribe(self):
+        async def runner():
+            events = ScanEvents()
+            with events.subscribe("u"):
+                pass
+            events.publish("u", "scanner", 1)      # nobody listening: fine
+            return len(events)
+
+        self.assertEqual(asyncio.run(runner()), 0)
+
+    def test_sse_frame(self):
+        frame = sse("final", {"url": "https://a.example/", "score": 7})
+        self.assertTrue(frame.startswith("event: final\ndata: "))
+        self.assertTrue(frame.endswith("\n\n"))
+        self.assertEqual(json.loads(frame.split("data: ", 1)[1]),
+                         {"url": "https://a.example/", "score": 7})
+
+
+class StageHookTest(unittest.TestCase):
+
+    def test_on_done_fires_as_each_stage_finishes(self):
+        seen = []
+
+        def stage(value, delay):
+            async def run(*args):
+                await asyncio.sleep(delay)
+                return value
+            return run
+
+        graph = ScanGraph(on_done=lambda name, result: seen.append(name))
+        graph.add("slow", stage(1, 0.03))
+        graph.add("fast", stage(2, 0))
+        graph.add("after", stage(3, 0), deps=["slow"])
+        asyncio.run(graph.run())
+        self.assertEqual(seen, ["fast", "slow", "after"])
+
+
+if __name__ == "__main__":
+    unittest.main()
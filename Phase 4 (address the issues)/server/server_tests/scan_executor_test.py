@@ -0,0 +1,104 @@
+"""
+Checks for scan_executor – separate, instrumented I/O and CPU pools.
+
+– no network
+– std-lib only
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import types
+import unittest
+
+import scan_executor
+from scan_executor import InstrumentedPool, ScanExecutor
+from scanners import CPU, ScannerSpec
+
+
+class InstrumentedPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = InstrumentedPool("test", max_workers=1)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_counts_queue_depth_and_outcomes(self):
+        gate = threading.Event()
+        blocked = self.pool.submit(gate.wait)
+        queued = [self.pool.submit(lambda: 1) for _ in range(3)]
+        failing = self.pool.submit(lambda: 1 / 0)
+        time.sleep(0.05)
+
+        stats = self.pool.stats()
+        self.assertEqual((stats["running"], stats["queued"]), (1, 4))
+        gate.set()
+        blocked.result()
+        self.assertEqual([f.result() for f in queued], [1, 1, 1])
+        with self.assertRaises(ZeroDivisionError):
+            failing.result()
+
+        stats = self.pool.stats()
+        self.assertEqual((stats["queued"], stats["running"]), (0, 0))
+        self.assertEqual((stats["completed"], stats["failed"]), (4, 1))
+        self.assertGreaterEqual(stats["max_queued"], 4)
+        self.assertGreater(stats["wait_seconds"], 0)
+        self.assertGreater(stats["utilization"], 0)
+
+    def test_run_from_a_coroutine(self):
+        async def runner():
+            return await self.pool.run(lambda a, b=0: (threading.current_thread().name, a + b), 1, b=2)
+
+        name, total = asyncio.run(runner())
+        self.assertTrue(name.startswith("scan-test"))
+        self.assertEqual(total, 3)
+
+
+class ScanExecutorTest(unittest.TestCase):
+
+    def test_busy_cpu_pool_does_not_starve_io(self):
+        executor = ScanExecutor(io_threads=2, cpu_threads=1)
+        self.addCleanup(executor.shutdown)
+        gate = threading.Event()
+
+        async def runner():
+            hog = asyncio.ensure_future(executor.cpu.run(gate.wait, 5))
+            await asyncio.sleep(0.01)
+            result = await asyncio.wait_for(executor.io.run(lambda: "io ran"), 1)
+            gate.set()
+            await hog
+            return result
+
+        self.assertEqual(asyncio.run(runner()), "io ran")
+
+    def test_installed_as_the_default_executor(self):
+        executor = ScanExecutor(io_threads=2, cpu_threads=1)
+        self.addCleanup(executor.shutdown)
+
+        async def runner():
+            executor.install()
+            return await asyncio.get_running_loop().run_in_executor(
+                None, lambda: threading.current_thread().name)
+
+        self.assertTrue(asyncio.run(runner()).startswith("scan-io"))
+        self.assertEqual(executor.stats()["io"]["completed"], 1)
+
+    def test_cpu_scanners_run_on_the_cpu_pool(self):
+        module = types.ModuleType("_exec_cpu_scanner")
+        module.analyze = lambda snapshot: (6, [threading.current_thread().name])
+        sys.modules[module.__name__] = module
+        spec = ScannerSpec("fake", "Fake", module.__name__, cost=CPU)
+
+        async def runner():
+            try:
+                return await spec.run("page")
+            finally:
+                scan_executor.close_scan_executor()
+
+        _, _, score, details = asyncio.run(runner())
+        self.assertEqual(score, 6)
+        self.assertTrue(details.startswith("scan-cpu"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+"""
+Checks for scan_scheduler – DAG stages, overlap and the critical path.
+
+– fake fetch / parse / probe and fake scanner modules, no network
+– std-lib only
+"""
+
+import asyncio
+import sys
+import types
+import unittest
+
+from deadline import deadline_scope
+from scan_scheduler import ScanGraph, plan_scan
+from scanners import HEADERS, HTML, NETWORK, PROBES, ROOT, TLS, ScannerSpec, is_incomplete
+
+
+def _spec(key, inputs, delay=0.0, timeout=5.0, error=None):
+    async def analyze_async(snapshot, tls=None):
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return 5, [f"{key} saw {snapshot['url']}"] + ([f"tls {tls}"] if tls else [])
+
+    module = types.ModuleType(f"_sched_{key}")
+    module.analyze_async = analyze_async
+    sys.modules[module.__name__] = module
+    # NETWORK, so the (sleeping) analyze_async is what runs
+    return ScannerSpec(key, key.title(), module.__name__, inputs=frozenset(inputs),
+                       cost=NETWORK, timeout=timeout)
+
+
+class ScanGraphTest(unittest.TestCase):
+
+    def test_stages_start_when_their_inputs_exist(self):
+        log = []
+
+        def stage(name, delay):
+            async def run(*args):
+                log.append(("start", name))
+                await asyncio.sleep(delay)
+                log.append(("end", name))
+                return name
+            return run
+
+        graph = ScanGraph()
+        graph.add("fetch", stage("fetch", 0.01))
+        graph.add("parse", stage("parse", 0.05), deps=["fetch"])
+        graph.add("cheap", stage("cheap", 0), deps=["fetch"])
+        graph.add("heavy", stage("heavy", 0), deps=["parse"])
+        results = asyncio.run(graph.run())
+
+        self.assertEqual(results["heavy"], "heavy")
+        self.assertLess(log.index(("end", "cheap")), log.index(("end", "parse")))
+        self.assertEqual([t.name for t in graph.critical_path()], ["fetch", "parse", "heavy"])
+
+    def test_results_are_passed_in_dependency_order(self):
+        async def const(value):
+            return value
+
+        async def pair(a, b):
+            return (a, b)
+
+        graph = ScanGraph()
+        graph.add("a", lambda: const(1))
+        graph.add("b", lambda: const(2))
+        graph.add("ab", pair, deps=["b", "a"])
+        self.assertEqual(asyncio.run(graph.run())["ab"], (2, 1))
+
+    def test_unknown_dependency_rejected(self):
+        graph = ScanGraph()
+        with self.assertRaises(ValueError):
+            graph.add("b", None, deps=["a"])
+
+    def test_failure_cancels_the_rest(self):
+        finished = []
+
+        async def boom():
+            raise RuntimeError("fetch failed")
+
+        async def slow():
+            await asyncio.sleep(0.2)
+            finished.append(1)
+
+        graph = ScanGraph()
+        graph.add("boom", boom)
+        graph.add("slow", slow)
+
+        async def runner():
+            with self.assertRaises(RuntimeError):
+                await graph.run()
+            await asyncio.sleep(0.3)
+
+        asyncio.run(runner())
+        self.assertEqual(finished, [])
+
+    def test_trace(self):
+        async def noop():
+            return None
+
+        graph = ScanGraph()
+        graph.add("only", noop)
+        asyncio.run(graph.run())
+        trace = graph.trace()
+        self.assertEqual(trace["critical_path"], ["only"])
+        self.assertEqual([s["name"] for s in trace["stages"]], ["only"])
+
+
+    def test_timeout_returns_what_finished(self):
+        async def sleep_then(value, delay):
+            await asyncio.sleep(delay)
+            return value
+
+        async def runner():
+            graph = ScanGraph()
+            graph.add("fast", lambda: sleep_then(1, 0))
+            graph.add("slow", lambda: sleep_then(2, 0.05))
+            graph.add("stuck", lambda: sleep_then(3, 10))
+            first = await graph.run(timeout=0.02)
+            unfinished = graph.unfinished
+            rest = await graph.finish(timeout=0.1)
+            return first, unfinished, rest, graph.unfinished
+
+        first, unfinished, rest, after = asyncio.run(runner())
+        self.assertEqual(first, {"fast": 1})
+        self.assertEqual(sorted(unfinished), ["slow", "stuck"])
+        self.assertEqual(rest, {"fast": 1, "slow": 2})
+        self.assertEqual(after, [])                 # the stuck stage was cancelled
+
+
+class PlanScanTest(unittest.TestCase):
+
+    def _plan(self, specs, root_url=None):
+        calls = []
+
+        async def fetch(url):
+            calls.append(("fetch", url))
+            await asyncio.sleep(0.01)
+            return {"url": url}
+
+        async def parse(snapshot):
+            calls.append(("parse", snapshot["url"]))
+            await asyncio.sleep(0.05)
+            return snapshot
+
+        async def probe(snapshot):
+            calls.append(("probe", snapshot["url"]))
+            return "v1.3"
+
+        graph = plan_scan(specs, "https://a.example/page", root_url, fetch, parse, probe)
+        return graph, asyncio.run(graph.run()), calls
+
+    def test_only_needed_stages(self):
+        graph, results, calls = self._plan([_spec("csp", {HEADERS})])
+        self.assertEqual(calls, [("fetch", "https://a.example/page")])
+        self.assertEqual(results["scan:csp"][3], "csp saw https://a.example/page")
+
+    def test_header_checks_do_not_wait_for_the_parse(self):
+        graph, _, _ = self._plan([_spec("csp", {HEADERS}), _spec("xss", {HEADERS, HTML}),
+                                  _spec("ssl", {TLS}), _spec("directory", {PROBES}, 0.02)])
+        timings = {t.name: t for t in graph.timings()}
+        self.assertLess(timings["scan:csp"].end, timings["parse:page"].end)
+        self.assertLess(timings["scan:directory"].start, timings["parse:page"].end)
+        self.assertLess(timings["probe:tls"].end, timings["parse:page"].end)
+        self.assertEqual([t.name for t in graph.critical_path()],
+                         ["fetch:page", "parse:page", "scan:xss"])
+
+    def test_root_fetched_alongside_the_page(self):
+        graph, results, calls = self._plan([_spec("vuln", {ROOT, HTML})],
+                                           root_url="https://a.example")
+        self.assertIn(("parse", "https://a.example"), calls)
+        self.assertEqual(results["scan:vuln"][3], "vuln saw https://a.example")
+        timings = {t.name: t for t in graph.timings()}
+        self.assertLess(timings["fetch:root"].start, timings["fetch:page"].end)
+
+    def test_page_stands_in_for_the_root(self):
+        _, results, calls = self._plan([_spec("vuln", {ROOT, HTML}), _spec("xss", {HTML})])
+        self.assertEqual(calls.count(("parse", "https://a.example/page")), 1)
+        self.assertEqual(results["scan:vuln"][3], "vuln saw https://a.example/page")
+
+    def test_slow_scanner_is_incomplete(self):
+        _, results, _ = self._plan([_spec("directory", {PROBES}, delay=1, timeout=0.01)])
+        self.assertTrue(is_incomplete(results["scan:directory"]))
+        self.assertIn("timed out", results["scan:directory"][3])
+
+    def test_failing_scanner_is_incomplete(self):
+        with self.assertLogs("scan_scheduler", "WARNING"):
+            _, results, _ = self._plan([
+                _spec("csp", {HEADERS}),
+                _spec("vuln", {PROBES}, error=OSError("host unreachable")),
+                _spec("xss", {HEADERS, HTML}, delay=0.02),
+            ])
+        self.assertTrue(is_incomplete(results["scan:vuln"]))
+        self.assertIn("OSError: host unreachable", results["scan:vuln"][3])
+        self.assertEqual(results["scan:csp"][3], "csp saw https://a.example/page")
+        self.assertEqual(results["scan:xss"][3], "xss saw https://a.example/page")
+
+    def test_scan_deadline_bounds_scanner_timeouts(self):
+        async def runner():
+            with deadline_scope(0.01):
+                graph = plan_scan([_spec("vuln", {PROBES}, delay=1, timeout=30)],
+                                  "https://a.example/", None,
+                                  fetch=lambda url: asyncio.sleep(0, {"url": url}),
+                                  parse=None, probe_tls=None)
+                return await graph.run()
+
+        self.assertTrue(is_incomplete(asyncio.run(runner())["scan:vuln"]))
+
+    def test_tls_passed_to_tls_scanners(self):
+        _, results, _ = self._plan([_spec("ssl", {TLS})])
+        self.assertEqual(results["scan:ssl"][3], "ssl saw https://a.example/page; tls v1.3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Checks for scanners – the declarative scanner registry and numeric scoring.
+
+– fake scanner modules, no network
+– std-lib only
+"""
+
+import asyncio
+import sys
+import types
+import unittest
+
+import database
+import scanners
+from scanners import HEADERS, ROOT, TLS, ScannerSpec
+from score_calculator import calculate_final_score, weighted_score
+
+
+def _fake_module(name, analyze_async=None, analyze=None):
+    module = types.ModuleType(name)
+    module.analyze_async = analyze_async
+    module.analyze = analyze
+    sys.modules[name] = module
+    return name
+
+
+class RegistryTest(unittest.TestCase):
+
+    def test_matches_stored_scanners(self):
+        self.assertEqual([(s.key, s.name) for s in scanners.REGISTRY], database.SCANNERS)
+        self.assertEqual(len(scanners.BY_KEY), len(scanners.REGISTRY))
+
+    def test_origin_scope(self):
+        self.assertEqual(scanners.ORIGIN_KEYS,
+                         {"ssl", "https", "directory", "vuln", "headers", "data_leakage"})
+
+    def test_every_module_declares_an_analyzer(self):
+        for spec in scanners.REGISTRY:
+            self.assertRegex(spec.module, r"^(Security_scans|Privacy_scan)\.Passive_")
+
+    def test_inputs_of(self):
+        specs = [scanners.BY_KEY["ssl"], scanners.BY_KEY["csp"]]
+        self.assertEqual(scanners.inputs_of(specs), {TLS, HEADERS})
+        self.assertEqual(scanners.inputs_of([]), frozenset())
+
+
+class RunTest(unittest.TestCase):
+
+    def test_run_passes_the_declared_inputs(self):
+        seen = {}
+
+        async def analyze_async(snapshot, **kwargs):
+            seen["snapshot"], seen["kwargs"] = snapshot, kwargs
+            return 7.0, ["a", "b"]
+
+        spec = ScannerSpec("fake", "Fake Scan", _fake_module("_fake_root_tls", analyze_async),
+                           inputs=frozenset({ROOT, TLS}))
+        result = asyncio.run(spec.run("page", root="root", tls="tls"))
+
+        self.assertEqual(result, ("fake", "Fake Scan", 7, "a; b"))
+        self.assertEqual(seen, {"snapshot": "root", "kwargs": {"tls": "tls"}})
+
+    def test_page_scanner_gets_the_page_only(self):
+        def analyze(snapshot):
+            return 3.5, f"saw {snapshot}"
+
+        spec = ScannerSpec("fake", "Fake Scan", _fake_module("_fake_page", analyze=analyze))
+        self.assertEqual(asyncio.run(spec.run("page", root="root", tls="tls")),
+                         ("fake", "Fake Scan", 3.5, "saw page"))
+
+    def test_only_network_and_tls_scanners_are_awaited(self):
+        async def analyze_async(snapshot, **kwargs):
+            return 1, "async"
+
+        def analyze(snapshot, **kwargs):
+            return 2, "sync"
+
+        module = _fake_module("_fake_both", analyze_async, analyze)
+        ran = {cost: asyncio.run(ScannerSpec("fake", "Fake", module, cost=cost).run("page"))[3]
+               for cost in (scanners.CHEAP, scanners.CPU, scanners.NETWORK)}
+        self.assertEqual(ran, {scanners.CHEAP: "sync", scanners.CPU: "sync",
+                               scanners.NETWORK: "async"})
+        tls = ScannerSpec("fake", "Fake", module, inputs=frozenset({TLS}))
+        self.assertEqual(asyncio.run(tls.run("page"))[3], "async")
+
+    def test_non_numeric_score(self):
+        spec = scanners.BY_KEY["csp"]
+        self.assertEqual(spec.result("n/a", "x"), ("csp", spec.name, None, "x"))
+
+    def test_in_order(self):
+        by_key = {s.key: (s.key, s.name, 5, "") for s in reversed(scanners.REGISTRY)}
+        self.assertEqual([r[0] for r in scanners.in_order(by_key)],
+                         [s.key for s in scanners.REGISTRY])
+
+
+class WeightedScoreTest(unittest.TestCase):
+
+    def test_matches_string_scoring(self):
+        scores = [9, 2.6, 10, 0, 7]
+        weights = [8, 10, 5, 0, 9]
+        strings = [f"Score: {s}/10 - x" for s in scores]
+        self.assertEqual(weighted_score(scores, weights),
+                         calculate_final_score(*strings, weights=weights))
+
+    def test_missing_scores_drop_their_weight(self):
+        self.assertEqual(weighted_score([10, None, 2], [1, 100, 1]), 6)
+        self.assertEqual(weighted_score([None], [1]), 0)
+
+    def test_weights_must_match(self):
+        with self.assertRaises(ValueError):
+            weighted_score([1, 2], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Checks for single_flight – concurrent callers share one execution.
+
+– no network
+– std-lib only
+"""
+
+import asyncio
+import unittest
+
+from single_flight import SingleFlight
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_call(self):
+        calls = []
+
+        async def scan():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "record"
+
+        async def runner():
+            flight = SingleFlight()
+            results = await asyncio.gather(*(flight.do("k", scan) for _ in range(5)))
+            return results, len(flight)
+
+        results, left = _run(runner())
+        self.assertEqual(results, ["record"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(left, 0)
+
+    def test_key_released_after_completion(self):
+        calls = []
+
+        async def scan():
+            calls.append(1)
+            return len(calls)
+
+        async def runner():
+            flight = SingleFlight()
+            return await flight.do("k", scan), await flight.do("k", scan)
+
+        self.assertEqual(_run(runner()), (1, 2))
+
+    def test_different_keys_run_separately(self):
+        async def scan():
+            await asyncio.sleep(0.01)
+            return object()
+
+        async def runner():
+            flight = SingleFlight()
+            return await asyncio.gather(flight.do("a", scan), flight.do("b", scan))
+
+        a, b = _run(runner())
+        self.assertIsNot(a, b)
+
+    def test_errors_reach_every_waiter(self):
+        async def scan():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def runner():
+            flight = SingleFlight()
+            return await asyncio.gather(flight.do("k", scan), flight.do("k", scan),
+                                        return_exceptions=True)
+
+        errors = _run(runner())
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in errors))
+
+    def test_cancelled_waiter_does_not_cancel_the_call(self):
+        async def scan():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def runner():
+            flight = SingleFlight()
+            first = asyncio.ensure_future(flight.do("k", scan))
+            second = asyncio.ensure_future(flight.do("k", scan))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(_run(runner()), "done")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for tls_probe.py – the one-handshake TLS probe.
+
+The handshake itself is stubbed, so these run offline.
+"""
+
+import ssl
+import unittest
+from unittest import mock
+
+from requests.structures import CaseInsensitiveDict
+
+import tls_probe
+from page_snapshot import PageSnapshot
+
+_GOOD = {
+    "version": "TLSv1.3",
+    "cipher": ("TLS_AES_256_GCM_SHA384", "TLSv1.3", 256),
+    "cert": {"notAfter": "Dec 31 23:59:59 2099 GMT"},
+    "chain_der": (b"leaf", b"intermediate"),
+}
+
+
+def _verify_error():
+    err = ssl.SSLCertVerificationError("certificate verify failed")
+    err.verify_message = "self-signed certificate"
+    return err
+
+
+class ProbeTLSTest(unittest.TestCase):
+
+    @mock.patch("tls_probe._handshake", return_value=_GOOD)
+    def test_trusted_site_takes_one_handshake(self, handshake):
+        probe = tls_probe.probe_tls("good.example", 443)
+
+        self.assertEqual(handshake.call_count, 1)
+        self.assertEqual(probe.handshakes, 1)
+        self.assertTrue(probe.ok)
+        self.assertTrue(probe.verified)
+        self.assertEqual(probe.version, "TLSv1.3")
+        self.assertEqual(probe.leaf_der, b"leaf")
+        self.assertEqual(len(probe.chain_der), 2)
+
+    @mock.patch("tls_probe._handshake")
+    def test_untrusted_site_retries_unverified(self, handshake):
+        handshake.side_effect = [_verify_error(), dict(_GOOD, cert={})]
+
+        probe = tls_probe.probe_tls("self-signed.example", 443)
+
+        self.assertEqual(probe.handshakes, 2)
+        self.assertTrue(probe.ok)
+        self.assertFalse(probe.verified)
+        self.assertEqual(probe.verify_error, "self-signed certificate")
+        self.assertEqual(probe.version, "TLSv1.3")
+
+    @mock.patch("tls_probe._handshake", side_effect=OSError("refused"))
+    def test_connection_failure_is_captured(self, handshake):
+        probe = tls_probe.probe_tls("offline.example", 443)
+
+        self.assertEqual(handshake.call_count, 1)
+        self.assertFalse(probe.ok)
+        self.assertEqual(probe.error, "refused")
+
+
+class ProbeSnapshotTest(unittest.TestCase):
+
+    @mock.patch("tls_probe._handshake", return_value=_GOOD)
+    def test_hsts_and_origin_come_from_snapshot(self, handshake):
+        page = PageSnapshot(
+            url="http://good.example/page",
+            final_url="https://good.example:8443/page",
+            headers=CaseInsensitiveDict({"Strict-Transport-Security": "max-age=31536000"}),
+        )
+
+        probe = tls_probe.probe_snapshot(page)
+
+        self.assertEqual(handshake.call_args[0][:2], ("good.example", 8443))
+        self.assertEqual(probe.hsts, "max-age=31536000")
+
+    @mock.patch("tls_probe._handshake")
+    def test_plain_http_is_not_probed(self, handshake):
+        page = PageSnapshot(url="http://plain.example", final_url="http://plain.example")
+
+        probe = tls_probe.probe_snapshot(page)
+
+        handshake.assert_not_called()
+        self.assertFalse(probe.ok)
+
+
+if __name__ == "__main__":
+    unittest.main()
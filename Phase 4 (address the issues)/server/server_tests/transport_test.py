@@ -0,0 +1,90 @@
+"""
+Checks for transport – pooled sessions and cached SSL contexts.
+
+– offline: a throwaway http.server on localhost
+– std-lib only
+"""
+
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import requests
+
+import transport
+from transport import TransportManager
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"      # keep-alive
+    seen_cookies = []
+
+    def do_GET(self):
+        _Handler.seen_cookies.append(self.headers.get("Cookie"))
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Set-Cookie", "sid=abc; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TransportManagerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(("127.0.0.1", 0), _Handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.manager = TransportManager(max_sessions=2)
+        _Handler.seen_cookies.clear()
+
+    def tearDown(self):
+        self.manager.close()
+        transport.install_transport(None)
+
+    def test_one_session_per_origin(self):
+        a = self.manager.session_for("https://a.example/x")
+        self.assertIs(a, self.manager.session_for("https://A.example:443/y?z=1"))
+        self.assertIsNot(a, self.manager.session_for("http://a.example/"))
+
+    def test_oldest_origin_evicted(self):
+        first = self.manager.session_for("https://one.example/")
+        self.manager.session_for("https://two.example/")
+        self.manager.session_for("https://three.example/")
+        self.assertIsNot(first, self.manager.session_for("https://one.example/"))
+
+    def test_ssl_contexts_are_built_once_and_shared(self):
+        ctx = self.manager.ssl_context(verified=True)
+        self.assertIs(ctx, self.manager.ssl_context(verified=True))
+        adapter = self.manager.session_for("https://a.example/").get_adapter("https://a.example/")
+        self.assertIs(adapter.poolmanager.connection_pool_kw["ssl_context"], ctx)
+        self.assertFalse(self.manager.ssl_context(verified=False).check_hostname)
+
+    def test_cookies_reported_but_not_replayed(self):
+        first = self.manager.get(self.base + "/")
+        second = self.manager.get(self.base + "/again")
+        self.assertEqual(first.cookies.get("sid"), "abc")
+        self.assertEqual(second.cookies.get("sid"), "abc")
+        self.assertEqual(_Handler.seen_cookies, [None, None])
+
+    def test_fallback_is_plain_requests(self):
+        transport.install_transport(None)
+        self.assertIs(transport.get_transport(), requests)
+        transport.install_transport(self.manager)
+        self.assertIs(transport.get_transport(), self.manager)
+        self.assertIs(transport.ssl_context(), self.manager.ssl_context())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
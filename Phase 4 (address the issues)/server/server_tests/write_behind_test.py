@@ -0,0 +1,147 @@
+"""
+Checks for write_behind – batched commits with a read overlay.
+
+– temporary SQLite file
+– std-lib only
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import async_db
+import database
+from write_behind import WriteBehindWriter
+
+
+def _scan(url, score=5):
+    results = [(key, name, score, "ok") for key, name in database.SCANNERS]
+    return url, results, (score,) * 5, 0.1
+
+
+class WriteBehindTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(database, "DB_FILE", os.path.join(tmp.name, "test.sqlite"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        database.init_db()
+        self.batches = []
+        real = database.save_scans
+
+        def spy(scans):
+            self.batches.append([scan[0] for scan in scans])
+            real(scans)
+
+        patcher = mock.patch.object(database, "save_scans", spy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, scenario, **kwargs):
+        async def runner():
+            writer = WriteBehindWriter(**kwargs)
+            writer.start()
+            try:
+                return await scenario(writer)
+            finally:
+                await writer.close()
+                await async_db.close_db()
+        return asyncio.run(runner())
+
+    def test_scans_grouped_into_one_transaction(self):
+        async def scenario(writer):
+            for i in range(5):
+                writer.submit(*_scan(f"https://{i}.example/"))
+            await asyncio.sleep(0.1)
+
+        self._run(scenario, max_latency=0.05)
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(len(self.batches[0]), 5)
+
+    def test_full_batch_flushes_before_the_deadline(self):
+        async def scenario(writer):
+            for i in range(4):
+                writer.submit(*_scan(f"https://{i}.example/"))
+            await asyncio.sleep(0.1)
+            return list(self.batches)
+
+        early = self._run(scenario, max_batch=2, max_latency=60)
+        self.assertEqual([len(b) for b in early], [2, 2])
+
+    def test_unflushed_scans_are_readable(self):
+        async def scenario(writer):
+            record = writer.submit(*_scan("https://a.example/", score=8))
+            seen = writer.pending("https://a.example/")
+            merged = writer.merge(database.get_all_logs())
+            return record, seen, merged, database.get_log_by_url("https://a.example/")
+
+        record, seen, merged, stored = self._run(scenario, max_latency=60)
+        self.assertIs(seen, record)
+        self.assertEqual(seen["xss_scan_result"], "Score: 8/10 - ok")
+        self.assertEqual([r["url"] for r in merged], ["https://a.example/"])
+        self.assertIsNone(stored)             # not on disk while the batch waits
+
+    def test_repeat_scan_replaces_the_queued_one(self):
+        async def scenario(writer):
+            writer.submit(*_scan("https://a.example/", score=2))
+            writer.submit(*_scan("https://a.example/", score=9))
+            await asyncio.sleep(0.1)
+
+        self._run(scenario, max_latency=0.01)
+        self.assertEqual(self.batches, [["https://a.example/"]])
+        self.assertEqual(database.get_log_by_url("https://a.example/")["final_score_norm"], 9)
+
+    def test_close_flushes_everything(self):
+        async def scenario(writer):
+            for i in range(3):
+                writer.submit(*_scan(f"https://{i}.example/"))
+
+        self._run(scenario, max_latency=60)
+        self.assertEqual(len(database.get_all_logs()), 3)
+
+    def test_failed_batch_is_retried(self):
+        calls = []
+        spy = database.save_scans
+
+        def flaky(scans):
+            calls.append(len(scans))
+            if len(calls) == 1:
+                raise OSError("disk full")
+            spy(scans)
+
+        async def scenario(writer):
+            writer.submit(*_scan("https://a.example/"))
+            await asyncio.sleep(0.1)
+            return writer.pending("https://a.example/")
+
+        with mock.patch.object(database, "save_scans", flaky), \
+                self.assertLogs("write_behind", "ERROR"):
+            left = self._run(scenario, max_latency=0.01)
+        self.assertEqual(len(calls), 2)
+        self.assertIsNone(left)
+        self.assertIsNotNone(database.get_log_by_url("https://a.example/"))
+
+    def test_close_stops_retrying_a_failing_disk(self):
+        calls = []
+
+        def broken(scans):
+            calls.append(len(scans))
+            raise OSError("disk full")
+
+        async def scenario(writer):
+            writer.submit(*_scan("https://a.example/"))
+            writer.submit(*_scan("https://b.example/"))
+
+        with mock.patch.object(database, "save_scans", broken), \
+                self.assertLogs("write_behind", "ERROR") as logs:
+            self._run(scenario, max_latency=0.01, shutdown_timeout=60, close_attempts=3)
+        self.assertEqual(calls, [2, 2, 2])      # backed off, then gave up – no tight loop
+        self.assertIn("https://a.example/, https://b.example/", logs.output[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
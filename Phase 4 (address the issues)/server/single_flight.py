@@ -0,0 +1,43 @@
+# single_flight.py
+
+"""
+In-flight deduplication for coroutines.
+
+When several tabs (or users) open the same page at once, every ``/log``
+call used to start its own full scan.  :class:`SingleFlight` keys the
+running work: the first caller for a key starts it, later callers await
+the same future, and the key is released as soon as the work finishes so
+the next call after that starts afresh.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await *factory()* for *key*, sharing it with any call already running."""
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._release(key, done))
+        # shield: one caller going away must not cancel the scan for the rest
+        return await asyncio.shield(future)
+
+    def _release(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()       # mark as retrieved even if every waiter left
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,215 @@
+# tls_probe.py
+
+"""
+One TLS handshake per origin, shared by the SSL/TLS and HTTPS scanners.
+
+The probe connects with the *verified* SSL context first.  For the usual
+case – a trusted certificate – that single handshake tells us everything:
+negotiated version and cipher, the decoded certificate, the DER chain and
+the fact that it verified.  Only when verification fails do we make a
+second, unverified handshake to get at the certificate we were refused.
+
+HSTS is not part of the handshake, but both scanners want it next to the
+TLS facts, so :func:`probe_snapshot` copies it in from the page snapshot.
+"""
+
+import _ssl
+import asyncio
+import socket
+import ssl
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+from deadline import clamp
+from page_snapshot import PageSnapshot
+from transport import ssl_context
+
+DEFAULT_TIMEOUT = 5
+
+
+@dataclass(frozen=True)
+class TLSProbe:
+    """What one handshake (two, if the chain didn't verify) told us."""
+    host: str
+    port: int
+    version: Optional[str] = None            # e.g. "TLSv1.3"
+    cipher: Optional[Tuple[str, str, int]] = None
+    cert: Mapping[str, Any] = field(default_factory=dict)   # getpeercert() shape
+    chain_der: Tuple[bytes, ...] = ()        # leaf first
+    verified: bool = False
+    verify_error: Optional[str] = None
+    hsts: Optional[str] = None
+    handshakes: int = 0
+    error: Optional[str] = None              # no handshake completed at all
+    probed_at: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def leaf_der(self) -> bytes:
+        return self.chain_der[0] if self.chain_der else b""
+
+
+# --------------------------------------------------------------------------- #
+# Certificate details
+# --------------------------------------------------------------------------- #
+def _chain_der(tls_obj, leaf: Optional[bytes]) -> Tuple[bytes, ...]:
+    """Full peer chain where the interpreter exposes it, else just the leaf."""
+    get_chain = getattr(getattr(tls_obj, "_sslobj", None), "get_unverified_chain", None)
+    if get_chain is not None:
+        try:
+            chain = get_chain() or []
+            return tuple(c.public_bytes(_ssl.ENCODING_DER) for c in chain)
+        except Exception:
+            pass
+    return (leaf,) if leaf else ()
+
+
+def _decode_der(der: bytes) -> dict:
+    """
+    getpeercert() only decodes certificates that verified, so rebuild the
+    fields we score on from the DER.  Needs ``cryptography``; without it
+    the untrusted certificate's details are simply unavailable.
+    """
+    if not der:
+        return {}
+    try:
+        from cryptography import x509
+        cert = x509.load_der_x509_certificate(der)
+    except Exception:
+        return {}
+
+    def rdns(name):
+        return tuple(((attr.oid._name, attr.value),) for attr in name)
+
+    not_after = getattr(cert, "not_valid_after_utc", None) or cert.not_valid_after
+    return {
+        "subject": rdns(cert.subject),
+        "issuer": rdns(cert.issuer),
+        "notAfter": not_after.strftime("%b %d %H:%M:%S %Y GMT"),
+    }
+
+
+def _capture(tls_obj) -> dict:
+    """Pull the handshake facts off an SSLSocket / SSLObject."""
+    leaf = tls_obj.getpeercert(binary_form=True)
+    return {
+        "version": tls_obj.version() or "unknown",
+        "cipher": tls_obj.cipher(),
+        "cert": tls_obj.getpeercert() or {},
+        "chain_der": _chain_der(tls_obj, leaf),
+    }
+
+
+def _build(host: str, port: int, info: dict, verify_error: Optional[str],
+           handshakes: int) -> TLSProbe:
+    cert = info["cert"]
+    if not cert and info["chain_der"]:
+        cert = _decode_der(info["chain_der"][0])
+    return TLSProbe(host=host, port=port, version=info["version"],
+                    cipher=info["cipher"], cert=cert,
+                    chain_der=info["chain_der"], verified=verify_error is None,
+                    verify_error=verify_error, handshakes=handshakes,
+                    probed_at=time.time())
+
+
+def _verify_message(exc: ssl.SSLCertVerificationError) -> str:
+    return getattr(exc, "verify_message", None) or str(exc)
+
+
+# --------------------------------------------------------------------------- #
+# Probes
+# --------------------------------------------------------------------------- #
+def _handshake(host: str, port: int, ctx: ssl.SSLContext, timeout: float) -> dict:
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        with ctx.wrap_socket(sock, server_hostname=host) as ssock:
+            return _capture(ssock)
+
+
+def probe_tls(host: str, port: int = 443, timeout: float = DEFAULT_TIMEOUT) -> TLSProbe:
+    """Probe host:port; never raises."""
+    try:
+        return _build(host, port, _handshake(host, port, ssl_context(verified=True), timeout),
+                      None, 1)
+    except ssl.SSLCertVerificationError as verr:
+        verify_error = _verify_message(verr)
+    except Exception as exc:
+        return TLSProbe(host=host, port=port, error=str(exc), handshakes=1,
+                        probed_at=time.time())
+
+    try:
+        info = _handshake(host, port, ssl_context(verified=False), timeout)
+    except Exception as exc:
+        return TLSProbe(host=host, port=port, error=str(exc), verify_error=verify_error,
+                        handshakes=2, probed_at=time.time())
+    return _build(host, port, info, verify_error, 2)
+
+
+async def _handshake_async(host: str, port: int, ctx: ssl.SSLContext, timeout: float) -> dict:
+    _, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port, ssl=ctx, server_hostname=host),
+        timeout=clamp(timeout),
+    )
+    try:
+        return _capture(writer.get_extra_info("ssl_object"))
+    finally:
+        writer.close()
+
+
+async def probe_tls_async(host: str, port: int = 443,
+                          timeout: float = DEFAULT_TIMEOUT) -> TLSProbe:
+    """probe_tls on the event loop; never raises."""
+    try:
+        info = await _handshake_async(host, port, ssl_context(verified=True), timeout)
+        return _build(host, port, info, None, 1)
+    except ssl.SSLCertVerificationError as verr:
+        verify_error = _verify_message(verr)
+    except Exception as exc:
+        return TLSProbe(host=host, port=port, error=str(exc) or type(exc).__name__,
+                        handshakes=1, probed_at=time.time())
+
+    try:
+        info = await _handshake_async(host, port, ssl_context(verified=False), timeout)
+    except Exception as exc:
+        return TLSProbe(host=host, port=port, error=str(exc) or type(exc).__name__,
+                        verify_error=verify_error, handshakes=2, probed_at=time.time())
+    return _build(host, port, info, verify_error, 2)
+
+
+# --------------------------------------------------------------------------- #
+# Snapshot helpers
+# --------------------------------------------------------------------------- #
+def _target(snapshot: PageSnapshot) -> Tuple[str, int, bool]:
+    parsed = urlparse(snapshot.final_url or snapshot.url)
+    is_https = parsed.scheme == "https"
+    return (parsed.hostname or "", parsed.port or (443 if is_https else 80), is_https)
+
+
+def _with_hsts(probe: TLSProbe, snapshot: PageSnapshot) -> TLSProbe:
+    # browsers ignore HSTS sent over plain HTTP, so only trust it from TLS
+    return replace(probe, hsts=snapshot.headers.get("Strict-Transport-Security"))
+
+
+def _no_tls(host: str, port: int) -> TLSProbe:
+    return TLSProbe(host=host, port=port, error="page is not served over HTTPS",
+                    probed_at=time.time())
+
+
+def probe_snapshot(snapshot: PageSnapshot, timeout: float = DEFAULT_TIMEOUT) -> TLSProbe:
+    """Probe the origin the snapshot was finally served from."""
+    host, port, is_https = _target(snapshot)
+    if not is_https:
+        return _no_tls(host, port)
+    return _with_hsts(probe_tls(host, port, timeout), snapshot)
+
+
+async def probe_snapshot_async(snapshot: PageSnapshot,
+                               timeout: float = DEFAULT_TIMEOUT) -> TLSProbe:
+    host, port, is_https = _target(snapshot)
+    if not is_https:
+        return _no_tls(host, port)
+    return _with_hsts(await probe_tls_async(host, port, timeout), snapshot)
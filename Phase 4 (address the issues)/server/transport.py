@@ -0,0 +1,191 @@
+# transport.py
+
+"""
+Process-wide HTTP/TLS transport shared by the scanners.
+
+A bare ``requests.get`` builds a throwaway Session, a fresh connection pool
+and a new SSL context (re-reading the CA bundle) on every call.  The
+:class:`TransportManager` keeps instead:
+
+  • one pooled ``requests.Session`` per origin (scheme://host:port), with
+    keep-alive, configurable pool sizes and a urllib3 retry policy
+  • two pre-built SSL contexts – verified (CA bundle loaded once) and
+    unverified – handed to every connection and to the TLS probes
+
+The sync scanner paths go through :func:`get_transport` and
+:func:`ssl_context`.  Until a manager is installed those fall back to the
+plain ``requests`` module and fresh ``ssl`` contexts, so the command-line
+tools and the unit tests behave exactly as before.
+
+The server installs a manager at startup, but its scans run on the async
+engine (``async_http``), not on these sessions: the engine takes the
+manager's SSL context, per-host pool size (``pool_maxsize``) and retry
+policy instead, so one configuration covers both paths.
+"""
+
+import os
+import ssl
+import threading
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional
+from urllib.parse import urlparse
+
+import certifi
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# defaults – tweak per deployment
+POOL_CONNECTIONS = 10      # host pools kept per session
+POOL_MAXSIZE = 10          # keep-alive connections per host pool
+MAX_SESSIONS = 256         # origins kept warm before the oldest is closed
+DEFAULT_RETRY = Retry(
+    total=2,
+    read=0,                # a slow page shouldn't cost us 3x the timeout
+    backoff_factor=0.3,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD"}),
+    raise_on_status=False,
+)
+
+
+def _origin(url: str) -> str:
+    p = urlparse(url)
+    port = p.port or (443 if p.scheme == "https" else 80)
+    return f"{p.scheme}://{(p.hostname or '').lower()}:{port}"
+
+
+class NoCookiePolicy(DefaultCookiePolicy):
+    """
+    Don't carry cookies from one scan into the next.  ``resp.cookies`` is
+    filled independently, so the cookie scanners still see every
+    Set-Cookie the page sends.
+    """
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+class _ContextAdapter(HTTPAdapter):
+    """HTTPAdapter that hands one pre-built SSL context to every connection."""
+
+    def __init__(self, ssl_context: ssl.SSLContext, **kwargs):
+        self._ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = self._ssl_context
+        return super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, *args, **kwargs):
+        kwargs["ssl_context"] = self._ssl_context
+        return super().proxy_manager_for(*args, **kwargs)
+
+    def cert_verify(self, conn, url, verify, cert):
+        # requests may swap verify=True for $REQUESTS_CA_BUNDLE; either way
+        # the shared context (and its bundle) is what does the checking
+        if not verify:
+            raise ValueError("TransportManager sessions always verify certificates")
+        super().cert_verify(conn, url, verify, cert)
+        # CA bundle is already loaded into the shared context
+        conn.ca_certs = None
+        conn.ca_cert_dir = None
+
+
+class TransportManager:
+    """Pooled per-origin sessions plus cached SSL contexts."""
+
+    def __init__(self,
+                 pool_connections: int = POOL_CONNECTIONS,
+                 pool_maxsize: int = POOL_MAXSIZE,
+                 max_retries: Retry = DEFAULT_RETRY,
+                 max_sessions: int = MAX_SESSIONS,
+                 ca_bundle: Optional[str] = None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.max_sessions = max_sessions
+        # same bundle lookup as requests itself
+        self.ca_bundle = (ca_bundle
+                          or os.environ.get("REQUESTS_CA_BUNDLE")
+                          or os.environ.get("CURL_CA_BUNDLE")
+                          or certifi.where())
+        self._verified_ctx = ssl.create_default_context(cafile=self.ca_bundle)
+        self._unverified_ctx = ssl._create_unverified_context()
+        self._sessions: "OrderedDict[str, requests.Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- TLS ------------------------------------------------------------- #
+    def ssl_context(self, verified: bool = True) -> ssl.SSLContext:
+        return self._verified_ctx if verified else self._unverified_ctx
+
+    # ---- sessions -------------------------------------------------------- #
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        session.cookies.set_policy(NoCookiePolicy())
+        adapter = _ContextAdapter(self._verified_ctx,
+                                  pool_connections=self.pool_connections,
+                                  pool_maxsize=self.pool_maxsize,
+                                  max_retries=self.max_retries)
+        session.mount("https://", adapter)
+        session.mount("http://", HTTPAdapter(pool_connections=self.pool_connections,
+                                             pool_maxsize=self.pool_maxsize,
+                                             max_retries=self.max_retries))
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """The pooled session for *url*'s origin (created on first use)."""
+        key = _origin(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = self._new_session()
+                while len(self._sessions) > self.max_sessions:
+                    _, oldest = self._sessions.popitem(last=False)
+                    oldest.close()
+            else:
+                self._sessions.move_to_end(key)
+            return session
+
+    # ---- the bits of the requests API the scanners use -------------------- #
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.session_for(url).get(url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.session_for(url).head(url, **kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# --------------------------------------------------------------------------- #
+# Process-wide instance
+# --------------------------------------------------------------------------- #
+_manager: Optional[TransportManager] = None
+
+
+def install_transport(manager: Optional[TransportManager]) -> None:
+    """Make *manager* the shared transport (None restores the fallback)."""
+    global _manager
+    _manager = manager
+
+
+def get_transport():
+    """
+    The installed TransportManager, or the ``requests`` module itself when
+    none is installed – both offer ``.get`` / ``.head``.
+    """
+    return _manager if _manager is not None else requests
+
+
+def ssl_context(verified: bool = True) -> ssl.SSLContext:
+    """Shared SSL context, or a fresh one when no manager is installed."""
+    if _manager is not None:
+        return _manager.ssl_context(verified)
+    return ssl.create_default_context() if verified else ssl._create_unverified_context()
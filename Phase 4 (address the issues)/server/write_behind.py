@@ -0,0 +1,174 @@
+# write_behind.py
+
+"""
+Write-behind batching for completed scans.
+
+Committing every scan on its own costs one fsync per ``/log``.  The
+:class:`WriteBehindWriter` takes completed scans from the handlers without
+touching the disk, and a background task writes them in batches – one
+transaction for up to ``max_batch`` scans, at most ``max_latency`` seconds
+after the oldest of them arrived.
+
+Until a scan is committed it lives in an in-memory overlay, so
+:meth:`WriteBehindWriter.pending` (and the ``/logs`` merge) see it straight
+away.  A later scan of the same URL replaces an unflushed one rather than
+queueing a second write.  A failed batch is requeued and retried after
+``max_latency``.  :meth:`WriteBehindWriter.close` flushes whatever is left,
+bounded by ``shutdown_timeout`` and by ``close_attempts`` failed flushes in
+a row, and logs any scans it had to drop.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import database
+from async_db import get_executor
+
+# defaults – tweak per deployment
+MAX_BATCH = 64                # scans per transaction
+MAX_LATENCY = 0.5             # seconds a scan may wait for its batch
+SHUTDOWN_TIMEOUT = 10.0       # seconds close() waits for the final flush
+CLOSE_ATTEMPTS = 3            # failed flushes in a row before close() gives up
+
+# SQLite's CURRENT_TIMESTAMP (UTC), so overlay rows age like stored ones
+_DB_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+logger = logging.getLogger(__name__)
+
+Scan = Tuple[str, list, tuple, float]          # save_scan() arguments
+
+
+class WriteBehindWriter:
+    """Batches completed scans into shared transactions, with a read overlay."""
+
+    def __init__(self, max_batch: int = MAX_BATCH, max_latency: float = MAX_LATENCY,
+                 shutdown_timeout: float = SHUTDOWN_TIMEOUT,
+                 close_attempts: int = CLOSE_ATTEMPTS):
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.shutdown_timeout = shutdown_timeout
+        self.close_attempts = close_attempts
+        self._pending: "OrderedDict[str, Tuple[Scan, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[Scan, Dict[str, Any]]] = {}
+        self._oldest = 0.0
+        self._has_work: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._failures = 0            # failed flushes in a row
+
+    # ---- lifecycle -------------------------------------------------------- #
+    def start(self) -> None:
+        """Start the flush task on the running loop."""
+        self._has_work = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Flush what is queued (within shutdown_timeout) and stop."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._has_work.set()
+        self._batch_full.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            lost = list(self._pending) + list(self._inflight)
+            logger.error("Write-behind flush timed out; %d scans not stored: %s",
+                         len(lost), ", ".join(lost))
+        self._task = None
+
+    # ---- handler side ----------------------------------------------------- #
+    def submit(self, url: str, results: list, final_scores: tuple,
+               duration: float) -> Dict[str, Any]:
+        """Queue a scan for writing; returns the record readers will see."""
+        if self._task is None:
+            raise RuntimeError("WriteBehindWriter.start() has not been called")
+        stamp = datetime.now(timezone.utc).strftime(_DB_TIMESTAMP_FORMAT)
+        record = database.record_for(url, results, final_scores, duration, stamp)
+        if not self._pending:
+            self._oldest = asyncio.get_running_loop().time()
+        self._pending.pop(url, None)
+        self._pending[url] = ((url, results, final_scores, duration), record)
+        self._has_work.set()
+        if len(self._pending) >= self.max_batch:
+            self._batch_full.set()
+        return record
+
+    def pending(self, url: str) -> Optional[Dict[str, Any]]:
+        """The unflushed record for *url*, if there is one."""
+        entry = self._pending.get(url) or self._inflight.get(url)
+        return entry[1] if entry else None
+
+    def merge(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Overlay unflushed records on *logs* (most recent first)."""
+        overlay = {url: rec for url, (_, rec) in self._inflight.items()}
+        overlay.update((url, rec) for url, (_, rec) in self._pending.items())
+        if not overlay:
+            return logs
+        newest = sorted(overlay.values(), key=lambda r: r["timestamp"], reverse=True)
+        return newest + [log for log in logs if log["url"] not in overlay]
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._inflight)
+
+    # ---- flush task ------------------------------------------------------- #
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                if self._closing:
+                    return
+                self._has_work.clear()
+                await self._has_work.wait()
+                continue
+            # wait for a full batch, the oldest scan's deadline, or shutdown
+            deadline = self._oldest + self.max_latency
+            while len(self._pending) < self.max_batch and not self._closing:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._batch_full.clear()
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            await self._flush_batch()
+
+    async def _flush_batch(self) -> None:
+        batch = []
+        while self._pending and len(batch) < self.max_batch:
+            url, entry = self._pending.popitem(last=False)
+            self._inflight[url] = entry
+            batch.append(url)
+        if self._pending:
+            self._oldest = asyncio.get_running_loop().time()
+        try:
+            await get_executor().write(database.save_scans,
+                                       [self._inflight[url][0] for url in batch])
+        except Exception:
+            logger.exception("Write-behind batch of %d scans failed; will retry", len(batch))
+            # requeue at the front unless a newer scan of the URL came in meanwhile
+            for url in reversed(batch):
+                entry = self._inflight.pop(url)
+                if url not in self._pending:
+                    self._pending[url] = entry
+                    self._pending.move_to_end(url, last=False)
+            self._failures += 1
+            if self._closing and self._failures >= self.close_attempts:
+                lost = list(self._pending)
+                self._pending.clear()
+                logger.error("Write-behind gave up after %d failed flushes at shutdown; "
+                             "%d scans not stored: %s", self._failures, len(lost), ", ".join(lost))
+                return
+            await asyncio.sleep(self.max_latency)
+            return
+        self._failures = 0
+        for url in batch:
+            self._inflight.pop(url, None)